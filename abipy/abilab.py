@@ -5,12 +5,14 @@ from __future__ import print_function, division, unicode_literals
 
 import sys
 import os
+import time
 import collections
 
 ####################
 ### Monty import ###
 ####################
 from monty.os.path import which
+from monty.string import is_string
 from monty.termcolor import cprint
 
 #######################
@@ -24,54 +26,152 @@ ArrayWithUnit = units.ArrayWithUnit
 ####################
 ### Abipy import ###
 ####################
-from abipy.flowtk import Pseudo, PseudoTable, Mrgscr, Mrgddb, Mrggkk, Flow, Work, TaskManager, AbinitBuild, flow_main
 from abipy.core.release import __version__, min_abinit_version
 from abipy.core.globals import enable_notebook, in_notebook, disable_notebook
-from abipy.core import restapi
-from abipy.core.structure import (Lattice, Structure, StructureModifier, dataframes_from_structures,
-  mp_match_structure, mp_search, cod_search)
-from abipy.core.mixins import CubeFile
-from abipy.core.func1d import Function1D
-from abipy.core.kpoints import set_atol_kdiff
-from abipy.abio.robots import Robot
-from abipy.abio.inputs import AbinitInput, MultiDataset, AnaddbInput, OpticInput
-from abipy.abio.abivars import AbinitInputFile
-from abipy.abio.outputs import AbinitLogFile, AbinitOutputFile, OutNcFile, AboRobot #, CubeFile
-from abipy.tools.printing import print_dataframe
-from abipy.tools.notebooks import print_source, print_doc
-from abipy.tools.plotting import get_ax_fig_plt, get_axarray_fig_plt, get_ax3d_fig_plt #, plot_array, ArrayPlotter
-from abipy.abio.factories import *
-from abipy.electrons.ebands import (ElectronBands, ElectronBandsPlotter, ElectronDos, ElectronDosPlotter,
-    dataframe_from_ebands)
-from abipy.electrons.gsr import GsrFile, GsrRobot
-from abipy.electrons.eskw import EskwFile
-from abipy.electrons.psps import PspsFile
-from abipy.electrons.ddk import DdkFile
-from abipy.electrons.gw import SigresFile, SigresRobot
-from abipy.electrons.bse import MdfFile, MdfRobot
-from abipy.electrons.scissors import ScissorsBuilder
-from abipy.electrons.scr import ScrFile
-from abipy.electrons.denpot import (DensityNcFile, VhartreeNcFile, VxcNcFile, VhxcNcFile,VembNcFile, PotNcFile,
-    DensityFortranFile, Cut3dDenPotNcFile)
-from abipy.electrons.fatbands import FatBandsFile
-from abipy.electrons.optic import OpticNcFile, OpticRobot
-from abipy.electrons.fold2bloch import Fold2BlochNcfile
-from abipy.dfpt.phonons import (PhbstFile, PhbstRobot, PhononBands, PhononBandsPlotter, PhdosFile, PhononDosPlotter,
-    PhdosReader, phbands_gridplot)
-from abipy.dfpt.ddb import DdbFile, DdbRobot
-from abipy.dfpt.anaddbnc import AnaddbNcFile, AnaddbNcRobot
-from abipy.dfpt.gruneisen import GrunsNcFile
-#from abipy.dfpt.vsound import SoundVelocity
-from abipy.dynamics.hist import HistFile, HistRobot
-from abipy.waves import WfkFile
-from abipy.eph.a2f import A2fFile, A2fRobot
-from abipy.eph.sigeph import SigEPhFile, SigEPhRobot
-from abipy.eph.eph_plotter import EphPlotter
-from abipy.wannier90 import WoutFile, AbiwanFile, AbiwanRobot
-from abipy.electrons.lobster import CoxpFile, ICoxpFile, LobsterDoscarFile, LobsterInput, LobsterAnalyzer
 
+# The other names exported by abilab are imported on first access (see __getattr__ below)
+# so that scripts do not pay the cost of importing flowtk, matplotlib and all the file classes.
+# Mapping name --> (module, attribute). attribute is None if name refers to the module itself.
+_LAZY_ATTRS = collections.OrderedDict()
+
+def _register_lazy(modname, names):
+    for name in names.split():
+        _LAZY_ATTRS[name] = (modname, name)
+
+_register_lazy("abipy.flowtk",
+    "Pseudo PseudoTable Mrgscr Mrgddb Mrggkk Flow Work TaskManager AbinitBuild flow_main")
+_LAZY_ATTRS["restapi"] = ("abipy.core.restapi", None)
+_register_lazy("abipy.core.structure",
+    "Lattice Structure StructureModifier dataframes_from_structures mp_match_structure mp_search cod_search")
+_register_lazy("abipy.core.mixins", "CubeFile lazy_open")
+_register_lazy("abipy.core.func1d", "Function1D")
+_register_lazy("abipy.core.kpoints", "set_atol_kdiff")
+_register_lazy("abipy.abio.robots", "Robot")
+_register_lazy("abipy.abio.inputs", "AbinitInput MultiDataset AnaddbInput OpticInput")
+_register_lazy("abipy.abio.abivars", "AbinitInputFile")
+_register_lazy("abipy.abio.outputs", "AbinitLogFile AbinitOutputFile OutNcFile AboRobot")
+_register_lazy("abipy.tools.printing", "print_dataframe")
+_register_lazy("abipy.tools.notebooks", "print_source print_doc")
+_register_lazy("abipy.tools.plotting", "get_ax_fig_plt get_axarray_fig_plt get_ax3d_fig_plt")
+# Same names as abipy.abio.factories.__all__
+_register_lazy("abipy.abio.factories",
+    "gs_input ebands_input phonons_from_gsinput g0w0_with_ppmodel_inputs g0w0_convergence_inputs "
+    "bse_with_mdf_inputs ion_ioncell_relax_input ion_ioncell_relax_and_ebands_input scf_phonons_inputs "
+    "piezo_elastic_inputs_from_gsinput scf_piezo_elastic_inputs scf_for_phonons dte_from_gsinput dfpt_from_gsinput")
+_register_lazy("abipy.electrons.ebands",
+    "ElectronBands ElectronBandsPlotter ElectronDos ElectronDosPlotter dataframe_from_ebands")
+_register_lazy("abipy.electrons.gsr", "GsrFile GsrRobot")
+_register_lazy("abipy.electrons.eskw", "EskwFile")
+_register_lazy("abipy.electrons.psps", "PspsFile")
+_register_lazy("abipy.electrons.ddk", "DdkFile")
+_register_lazy("abipy.electrons.gw", "SigresFile SigresRobot")
+_register_lazy("abipy.electrons.bse", "MdfFile MdfRobot")
+_register_lazy("abipy.electrons.scissors", "ScissorsBuilder")
+_register_lazy("abipy.electrons.scr", "ScrFile")
+_register_lazy("abipy.electrons.denpot",
+    "DensityNcFile VhartreeNcFile VxcNcFile VhxcNcFile VembNcFile PotNcFile DensityFortranFile Cut3dDenPotNcFile")
+_register_lazy("abipy.electrons.fatbands", "FatBandsFile")
+_register_lazy("abipy.electrons.optic", "OpticNcFile OpticRobot")
+_register_lazy("abipy.electrons.fold2bloch", "Fold2BlochNcfile")
+_register_lazy("abipy.dfpt.phonons",
+    "PhbstFile PhbstRobot PhononBands PhononBandsPlotter PhdosFile PhononDosPlotter PhdosReader phbands_gridplot")
+_register_lazy("abipy.dfpt.ddb", "DdbFile DdbRobot")
+_register_lazy("abipy.dfpt.anaddbnc", "AnaddbNcFile AnaddbNcRobot")
+_register_lazy("abipy.dfpt.gruneisen", "GrunsNcFile")
+_register_lazy("abipy.dynamics.hist", "HistFile HistRobot")
+_register_lazy("abipy.waves", "WfkFile")
+_register_lazy("abipy.eph.a2f", "A2fFile A2fRobot")
+_register_lazy("abipy.eph.sigeph", "SigEPhFile SigEPhRobot")
+_register_lazy("abipy.eph.eph_plotter", "EphPlotter")
+_register_lazy("abipy.wannier90", "WoutFile AbiwanFile AbiwanRobot")
+_register_lazy("abipy.electrons.lobster",
+    "CoxpFile ICoxpFile LobsterDoscarFile LobsterInput LobsterAnalyzer")
 # Abinit Documentation.
-from abipy.abio.abivars_db import get_abinit_variables, abinit_help, docvar
+_register_lazy("abipy.abio.abivars_db", "get_abinit_variables abinit_help docvar")
+
+# Mapping module name --> wall-time in seconds spent to import it for the first time via abilab.
+_IMPORT_TIMES = collections.OrderedDict()
+
+
+def _import_module(modname):
+    """Import module ``modname``, record the import time if the module was not already loaded."""
+    module = sys.modules.get(modname)
+    if module is not None: return module
+    import importlib
+    start = time.time()
+    module = importlib.import_module(modname)
+    _IMPORT_TIMES[modname] = time.time() - start
+    return module
+
+
+def _import_object(spec):
+    """Return the object associated to ``spec``: string of the form ``module:name``."""
+    modname, name = spec.split(":")
+    return getattr(_import_module(modname), name)
+
+
+class _LazyClassDict(collections.OrderedDict):
+    """
+    :class:`OrderedDict` mapping a file extension to the File class.
+    Classes are specified with ``module:name`` strings and the module is imported
+    when the value is accessed so that the dictionary behaves as a mapping ext --> class.
+    Use ``get_spec`` and ``iter_specs`` to access the strings without importing anything.
+    """
+
+    @staticmethod
+    def _resolve(value):
+        return _import_object(value) if is_string(value) else value
+
+    def __getitem__(self, key):
+        return self._resolve(self.get_spec(key))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def get_spec(self, key):
+        """Return the ``module:name`` string (or the class if set explicitly) associated to ``key``."""
+        return super(_LazyClassDict, self).__getitem__(key)
+
+    def iter_specs(self):
+        """Iterate over (ext, spec) tuples. Nothing is imported."""
+        for k in self:
+            yield k, self.get_spec(k)
+
+
+def __getattr__(name):
+    """
+    Module-level attribute resolution: import the module associated to ``name`` on first access.
+    """
+    try:
+        modname, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    module = _import_module(modname)
+    value = module if attr is None else getattr(module, attr)
+    # Cache value in the module namespace so that __getattr__ is not called anymore.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+def get_import_times():
+    """
+    Return :class:`OrderedDict` mapping the name of the modules imported so far through
+    the lazy attributes of abilab to the wall-time (seconds) spent to import them.
+    Note that the time of a module includes the import of its dependencies
+    (if not already loaded by a previous import).
+    """
+    return _IMPORT_TIMES.copy()
 
 
 def _straceback():
@@ -80,59 +180,60 @@ def _straceback():
     return traceback.format_exc()
 
 # Abinit text files. Use OrderedDict for nice output in show_abiopen_exc2class.
-ext2file = collections.OrderedDict([
-    (".abi", AbinitInputFile),
-    (".in", AbinitInputFile),
-    (".abo", AbinitOutputFile),
-    (".out", AbinitOutputFile),
-    (".log", AbinitLogFile),
-    (".cif", Structure),
-    ("POSCAR", Structure),
-    (".cssr", Structure),
-    (".cube", CubeFile),
-    ("anaddb.nc", AnaddbNcFile),
-    ("DEN", DensityFortranFile),
-    (".psp8", Pseudo),
-    (".pspnc", Pseudo),
-    (".fhi", Pseudo),
-    ("JTH.xml", Pseudo),
-    (".wout", WoutFile),
+# The class is specified with a `module:name` string and imported only when accessed.
+ext2file = _LazyClassDict([
+    (".abi", "abipy.abio.abivars:AbinitInputFile"),
+    (".in", "abipy.abio.abivars:AbinitInputFile"),
+    (".abo", "abipy.abio.outputs:AbinitOutputFile"),
+    (".out", "abipy.abio.outputs:AbinitOutputFile"),
+    (".log", "abipy.abio.outputs:AbinitLogFile"),
+    (".cif", "abipy.core.structure:Structure"),
+    ("POSCAR", "abipy.core.structure:Structure"),
+    (".cssr", "abipy.core.structure:Structure"),
+    (".cube", "abipy.core.mixins:CubeFile"),
+    ("anaddb.nc", "abipy.dfpt.anaddbnc:AnaddbNcFile"),
+    ("DEN", "abipy.electrons.denpot:DensityFortranFile"),
+    (".psp8", "abipy.flowtk:Pseudo"),
+    (".pspnc", "abipy.flowtk:Pseudo"),
+    (".fhi", "abipy.flowtk:Pseudo"),
+    ("JTH.xml", "abipy.flowtk:Pseudo"),
+    (".wout", "abipy.wannier90:WoutFile"),
     # Lobster files.
-    ("COHPCAR.lobster", CoxpFile),
-    ("COOPCAR.lobster", CoxpFile),
-    ("ICOHPLIST.lobster", ICoxpFile),
-    ("DOSCAR.lobster", LobsterDoscarFile),
+    ("COHPCAR.lobster", "abipy.electrons.lobster:CoxpFile"),
+    ("COOPCAR.lobster", "abipy.electrons.lobster:CoxpFile"),
+    ("ICOHPLIST.lobster", "abipy.electrons.lobster:ICoxpFile"),
+    ("DOSCAR.lobster", "abipy.electrons.lobster:LobsterDoscarFile"),
 ])
 
 # Abinit files require a special treatment.
-abiext2ncfile = collections.OrderedDict([
-    ("GSR.nc", GsrFile),
-    ("ESKW.nc", EskwFile),
-    ("DEN.nc", DensityNcFile),
-    ("OUT.nc", OutNcFile),
-    ("DDK.nc", DdkFile),
-    ("VHA.nc", VhartreeNcFile),
-    ("VXC.nc", VxcNcFile),
-    ("VHXC.nc", VhxcNcFile),
-    ("VEMB.nc", VembNcFile),
-    ("POT.nc", PotNcFile),
-    ("WFK.nc", WfkFile),
-    ("HIST.nc", HistFile),
-    ("PSPS.nc", PspsFile),
-    ("DDB", DdbFile),
-    ("PHBST.nc", PhbstFile),
-    ("PHDOS.nc", PhdosFile),
-    ("SCR.nc", ScrFile),
-    ("SIGRES.nc", SigresFile),
-    ("GRUNS.nc", GrunsNcFile),
-    ("MDF.nc", MdfFile),
-    ("FATBANDS.nc", FatBandsFile),
-    ("FOLD2BLOCH.nc", Fold2BlochNcfile),
-    ("CUT3DDENPOT.nc", Cut3dDenPotNcFile),
-    ("OPTIC.nc", OpticNcFile),
-    ("A2F.nc", A2fFile),
-    ("SIGEPH.nc", SigEPhFile),
-    ("ABIWAN.nc", AbiwanFile),
+abiext2ncfile = _LazyClassDict([
+    ("GSR.nc", "abipy.electrons.gsr:GsrFile"),
+    ("ESKW.nc", "abipy.electrons.eskw:EskwFile"),
+    ("DEN.nc", "abipy.electrons.denpot:DensityNcFile"),
+    ("OUT.nc", "abipy.abio.outputs:OutNcFile"),
+    ("DDK.nc", "abipy.electrons.ddk:DdkFile"),
+    ("VHA.nc", "abipy.electrons.denpot:VhartreeNcFile"),
+    ("VXC.nc", "abipy.electrons.denpot:VxcNcFile"),
+    ("VHXC.nc", "abipy.electrons.denpot:VhxcNcFile"),
+    ("VEMB.nc", "abipy.electrons.denpot:VembNcFile"),
+    ("POT.nc", "abipy.electrons.denpot:PotNcFile"),
+    ("WFK.nc", "abipy.waves:WfkFile"),
+    ("HIST.nc", "abipy.dynamics.hist:HistFile"),
+    ("PSPS.nc", "abipy.electrons.psps:PspsFile"),
+    ("DDB", "abipy.dfpt.ddb:DdbFile"),
+    ("PHBST.nc", "abipy.dfpt.phonons:PhbstFile"),
+    ("PHDOS.nc", "abipy.dfpt.phonons:PhdosFile"),
+    ("SCR.nc", "abipy.electrons.scr:ScrFile"),
+    ("SIGRES.nc", "abipy.electrons.gw:SigresFile"),
+    ("GRUNS.nc", "abipy.dfpt.gruneisen:GrunsNcFile"),
+    ("MDF.nc", "abipy.electrons.bse:MdfFile"),
+    ("FATBANDS.nc", "abipy.electrons.fatbands:FatBandsFile"),
+    ("FOLD2BLOCH.nc", "abipy.electrons.fold2bloch:Fold2BlochNcfile"),
+    ("CUT3DDENPOT.nc", "abipy.electrons.denpot:Cut3dDenPotNcFile"),
+    ("OPTIC.nc", "abipy.electrons.optic:OpticNcFile"),
+    ("A2F.nc", "abipy.eph.a2f:A2fFile"),
+    ("SIGEPH.nc", "abipy.eph.sigeph:SigEPhFile"),
+    ("ABIWAN.nc", "abipy.wannier90:AbiwanFile"),
 ])
 
 
@@ -144,37 +245,46 @@ def abiopen_ext2class_table():
     from tabulate import tabulate
     table = []
 
-    for ext, cls in chain(ext2file.items(), abiext2ncfile.items()):
-        table.append((ext, str(cls)))
+    for ext, spec in chain(ext2file.iter_specs(), abiext2ncfile.iter_specs()):
+        table.append((ext, str(spec)))
 
     return tabulate(table, headers=["Extension", "Class"])
 
 
-def abifile_subclass_from_filename(filename):
+def _class_spec_from_filename(filename):
     """
-    Returns the appropriate class associated to the given filename.
+    Returns the ``module:name`` string of the class associated to the given filename
+    (or the class if registered explicitly). Nothing is imported here.
     """
-    if os.path.basename(filename) == Flow.PICKLE_FNAME:
-        return Flow
+    if os.path.basename(filename) == "__AbinitFlow__.pickle":
+        return "abipy.flowtk:Flow"
 
     from abipy.tools.text import rreplace
-    for ext, cls in ext2file.items():
+    for ext, spec in ext2file.iter_specs():
         # This to support gzipped files.
         if filename.endswith(".gz"): filename = rreplace(filename, ".gz", "", occurrence=1)
-        if filename.endswith(ext): return cls
+        if filename.endswith(ext): return spec
 
     ext = filename.split("_")[-1]
     try:
-        return abiext2ncfile[ext]
+        return abiext2ncfile.get_spec(ext)
     except KeyError:
-        for ext, cls in abiext2ncfile.items():
-            if filename.endswith(ext): return cls
+        for ext, spec in abiext2ncfile.iter_specs():
+            if filename.endswith(ext): return spec
 
     msg = ("No class has been registered for file:\n\t%s\n\nFile extensions supported:\n\n%s" %
         (filename, abiopen_ext2class_table()))
     raise ValueError(msg)
 
 
+def abifile_subclass_from_filename(filename):
+    """
+    Returns the appropriate class associated to the given filename.
+    Only the module defining the class is imported.
+    """
+    return _LazyClassDict._resolve(_class_spec_from_filename(filename))
+
+
 def dir2abifiles(top, recurse=True):
     """
     Analyze the filesystem starting from directory `top` and
@@ -204,19 +314,23 @@ def isabifile(filepath):
     Return True if `filepath` can be opened with ``abiopen``.
     """
     try:
-        abifile_subclass_from_filename(filepath)
+        _class_spec_from_filename(filepath)
         return True
     except ValueError:
         return False
 
 
-def abiopen(filepath):
+def abiopen(filepath, lazy=None):
     """
     Factory function that opens any file supported by abipy.
     File type is detected from the extension
 
     Args:
         filepath: string with the filename.
+        lazy: True to open netcdf files in lazy mode: the constructor reads only dimensions and
+            header variables while the structure, the band structure and the other arrays
+            are read on first access. Use ``ncfile.get_read_report()`` to get the list of variables read.
+            None to use the mode of the enclosing ``lazy_open`` context (eager mode if there is none).
     """
     # Handle ~ in filepath.
     filepath = os.path.expanduser(filepath)
@@ -234,21 +348,23 @@ def abiopen(filepath):
             filepath = tmp_path
 
     if os.path.basename(filepath) == "__AbinitFlow__.pickle":
-        return Flow.pickle_load(filepath)
+        return _import_object("abipy.flowtk:Flow").pickle_load(filepath)
 
     # Handle old output files produced by Abinit.
     import re
     outnum = re.compile(r".+\.out[\d]+")
     abonum = re.compile(r".+\.abo[\d]+")
     if outnum.match(filepath) or abonum.match(filepath):
-        return AbinitOutputFile.from_file(filepath)
+        return _import_object("abipy.abio.outputs:AbinitOutputFile").from_file(filepath)
 
     if os.path.basename(filepath) == "log":
         # Assume Abinit log file.
-        return AbinitLogFile.from_file(filepath)
+        return _import_object("abipy.abio.outputs:AbinitLogFile").from_file(filepath)
 
     cls = abifile_subclass_from_filename(filepath)
-    return cls.from_file(filepath)
+    from abipy.core.mixins import lazy_open, is_lazy_open
+    with lazy_open(lazy=is_lazy_open() if lazy is None else lazy):
+        return cls.from_file(filepath)
 
 
 def display_structure(obj, **kwargs):
@@ -270,6 +386,7 @@ def display_structure(obj, **kwargs):
                           "See also https://github.com/gmatteo/nbjsmol.")
 
     # Cast to structure, get string with cif data and pass it to nbjsmol.
+    from abipy.core.structure import Structure
     structure = Structure.as_structure(obj)
     return nbjsmol_display(structure.to(fmt="cif"), ext=".cif", **kwargs)
 
@@ -315,6 +432,7 @@ def abicheck(verbose=0):
     err_lines = []
     app = err_lines.append
 
+    from abipy.flowtk import TaskManager, AbinitBuild
     try:
         manager = TaskManager.from_user_config()
     except Exception:
@@ -403,3 +521,13 @@ o-  o/   oo`       ss    /y..y/    ss ss +y`   -y::y-    yo          -o/  .o- -o
    `  ..` `:-                            :+              /:         --` `-` `
             `.`                                                   ..`
 """
+
+
+# Public names, including the lazy ones, so that `from abipy.abilab import *` keeps working.
+__all__ = [name for name in list(globals()) if not name.startswith("_")] + list(_LAZY_ATTRS)
+
+if sys.version_info < (3, 7):
+    # Module-level __getattr__ (PEP 562) is not supported. Import everything at startup.
+    for _name in _LAZY_ATTRS:
+        __getattr__(_name)
+    del _name
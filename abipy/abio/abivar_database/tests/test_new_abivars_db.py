@@ -3,7 +3,7 @@ from __future__ import print_function, division, unicode_literals
 
 from abipy.core.testing import AbipyTest
 
-from abipy.abio.abivar_database.variables import get_codevars
+from abipy.abio.abivar_database.variables import get_codevars, VarDatabase
 
 
 class AbinitVariableDatabaseTest(AbipyTest):
@@ -72,3 +72,28 @@ class AbinitVariableDatabaseTest(AbipyTest):
 
         #ecut_var = docvar("ecut")
         #assert ecut_var.name == "ecut"
+
+    def test_compact_index(self):
+        """Testing compact index of the variables."""
+        # The index shipped with AbiPy must be in sync with the python modules.
+        # If this test fails, regenerate the index with `VarDatabase.from_pyfiles().write_index()`
+        index_db = VarDatabase.from_index()
+        assert index_db is not None
+        pyfiles_db = VarDatabase.from_pyfiles()
+        assert list(index_db.keys()) == list(pyfiles_db.keys())
+
+        for code, vd in pyfiles_db.items():
+            assert list(vd.keys()) == list(index_db[code].keys())
+
+        ecut_var = index_db["abinit"]["ecut"]
+        assert ecut_var._text is None
+        assert ecut_var.info == pyfiles_db["abinit"]["ecut"].info
+        assert ecut_var.text == pyfiles_db["abinit"]["ecut"].text
+        assert index_db["anaddb"]["asr"].text == pyfiles_db["anaddb"]["asr"].text
+        assert isinstance(index_db["abinit"]["acell"].defaultval, type(pyfiles_db["abinit"]["acell"].defaultval))
+
+        # Write index to temporary directory and read it back.
+        tmpdir = self.mkdtemp()
+        pyfiles_db.write_index(dirpath=tmpdir)
+        # Checksums cannot be validated as the python modules are not in tmpdir.
+        assert VarDatabase.from_index(dirpath=tmpdir, check=False)["optic"].keys() == pyfiles_db["optic"].keys()
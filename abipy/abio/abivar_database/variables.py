@@ -4,6 +4,7 @@ from __future__ import print_function, division, unicode_literals, absolute_impo
 import sys
 import os
 import json
+import hashlib
 
 from collections import OrderedDict, defaultdict
 from itertools import groupby
@@ -323,7 +324,7 @@ class Variable(object):
         self.commentdims = commentdims
         self.added_in_version = added_in_version
         self.alternative_name = alternative_name
-        self.text = my_unicode(text)
+        self.text = my_unicode(text) if text is not None else None
 
         errors = []
         for a in ("abivarname", "varset", "vartype", "topics", "dimensions", "text"):
@@ -332,6 +333,42 @@ class Variable(object):
         if errors:
             raise ValueError("Errors in %s:\n%s" % (self.abivarname, "\n".join(errors)))
 
+    # Object used to load the documentation on demand when the variable is built from the compact index.
+    _text_store = None
+    _text = None
+
+    @property
+    def text(self):
+        """Markdown string with the documentation."""
+        if self._text is None and self._text_store is not None:
+            self._text = self._text_store.get_text(self.executable, self.abivarname)
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+
+    # Attributes saved in the compact index. The documentation is stored in a separated file.
+    _INDEX_ATTRS = ("abivarname", "varset", "vartype", "topics", "dimensions", "defaultval", "mnemonics",
+                    "characteristics", "excludes", "requires", "commentdefault", "commentdims",
+                    "added_in_version", "alternative_name")
+
+    def as_index_record(self):
+        """Return JSON-serializable dictionary with all the attributes but `text`."""
+        return OrderedDict([(aname, _to_jsonable(getattr(self, aname))) for aname in self._INDEX_ATTRS])
+
+    @classmethod
+    def from_index_record(cls, record, text_store):
+        """
+        Build object from a record produced by `as_index_record` (already decoded by `_from_jsonable`).
+        The documentation is read from `text_store` on first access.
+        """
+        new = cls.__new__(cls)
+        for aname in cls._INDEX_ATTRS:
+            setattr(new, aname, record.get(aname))
+        new._text_store = text_store
+        return new
+
     @lazy_property
     def name(self):
         """Name of the variable without the executable name."""
@@ -742,6 +779,75 @@ def my_unicode(s):
     """Convert string to unicode (needed for py2.7 DOH!)"""
     return unicode(s) if sys.version_info[0] <= 2 else str(s)
 
+
+_SPECIAL_TYPES = None
+
+def _to_jsonable(obj):
+    """Convert the values used in the variables_CODE.py modules to JSON-serializable objects."""
+    if isinstance(obj, ValueWithConditions):
+        return {"@class": "ValueWithConditions", "data": {k: _to_jsonable(v) for k, v in obj.items()}}
+    if isinstance(obj, (ValueWithUnit, MultipleValue, Range)):
+        d = {k: _to_jsonable(v) for k, v in obj.__dict__.items()}
+        d["@class"] = obj.__class__.__name__
+        return d
+    if isinstance(obj, dict):
+        return {k: _to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_jsonable(v) for v in obj]
+    return obj
+
+
+def _from_jsonable(d):
+    """object_hook for json.load. Inverse of `_to_jsonable`."""
+    global _SPECIAL_TYPES
+    if "@class" not in d: return d
+    if _SPECIAL_TYPES is None:
+        _SPECIAL_TYPES = {cls.__name__: cls for cls in (ValueWithUnit, MultipleValue, Range)}
+    d = dict(d)
+    clsname = d.pop("@class")
+    if clsname == "ValueWithConditions":
+        return ValueWithConditions(d["data"])
+    return _SPECIAL_TYPES[clsname](**d)
+
+
+# Files with the compact index and the documentation of the variables.
+# Generated from the variables_CODE.py modules with `VarDatabase.from_pyfiles().write_index()`.
+INDEX_BASENAME = "variables_index.json"
+TEXT_BASENAME = "variables_text.json"
+
+
+def _get_pyfiles(dirpath):
+    """List with the variables_CODE.py modules in dirpath."""
+    return sorted(os.path.join(dirpath, f) for f in os.listdir(dirpath) if
+                  f.startswith("variables_") and f.endswith(".py"))
+
+
+def _get_checksums(pyfiles):
+    """Dictionary basename --> md5 checksum of the file."""
+    d = {}
+    for path in pyfiles:
+        with open(path, "rb") as fh:
+            d[os.path.basename(path)] = hashlib.md5(fh.read()).hexdigest()
+    return d
+
+
+class _TextStore(object):
+    """
+    Secondary store with the documentation of the variables.
+    The JSON file is loaded on the first call to get_text.
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._data = None
+
+    def get_text(self, executable, abivarname):
+        """Return the documentation of variable ``abivarname`` used by ``executable``."""
+        if self._data is None:
+            with open(self.filepath, "rt") as fh:
+                self._data = json.load(fh)
+        return self._data[executable][abivarname]
+
+
 ##############
 # Public API #
 ##############
@@ -752,9 +858,12 @@ def get_codevars():
     """
     Return the database of variables indexed by code name and cache it.
     Main entry point for client code.
+    Use the compact index if it's in sync with the python modules else fallback to `from_pyfiles`.
     """
     global _VARS
-    if _VARS is None: _VARS = VarDatabase.from_pyfiles()
+    if _VARS is None:
+        _VARS = VarDatabase.from_index()
+        if _VARS is None: _VARS = VarDatabase.from_pyfiles()
     return _VARS
 
 
@@ -775,15 +884,67 @@ class VarDatabase(OrderedDict):
         """
         if dirpath is None:
             dirpath = os.path.dirname(os.path.abspath(__file__))
-        pyfiles = [os.path.join(dirpath, f) for f in os.listdir(dirpath) if
-                   f.startswith("variables_") and f.endswith(".py")]
         new = cls()
-        for pyf in pyfiles:
+        for pyf in _get_pyfiles(dirpath):
             vd = InputVariables.from_pyfile(pyf)
             new[vd.executable] = vd
 
         return new
 
+    @classmethod
+    def from_index(cls, dirpath=None, check=True):
+        """
+        Initialize the object from the compact index written by `write_index`.
+        The documentation of the variables is loaded on demand from the secondary JSON file.
+        Return None if the index does not exist or, if ``check``, if the checksums
+        stored in the index do not agree with the python modules in dirpath.
+        """
+        if dirpath is None:
+            dirpath = os.path.dirname(os.path.abspath(__file__))
+        index_path = os.path.join(dirpath, INDEX_BASENAME)
+        if not os.path.exists(index_path): return None
+
+        with open(index_path, "rt") as fh:
+            index = json.load(fh, object_hook=_from_jsonable)
+
+        if check and index["checksums"] != _get_checksums(_get_pyfiles(dirpath)):
+            return None
+
+        text_store = _TextStore(os.path.join(dirpath, TEXT_BASENAME))
+        new = cls()
+        for executable, records in index["codes"].items():
+            vd = InputVariables()
+            vd.executable = executable
+            for rec in records:
+                v = Variable.from_index_record(rec, text_store)
+                vd[v.name] = v
+            new[executable] = vd
+
+        return new
+
+    def write_index(self, dirpath=None, pyfiles_dirpath=None):
+        """
+        Write the compact index (all the attributes but the documentation) and
+        the secondary file with the documentation in directory ``dirpath``.
+        ``pyfiles_dirpath`` is the directory with the python modules used to compute the checksums.
+        Both default to the directory of the present module.
+        """
+        thisdir = os.path.dirname(os.path.abspath(__file__))
+        if dirpath is None: dirpath = thisdir
+        if pyfiles_dirpath is None: pyfiles_dirpath = thisdir
+
+        index = OrderedDict([
+            ("checksums", _get_checksums(_get_pyfiles(pyfiles_dirpath))),
+            ("codes", OrderedDict([(code, [v.as_index_record() for v in vd.values()]) for code, vd in self.items()])),
+        ])
+        texts = OrderedDict([(code, OrderedDict([(v.abivarname, v.text) for v in vd.values()]))
+            for code, vd in self.items()])
+
+        with open(os.path.join(dirpath, INDEX_BASENAME), "wt") as fh:
+            json.dump(index, fh, separators=(",", ":"))
+        with open(os.path.join(dirpath, TEXT_BASENAME), "wt") as fh:
+            json.dump(texts, fh, separators=(",", ":"))
+
     def iter_allvars(self):
         """Iterate over all variables. Flat view."""
         for vd in self.values():
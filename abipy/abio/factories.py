@@ -839,9 +839,9 @@ def scf_phonons_inputs(structure, pseudos, kppa,
             #rfdir   1 0 0   # Along the first reduced coordinate axis
             #kptopt   2      # Automatic generation of k points, taking
 
-        irred_perts = ph_inp.abiget_irred_phperts()
-        # TODO irred_perts is not used ??
-
+        # TODO irred_perts is not used so we don't run Abinit here.
+        # Use gs_inp.abiget_irred_phperts_qpoints(qpoints) to compute all the q-points at once.
+        #irred_perts = ph_inp.abiget_irred_phperts()
         #for pert in irred_perts:
         #    #print(pert)
         #    # TODO this will work for phonons, but not for the other types of perturbations.
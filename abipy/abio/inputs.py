@@ -13,6 +13,7 @@ import time
 import six
 import abc
 import json
+import hashlib
 import numpy as np
 
 from collections import OrderedDict
@@ -32,7 +33,7 @@ except ImportError:
 from abipy.tools.numtools import is_diagonal
 from abipy.core.structure import Structure
 from abipy.core.mixins import Has_Structure
-from abipy.core.kpoints import has_timrev_from_kptopt
+from abipy.core.kpoints import has_timrev_from_kptopt, ibz_from_mesh
 from abipy.abio.variable import InputVariable
 from abipy.abio.abivars import is_abivar, is_anaddb_var
 from abipy.abio.abivars_db import get_abinit_variables
@@ -115,6 +116,57 @@ _IRDVARS = set([
 #        raise ValueError("Don't know how to reallocate variable %s" % str(name))
 
 
+# Cache used by AbinitInput.abiget_ibz when the IBZ is computed in-process.
+# Maps the checksum of the variables defining the k-mesh and the structure to the ibz namedtuple.
+_IBZ_CACHE = OrderedDict()
+_IBZ_CACHE_MAXSIZE = 512
+
+
+def clear_ibz_cache():
+    """Clear the cache used by :meth:`AbinitInput.abiget_ibz`."""
+    _IBZ_CACHE.clear()
+
+
+# Cache used by AbinitInput._abiget_irred_perts.
+# Maps the checksum of the input (structure, symmetries, q-point, perturbation variables)
+# to the list of irreducible perturbations reported by Abinit.
+_IRRED_PERTS_CACHE = OrderedDict()
+_IRRED_PERTS_CACHE_MAXSIZE = 1024
+
+
+def clear_irred_perts_cache():
+    """Clear the cache used by the ``abiget_irred_*perts`` methods of :class:`AbinitInput`."""
+    _IRRED_PERTS_CACHE.clear()
+
+
+def _spglib_types(structure, spinat):
+    """
+    Integer types passed to spglib. Atoms with same Z but different spinat are considered different
+    so that only the symmetries preserving the magnetic configuration are used.
+    """
+    if spinat is None or not np.any(spinat):
+        return list(structure.atomic_numbers)
+    spinat = np.reshape(spinat, (len(structure), 3))
+    keys = [(z, tuple(np.round(s, decimals=6))) for z, s in zip(structure.atomic_numbers, spinat)]
+    key2type = {}
+    for k in keys:
+        key2type.setdefault(k, len(key2type) + 1)
+    return [key2type[k] for k in keys]
+
+
+def _bravais_from_spgnum(spg_number, spg_symbol):
+    """String with the Bravais lattice in the format used by Abinit e.g. `Bravais cF (face-center cubic)`."""
+    centering = spg_symbol[0]
+    if 143 <= spg_number <= 167 and centering == "R":
+        return "Bravais hR (rhombohedral)"
+    for (start, stop), (letter, name) in [((1, 2), ("a", "triclinic")), ((3, 15), ("m", "monocl.")),
+                                          ((16, 74), ("o", "ortho.")), ((75, 142), ("t", "tetrag.")),
+                                          ((143, 194), ("h", "hexag.")), ((195, 230), ("c", "cubic"))]:
+        if start <= spg_number <= stop: break
+    cname = {"P": "primitive", "I": "body-center", "F": "face-center"}.get(centering, "%s-center" % centering)
+    return "Bravais %s%s (%s %s)" % (letter, centering, cname, name)
+
+
 class AbstractInput(six.with_metaclass(abc.ABCMeta, MutableMapping, object)):
     """
     Abstract class defining the methods that must be implemented by Input objects.
@@ -1551,10 +1603,12 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         return dict2namedtuple(retcode=retcode, output_file=task.output_file, log_file=task.log_file,
                                stderr_file=task.stderr_file, task=task)
 
-    def abiget_spacegroup(self, tolsym=None, retdict=False, workdir=None, manager=None, verbose=0):
+    def abiget_spacegroup(self, tolsym=None, retdict=False, workdir=None, manager=None, verbose=0,
+                          use_abinit=False):
         """
-        This function invokes Abinit to get the space group (as detected by Abinit, not by spglib)
-        It should be called with an input file that contains all the mandatory variables required by ABINIT.
+        This function computes the space group. By default, the symmetries are obtained in-process with spglib.
+        If ``use_abinit``, the function invokes Abinit to get the space group (as detected by Abinit, not by spglib)
+        In this case, it should be called with an input file that contains all the mandatory variables required by ABINIT.
 
         Args:
             tolsym: Abinit tolsym input variable. None correspondes to the default value.
@@ -1562,11 +1616,15 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
             workdir: Working directory of the fake task used to compute the ibz. Use None for temporary dir.
             manager: |TaskManager| of the task. If None, the manager is initialized from the config file.
 	    verbose: Verbosity level.
+            use_abinit: True to call Abinit instead of spglib (e.g. for validation purposes).
 
         Return:
             |Structure| object with AbinitSpaceGroup obtained from the main output file if retdict is False
 	    else dict with e.g. {'bravais': 'Bravais cF (face-center cubic)', 'spg_number': 227, 'spg_symbol': 'Fd-3m'}.
         """
+        if not use_abinit:
+            return self._spglib_get_spacegroup(tolsym=tolsym, retdict=retdict)
+
         # Avoid modifications in self.
         inp = self.deepcopy()
         if tolsym is not None: inp["tolsym"] = float(tolsym)
@@ -1593,10 +1651,43 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         except Exception as exc:
             self._handle_task_exception(task, exc)
 
-    def abiget_ibz(self, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None, verbose=0):
+    def _spglib_get_spacegroup(self, tolsym=None, retdict=False):
+        """
+        Implementation of abiget_spacegroup based on spglib.
+        tolsym is given in reduced coordinates as in Abinit and converted to a cartesian tolerance.
+        """
+        import spglib
+        from abipy.core.symmetries import AbinitSpaceGroup
+        structure = self.structure
+        symprec = 1e-5 if tolsym is None else float(tolsym) * max(structure.lattice.abc)
+        types = _spglib_types(structure, self.get("spinat"))
+        cell = (structure.lattice.matrix, structure.frac_coords, types)
+        dataset = spglib.get_symmetry_dataset(cell, symprec=symprec)
+        if dataset is None:
+            raise self.Error("spglib could not find the symmetries of the structure:\n%s" % str(structure))
+
+        if retdict:
+            spg_symbol = dataset["international"]
+            return dict(bravais=_bravais_from_spgnum(dataset["number"], spg_symbol),
+                        spg_number=dataset["number"], spg_symbol=spg_symbol)
+
+        nsym = len(dataset["rotations"])
+        abispg = AbinitSpaceGroup(spgid=dataset["number"], symrel=dataset["rotations"],
+                                  tnons=dataset["translations"], symafm=np.ones(nsym, dtype=np.int),
+                                  has_timerev=has_timrev_from_kptopt(self.get("kptopt", 1)), inord="C")
+        new = structure.copy()
+        new.set_abi_spacegroup(abispg)
+        return new
+
+    def abiget_ibz(self, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None, verbose=0,
+                   use_abinit=False):
         """
         This function computes the list of points in the IBZ and the corresponding weights.
-        It should be called with an input file that contains all the mandatory variables required by ABINIT.
+        By default, the IBZ is computed in-process with the symmetries found by spglib and the
+        same algorithm used by Abinit (same points and same ordering). Results are cached.
+        Abinit is called if ``use_abinit`` or if the input uses options that are not supported
+        by the in-process implementation (e.g. ``kptrlatt``, non-collinear magnetism).
+        In this case, it should be called with an input file that contains all the mandatory variables required by ABINIT.
 
         Args:
             ngkpt: Number of divisions for the k-mesh (default None i.e. use ngkpt from self)
@@ -1605,12 +1696,17 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
             workdir: Working directory of the fake task used to compute the ibz. Use None for temporary dir.
             manager: |TaskManager| of the task. If None, the manager is initialized from the config file.
             verbose: verbosity level.
+            use_abinit: True to call Abinit (e.g. for validation purposes).
 
         Returns:
             `namedtuple` with attributes:
                 points: |numpy-array| with points in the IBZ in reduced coordinates.
                 weights: |numpy-array| with weights of the points.
         """
+        if not use_abinit:
+            ibz = self._spglib_get_ibz(ngkpt=ngkpt, shiftk=shiftk, kptopt=kptopt, verbose=verbose)
+            if ibz is not None: return ibz
+
         # Avoid modifications in self.
         inp = self.deepcopy()
 
@@ -1644,6 +1740,49 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         except Exception as exc:
             self._handle_task_exception(task, exc)
 
+    def _spglib_get_ibz(self, ngkpt=None, shiftk=None, kptopt=None, verbose=0):
+        """
+        In-process implementation of abiget_ibz. Return None if the options
+        in the input are not supported and Abinit should be called.
+        """
+        ngkpt = self.get("ngkpt") if ngkpt is None else ngkpt
+        kptopt = int(self.get("kptopt", 1) if kptopt is None else kptopt)
+        if shiftk is None:
+            # Abinit default is shiftk 0.5 0.5 0.5
+            shiftk = self.get("shiftk", [0.5, 0.5, 0.5])
+            shiftk = np.reshape(shiftk, (-1, 3))[:int(self.get("nshiftk", len(np.reshape(shiftk, (-1, 3)))))]
+
+        if (ngkpt is None or "kptrlatt" in self or kptopt not in (1, 2, 3, 4) or
+            self.get("nspinor", 1) == 2 or self.get("nspden", 1) == 4):
+            if verbose: print("Input options are not supported by the in-process implementation. Calling Abinit.")
+            return None
+
+        ngkpt = np.array(ngkpt, dtype=np.int).reshape(3)
+        if np.any(ngkpt <= 0):
+            raise self.Error("Invalid ngkpt: %s" % str(ngkpt))
+        shiftk = np.reshape(shiftk, (-1, 3))
+
+        structure = self.structure
+        types = _spglib_types(structure, self.get("spinat"))
+
+        # Use the checksum of the variables defining the IBZ as key of the cache.
+        key = hashlib.md5(json.dumps([
+            np.round(structure.lattice.matrix, decimals=10).tolist(),
+            np.round(structure.frac_coords, decimals=10).tolist(), types,
+            ngkpt.tolist(), np.round(shiftk, decimals=10).tolist(), kptopt]).encode("utf-8")).hexdigest()
+
+        ibz = _IBZ_CACHE.get(key)
+        if ibz is None:
+            r = ibz_from_mesh(structure, ngkpt, shiftk, kptopt=kptopt, types=types)
+            ibz = collections.namedtuple("ibz", "points weights")(points=r.points, weights=r.weights)
+            if len(_IBZ_CACHE) >= _IBZ_CACHE_MAXSIZE: _IBZ_CACHE.popitem(last=False)
+            _IBZ_CACHE[key] = ibz
+        elif verbose:
+            print("Returning IBZ from cache")
+
+        # Return copies so that the caller cannot change the cached values.
+        return ibz.__class__(points=ibz.points.copy(), weights=ibz.weights.copy())
+
     def _handle_task_exception(self, task, prev_exc):
         """
         This method is called when we have executed a temporary task but we encounter
@@ -1688,27 +1827,10 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         finally:
             raise self.Error(emsg)
 
-    def _abiget_irred_perts(self, perts_vars, qpt=None, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None):
+    def _get_irred_perts_input(self, perts_vars, qpt=None, ngkpt=None, shiftk=None, kptopt=None):
         """
-        This function, computes the list of irreducible perturbations for DFPT.
-        It should be called with an input file that contains all the mandatory variables required by ABINIT.
-
-        Args:
-            perts_vars: list of variables to be added to get the appropriate perturbation
-            qpt: qpoint of the phonon in reduced coordinates. Used to shift the k-mesh
-                if qpt is not passed, self must already contain "qpt" otherwise an exception is raised.
-            ngkpt: Number of divisions for the k-mesh (default None i.e. use ngkpt from self)
-            shiftk: Shiftks (default None i.e. use shiftk from self)
-            kptopt: Option for k-point generation. If None, the value in self is used.
-            workdir: Working directory of the fake task used to compute the ibz. Use None for temporary dir.
-            manager: |TaskManager| of the task. If None, the manager is initialized from the config file.
-
-        Returns:
-            List of dictionaries with the Abinit variables defining the irreducible perturbation
-            Example:
-
-                [{'idir': 1, 'ipert': 1, 'qpt': [0.25, 0.0, 0.0]},
-                 {'idir': 2, 'ipert': 1, 'qpt': [0.25, 0.0, 0.0]}]
+        Return a new input with the variables required to get the list of irreducible perturbations
+        from Abinit (see _abiget_irred_perts for the meaning of the arguments).
         """
         # Avoid modifications in self.
         inp = self.deepcopy()
@@ -1735,11 +1857,76 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         if kptopt is not None: inp["kptopt"] = kptopt
         #print("Computing irred_perts with input:\n", str(inp))
 
-        # Build a Task to run Abinit in a shell subprocess
-        task = AbinitTask.temp_shell_task(inp, workdir=workdir, manager=manager)
-        task.start_and_wait(autoparal=False)
+        return inp
+
+    @staticmethod
+    def _irred_perts_key(inp):
+        """
+        Key used to cache the irreducible perturbations computed with input ``inp``.
+        The structure is not stored in the variables so we add it explicitly to the checksum.
+        """
+        structure = inp.structure
+        return hashlib.md5(json.dumps([
+            inp.variable_checksum(),
+            np.round(structure.lattice.matrix, decimals=10).tolist(),
+            np.round(structure.frac_coords, decimals=10).tolist(),
+            [site.specie.symbol for site in structure]]).encode("utf-8")).hexdigest()
 
-        # Parse the file to get the perturbations.
+    def _run_irred_perts_inputs(self, inputs, workdir=None, manager=None, nprocs=None):
+        """
+        Execute Abinit with the list of ``inputs`` produced by _get_irred_perts_input and parse
+        the irreducible perturbations. Results already in the cache are not recomputed.
+        The dry runs are executed with a pool of ``nprocs`` threads (serial execution if None or 1).
+
+        Returns:
+            List with the irreducible perturbations for each input.
+        """
+        keys = [self._irred_perts_key(inp) for inp in inputs]
+
+        # Find the inputs that are not in the cache. Use a dict to avoid executing identical runs.
+        results, todo = {}, OrderedDict()
+        for key, inp in zip(keys, inputs):
+            if key in _IRRED_PERTS_CACHE:
+                results[key] = _IRRED_PERTS_CACHE[key]
+            elif key not in todo:
+                todo[key] = inp
+
+        if todo:
+            if workdir is not None and len(todo) > 1:
+                workdirs = [os.path.join(workdir, "irred_perts_%d" % i) for i in range(len(todo))]
+            else:
+                workdirs = [workdir] * len(todo)
+
+            def run_task(args):
+                inp, wdir = args
+                # Build a Task to run Abinit in a shell subprocess
+                task = AbinitTask.temp_shell_task(inp, workdir=wdir, manager=manager)
+                task.start_and_wait(autoparal=False)
+                return task
+
+            args = list(zip(todo.values(), workdirs))
+            if nprocs is None or nprocs <= 1 or len(args) <= 1:
+                tasks = [run_task(a) for a in args]
+            else:
+                # Threads are enough since the real work is done in the Abinit subprocesses.
+                from multiprocessing.pool import ThreadPool
+                pool = ThreadPool(processes=min(nprocs, len(args)))
+                try:
+                    tasks = pool.map(run_task, args)
+                finally:
+                    pool.close()
+                    pool.join()
+
+            for key, task in zip(todo, tasks):
+                results[key] = self._parse_irred_perts(task)
+                if len(_IRRED_PERTS_CACHE) >= _IRRED_PERTS_CACHE_MAXSIZE: _IRRED_PERTS_CACHE.popitem(last=False)
+                _IRRED_PERTS_CACHE[key] = results[key]
+
+        # Return copies so that the caller cannot change the cached values.
+        return [copy.deepcopy(results[key]) for key in keys]
+
+    def _parse_irred_perts(self, task):
+        """Parse the log file of ``task`` and return the list of irreducible perturbations."""
         try:
             return yaml_read_irred_perts(task.log_file.path)
         except Exception as exc:
@@ -1751,6 +1938,32 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
             except Exception as exc:
                 self._handle_task_exception(task, exc)
 
+    def _abiget_irred_perts(self, perts_vars, qpt=None, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None):
+        """
+        This function, computes the list of irreducible perturbations for DFPT.
+        It should be called with an input file that contains all the mandatory variables required by ABINIT.
+        Results are cached so that Abinit is executed only once for the same input and q-point.
+
+        Args:
+            perts_vars: list of variables to be added to get the appropriate perturbation
+            qpt: qpoint of the phonon in reduced coordinates. Used to shift the k-mesh
+                if qpt is not passed, self must already contain "qpt" otherwise an exception is raised.
+            ngkpt: Number of divisions for the k-mesh (default None i.e. use ngkpt from self)
+            shiftk: Shiftks (default None i.e. use shiftk from self)
+            kptopt: Option for k-point generation. If None, the value in self is used.
+            workdir: Working directory of the fake task used to compute the ibz. Use None for temporary dir.
+            manager: |TaskManager| of the task. If None, the manager is initialized from the config file.
+
+        Returns:
+            List of dictionaries with the Abinit variables defining the irreducible perturbation
+            Example:
+
+                [{'idir': 1, 'ipert': 1, 'qpt': [0.25, 0.0, 0.0]},
+                 {'idir': 2, 'ipert': 1, 'qpt': [0.25, 0.0, 0.0]}]
+        """
+        inp = self._get_irred_perts_input(perts_vars, qpt=qpt, ngkpt=ngkpt, shiftk=shiftk, kptopt=kptopt)
+        return self._run_irred_perts_inputs([inp], workdir=workdir, manager=manager)[0]
+
     def abiget_irred_phperts(self, qpt=None, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None):
         """
         This function, computes the list of irreducible perturbations for DFPT.
@@ -1781,6 +1994,37 @@ with the Abinit version you are using. Please contact the AbiPy developers.""" %
         return self._abiget_irred_perts(phperts_vars, qpt=qpt, ngkpt=ngkpt, shiftk=shiftk, kptopt=kptopt,
                                         workdir=workdir, manager=manager)
 
+    def abiget_irred_phperts_qpoints(self, qpoints, ngkpt=None, shiftk=None, kptopt=None, workdir=None,
+                                     manager=None, nprocs=None):
+        """
+        Compute the list of irreducible phonon perturbations for a list of q-points.
+        The Abinit dry runs are executed concurrently with a pool of ``nprocs`` threads
+        and q-points already in the cache are not recomputed.
+
+        Args:
+            qpoints: List of q-points in reduced coordinates.
+            ngkpt: Number of divisions for the k-mesh (default None i.e. use ngkpt from self)
+            shiftk: Shiftks (default None i.e. use shiftk from self)
+            kptopt: Option for k-point generation. If None, the value in self is used.
+            workdir: Working directory. Each dry run is executed in a subdirectory of workdir.
+                Use None for temporary dirs.
+            manager: |TaskManager| of the task. If None, the manager is initialized from the config file.
+            nprocs: Maximum number of Abinit processes executed at the same time. None for serial execution.
+
+        Returns:
+            List with the irreducible perturbations for each q-point
+            (same format as :meth:`abiget_irred_phperts`).
+        """
+        phperts_vars = dict(rfphon=1,                         # Will consider phonon-type perturbation
+                            rfatpol=[1, len(self.structure)], # Set of atoms to displace.
+                            rfdir=[1, 1, 1],                  # Along this set of reduced coordinate axis.
+                            )
+
+        inputs = [self._get_irred_perts_input(phperts_vars, qpt=qpt, ngkpt=ngkpt, shiftk=shiftk, kptopt=kptopt)
+                  for qpt in np.reshape(qpoints, (-1, 3))]
+
+        return self._run_irred_perts_inputs(inputs, workdir=workdir, manager=manager, nprocs=nprocs)
+
     def abiget_irred_ddeperts(self, ngkpt=None, shiftk=None, kptopt=None, workdir=None, manager=None):
         """
         This function, computes the list of irreducible perturbations for DFPT.
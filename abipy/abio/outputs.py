@@ -4,10 +4,16 @@ Objects used to extract and plot results from output files in text format.
 from __future__ import print_function, division, unicode_literals, absolute_import
 
 import os
+import mmap
+import bisect
 import numpy as np
 import pandas as pd
 
 from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 from six.moves import cStringIO
 from monty.string import is_string, marquee
 from monty.functools import lazy_property
@@ -19,7 +25,7 @@ from abipy.core.kpoints import has_timrev_from_kptopt
 from abipy.core.mixins import TextFile, AbinitNcFile, NotebookWriter
 from abipy.abio.inputs import GEOVARS
 from abipy.abio.timer import AbinitTimerParser
-from abipy.abio.robots import Robot
+from abipy.abio.robots import Robot, RobotIndex, _to_jsonable, _get_index_record
 from abipy.flowtk import EventsParser, NetcdfReader, GroundStateScfCycle, D2DEScfCycle
 
 
@@ -97,84 +103,141 @@ class AbinitOutputFile(AbinitTextFile, NotebookWriter):
         self.debug_level = 0
         self._parse()
 
+    @lazy_property
+    def _buf(self):
+        """Read-only memory-mapped buffer with the content of the file."""
+        with open(self.filepath, "rb") as fh:
+            try:
+                return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                return b""
+
+    def _get_text(self, start, stop):
+        """Decode the bytes in the range [start, stop) of the file."""
+        return self._buf[start:stop].decode("utf-8", "replace")
+
+    def _iter_lines(self, start=0, stop=None):
+        """Generator yielding the lines of the file in the range [start, stop)."""
+        buf = self._buf
+        stop = len(buf) if stop is None else stop
+        while start < stop:
+            end = buf.find(b"\n", start, stop)
+            end = stop if end == -1 else end + 1
+            yield buf[start:end].decode("utf-8", "replace")
+            start = end
+
+    def _line_start(self, pos):
+        """Offset of the beginning of the line containing position ``pos``."""
+        return self._buf.rfind(b"\n", 0, pos) + 1
+
+    def _line_end(self, pos):
+        """Offset of the beginning of the line following position ``pos``."""
+        end = self._buf.find(b"\n", pos)
+        return len(self._buf) if end == -1 else end + 1
+
+    def _find_line(self, prefix, last=False):
+        """
+        Offset of the first (last if ``last``) line starting with bytes ``prefix``. -1 if not found.
+        """
+        buf = self._buf
+        if last:
+            pos = buf.rfind(b"\n" + prefix)
+            if pos != -1: return pos + 1
+            return 0 if buf[:len(prefix)] == prefix else -1
+        else:
+            if buf[:len(prefix)] == prefix: return 0
+            pos = buf.find(b"\n" + prefix)
+            return pos + 1 if pos != -1 else -1
+
+    def _find_all(self, pattern, start=0, stop=None):
+        """List with the offsets of the lines containing ``pattern`` in the range [start, stop)."""
+        buf, offsets = self._buf, []
+        stop = len(buf) if stop is None else stop
+        pos = buf.find(pattern, start, stop)
+        while pos != -1:
+            line_start = self._line_start(pos)
+            if not offsets or offsets[-1] != line_start: offsets.append(line_start)
+            pos = buf.find(pattern, pos + len(pattern), stop)
+        return offsets
+
     def _parse(self):
         """
+        Build an index with the offsets of the sections of the file.
+        The file is memory-mapped and the text of the sections is decoded on demand:
+
         header: String with the input variables
         footer: String with the output variables
-        datasets: Dictionary mapping dataset index to list of strings.
+        datasets: Mapping dataset index --> string.
         """
+        buf = self._buf
+
         # Get code version and find magic line signaling that the output file is completed.
         self.version, self.run_completed = None, False
         self.overall_cputime, self.overall_walltime = 0.0, 0.0
         self.proc0_cputime, self.proc0_walltime = 0.0, 0.0
 
-        with open(self.filepath) as fh:
-            for line in fh:
-                if self.version is None and line.startswith(".Version"):
-                    self.version = line.split()[1]
-
-                if line.startswith("- Proc."):
-                    #- Proc.   0 individual time (sec): cpu=         25.5  wall=         26.1
-                    tokens = line.split()
-                    self.proc0_walltime = float(tokens[-1])
-                    self.proc0_cputime = float(tokens[-3])
-
-                if line.startswith("+Overall time"):
-                    #+Overall time at end (sec) : cpu=         25.5  wall=         26.1
-                    tokens = line.split()
-                    self.overall_cputime = float(tokens[-3])
-                    self.overall_walltime = float(tokens[-1])
-
-                if " Calculation completed." in line:
-                    self.run_completed = True
-
-        # Parse header to get important dimensions and variables
-        self.header, self.footer, self.datasets = [], [], OrderedDict()
-        where = "in_header"
-
-        with open(self.filepath, "rt") as fh:
-            for line in fh:
-                if "== DATASET" in line:
-                    # Save dataset number
-                    # == DATASET  1 ==================================================================
-                    where = int(line.replace("=", "").split()[-1])
-                    assert where not in self.datasets
-                    self.datasets[where] = []
-                elif "== END DATASET(S) " in line:
-                    where = "in_footer"
-
-                if where == "in_header":
-                    self.header.append(line)
-                elif where == "in_footer":
-                    self.footer.append(line)
-                else:
-                    # dataset number --> lines
-                    self.datasets[where].append(line)
-
-        self.header = "".join(self.header)
+        pos = self._find_line(b".Version")
+        if pos != -1:
+            self.version = self._get_text(pos, self._line_end(pos)).split()[1]
+
+        pos = self._find_line(b"- Proc.", last=True)
+        if pos != -1:
+            #- Proc.   0 individual time (sec): cpu=         25.5  wall=         26.1
+            tokens = self._get_text(pos, self._line_end(pos)).split()
+            self.proc0_walltime = float(tokens[-1])
+            self.proc0_cputime = float(tokens[-3])
+
+        pos = self._find_line(b"+Overall time", last=True)
+        if pos != -1:
+            #+Overall time at end (sec) : cpu=         25.5  wall=         26.1
+            tokens = self._get_text(pos, self._line_end(pos)).split()
+            self.overall_cputime = float(tokens[-3])
+            self.overall_walltime = float(tokens[-1])
+
+        self.run_completed = buf.find(b" Calculation completed.") != -1
+
+        # Find the boundaries of header, datasets and footer.
+        footer_start = buf.find(b"== END DATASET(S) ")
+        footer_start = len(buf) if footer_start == -1 else self._line_start(footer_start)
+
+        self._dataset_bounds = OrderedDict()
+        dt_starts = self._find_all(b"== DATASET", stop=footer_start)
+        for i, dt_start in enumerate(dt_starts):
+            # Save dataset number
+            # == DATASET  1 ==================================================================
+            line = self._get_text(dt_start, self._line_end(dt_start))
+            dtindex = int(line.replace("=", "").split()[-1])
+            assert dtindex not in self._dataset_bounds
+            dt_stop = dt_starts[i + 1] if i + 1 < len(dt_starts) else footer_start
+            self._dataset_bounds[dtindex] = (dt_start, dt_stop)
+
+        self._header_bounds = (0, dt_starts[0] if dt_starts else footer_start)
+        self._footer_bounds = (footer_start, len(buf))
         if self.debug_level: print("header:\n", self.header)
+
         # Output files produced in dryrun_mode contain the following line:
         # abinit : before driver, prtvol=0, debugging mode => will skip driver
-        self.dryrun_mode = "debugging mode => will skip driver" in self.header
+        self.dryrun_mode = buf.find(b"debugging mode => will skip driver", *self._header_bounds) != -1
         #print("dryrun_mode:", self.dryrun_mode)
 
         #if " jdtset " in self.header: raise NotImplementedError("jdtset is not supported")
         #if " udtset " in self.header: raise NotImplementedError("udtset is not supported")
 
-        self.ndtset = len(self.datasets)
-        if not self.datasets:
+        self.ndtset = len(self._dataset_bounds)
+        if not self._dataset_bounds:
             #raise NotImplementedError("Empty dataset sections.")
             self.ndtset = 1
-            self.datasets[1] = "Empty dataset"
+            self._dataset_bounds[1] = "Empty dataset"
 
-        for key, data in self.datasets.items():
-            if self.debug_level: print("data")
-            self.datasets[key] = "".join(data)
-            if self.debug_level: print(self.datasets[key])
-
-        self.footer = "".join(self.footer)
+        self.datasets = _TextSections(self, self._dataset_bounds)
         if self.debug_level: print("footer:\n", self.footer)
 
+        # Offsets of the SCF cycles. Used by next_gs_scf_cycle and next_d2de_scf_cycle.
+        self._cycle_pos = 0
+        self._gs_cycle_offsets = self._find_cycles(GroundStateScfCycle.MAGIC)
+        self._d2de_cycle_offsets = self._find_cycles(D2DEScfCycle.MAGIC)
+
         self.initial_vars_global, self.initial_vars_dataset = self._parse_variables("header")
         self.final_vars_global, self.final_vars_dataset = None, None
         if self.run_completed:
@@ -184,35 +247,66 @@ class AbinitOutputFile(AbinitTextFile, NotebookWriter):
             else:
                 self.final_vars_global, self.final_vars_dataset = self._parse_variables("footer")
 
+    @property
+    def header(self):
+        """String with the header of the file (input variables)."""
+        return self._get_text(*self._header_bounds)
+
+    @property
+    def footer(self):
+        """String with the footer of the file (output variables)."""
+        return self._get_text(*self._footer_bounds)
+
+    def _find_cycles(self, magic):
+        """Offsets of the lines starting with ``magic`` (leading whitespaces are ignored)."""
+        return [pos for pos in self._find_all(magic.encode("utf-8"))
+                if self._get_text(pos, self._line_end(pos)).strip().startswith(magic)]
+
+    def close(self):
+        """Close the file."""
+        super(AbinitOutputFile, self).close()
+        buf = self.__dict__.pop("_buf", None)
+        if hasattr(buf, "close"): buf.close()
+
+    def seek(self, offset, whence=0):
+        """
+        Set the file's current position, like stdio's fseek().
+        Note that next_gs_scf_cycle and next_d2de_scf_cycle start to search from this position.
+        """
+        super(AbinitOutputFile, self).seek(offset, whence)
+        if whence == 0:
+            self._cycle_pos = offset
+        elif whence == 1:
+            self._cycle_pos += offset
+        else:
+            self._cycle_pos = len(self._buf) + offset
+
     def _parse_variables(self, what):
         vars_global = OrderedDict()
         vars_dataset = OrderedDict([(k, OrderedDict()) for k in self.datasets.keys()])
         #print("keys", vars_dataset.keys())
 
-        lines = getattr(self, what).splitlines()
         if what == "header":
             magic_start = " -outvars: echo values of preprocessed input variables --------"
+            start, stop = self._header_bounds
         elif what == "footer":
             magic_start = " -outvars: echo values of variables after computation  --------"
+            start, stop = self._footer_bounds
         else:
             raise ValueError("Invalid value for what: `%s`" % str(what))
 
         magic_stop = "================================================================================"
 
         # Select relevant portion with variables.
-        for i, line in enumerate(lines):
-            if magic_start in line:
-                break
-        else:
+        pos = self._buf.find(magic_start.encode("utf-8"), start, stop)
+        if pos == -1:
             raise ValueError("Cannot find magic_start line: %s" % magic_start)
-        lines = lines[i+1:]
+        start = self._line_end(pos)
 
-        for i, line in enumerate(lines):
-            if magic_stop in line:
-                break
-        else:
+        pos = self._buf.find(magic_stop.encode("utf-8"), start, stop)
+        if pos == -1:
             raise ValueError("Cannot find magic_stop line: %s" % magic_stop)
-        lines = lines[:i]
+        lines = self._get_text(start, self._line_start(pos)).splitlines()
 
         # Parse data. Assume format:
         #   timopt          -1
@@ -575,67 +669,81 @@ class AbinitOutputFile(AbinitTextFile, NotebookWriter):
         from abipy.tools.numtools import grouper
         dims_dataset, spginfo_dataset = OrderedDict(), OrderedDict()
         inblock = 0
-        with open(self.filepath, "rt") as fh:
-            for line in fh:
-                line = line.strip()
-                if verbose > 1: print("inblock:", inblock, " at line:", line)
+        # Don't need to decode the lines after magic_exit.
+        stop = self._buf.find(magic_exit.encode("utf-8"))
+        for line in self._iter_lines(stop=None if stop == -1 else self._line_end(stop)):
+            line = line.strip()
+            if verbose > 1: print("inblock:", inblock, " at line:", line)
 
-                if line.startswith(magic_exit):
-                    break
-                if (not line or line.startswith("===") or line.startswith("---")
-                    or line.startswith("Rough estimation") or line.startswith("PAW method is used")):
-                    continue
-
-                if line.startswith("DATASET") or line.startswith("Symmetries :"):
-                    # Get dataset index, parse space group and lattice info, init new dims dict.
-                    inblock = 1
-                    if line.startswith("Symmetries :"):
-                        # No multidataset
-                        dtindex = 1
-                    else:
-                        tokens = line.split()
-                        dtindex = int(tokens[1])
-
-                    dims_dataset[dtindex] = dims = OrderedDict()
-                    spginfo_dataset[dtindex] = parse_spgline(line)
-                    continue
-
-                if inblock == 1 and line.startswith(magic):
-                    inblock = 2
-                    continue
-
-                if inblock == 2:
-                    # Lines with data.
-                    if line.startswith(memory_pre):
-                        dims["mem_per_proc_mb"] = float(line.replace(memory_pre, "").split()[0])
-                    elif line.startswith(filesizes_pre):
-                        tokens = line.split()
-                        mbpos = [i - 1 for i, t in enumerate(tokens) if t.startswith("Mbytes")]
-                        assert len(mbpos) == 2
-                        dims["wfk_size_mb"] = float(tokens[mbpos[0]])
-                        dims["denpot_size_mb"] = float(tokens[mbpos[1]])
-                    elif line.startswith("Pmy_natom="):
-                        dims.update(my_natom=int(line.replace("Pmy_natom=", "").strip()))
-                        #print("my_natom", dims["my_natom"])
-                    else:
-                        if line and line[0] == "-": line = line[1:]
-                        tokens = grouper(2, line.replace("=", "").split())
-                        if verbose > 1: print("tokens:", tokens)
-                        dims.update([(t[0], int(t[1])) for t in tokens])
+            if line.startswith(magic_exit):
+                break
+            if (not line or line.startswith("===") or line.startswith("---")
+                or line.startswith("Rough estimation") or line.startswith("PAW method is used")):
+                continue
 
-            return dims_dataset, spginfo_dataset
+            if line.startswith("DATASET") or line.startswith("Symmetries :"):
+                # Get dataset index, parse space group and lattice info, init new dims dict.
+                inblock = 1
+                if line.startswith("Symmetries :"):
+                    # No multidataset
+                    dtindex = 1
+                else:
+                    tokens = line.split()
+                    dtindex = int(tokens[1])
+
+                dims_dataset[dtindex] = dims = OrderedDict()
+                spginfo_dataset[dtindex] = parse_spgline(line)
+                continue
+
+            if inblock == 1 and line.startswith(magic):
+                inblock = 2
+                continue
+
+            if inblock == 2:
+                # Lines with data.
+                if line.startswith(memory_pre):
+                    dims["mem_per_proc_mb"] = float(line.replace(memory_pre, "").split()[0])
+                elif line.startswith(filesizes_pre):
+                    tokens = line.split()
+                    mbpos = [i - 1 for i, t in enumerate(tokens) if t.startswith("Mbytes")]
+                    assert len(mbpos) == 2
+                    dims["wfk_size_mb"] = float(tokens[mbpos[0]])
+                    dims["denpot_size_mb"] = float(tokens[mbpos[1]])
+                elif line.startswith("Pmy_natom="):
+                    dims.update(my_natom=int(line.replace("Pmy_natom=", "").strip()))
+                    #print("my_natom", dims["my_natom"])
+                else:
+                    if line and line[0] == "-": line = line[1:]
+                    tokens = grouper(2, line.replace("=", "").split())
+                    if verbose > 1: print("tokens:", tokens)
+                    dims.update([(t[0], int(t[1])) for t in tokens])
+
+        return dims_dataset, spginfo_dataset
 
     def next_gs_scf_cycle(self):
         """
         Return the next :class:`GroundStateScfCycle` in the file. None if not found.
         """
-        return GroundStateScfCycle.from_stream(self)
+        return self._next_cycle(GroundStateScfCycle, self._gs_cycle_offsets)
 
     def next_d2de_scf_cycle(self):
         """
         Return :class:`GroundStateScfCycle` with information on the GS iterations. None if not found.
         """
-        return D2DEScfCycle.from_stream(self)
+        return self._next_cycle(D2DEScfCycle, self._d2de_cycle_offsets)
+
+    def _next_cycle(self, cls, offsets):
+        """
+        Parse the first SCF cycle of type ``cls`` located after the current position.
+        ``offsets`` is the list with the offsets of the cycles found by _parse.
+        """
+        i = bisect.bisect_left(offsets, self._cycle_pos)
+        if i == len(offsets):
+            # Like a stream, we are at the end of the file.
+            self._cycle_pos = len(self._buf)
+            return None
+        self._cycle_pos = offsets[i] + 1
+        return cls.from_stream(self._iter_lines(start=offsets[i]))
 
     def plot(self, tight_layout=True, with_timer=False, show=True):
         """
@@ -774,6 +882,27 @@ class AbinitOutputFile(AbinitTextFile, NotebookWriter):
         return self._write_nb_nbpath(nb, nbpath)
 
 
+class _TextSections(Mapping):
+    """
+    Ordered mapping dataset index --> string with the text of the dataset.
+    The text is decoded from the memory-mapped file on demand and it's not cached.
+    """
+
+    def __init__(self, abo, bounds):
+        self._abo, self._bounds = abo, bounds
+
+    def __getitem__(self, key):
+        bounds = self._bounds[key]
+        if is_string(bounds): return bounds
+        return self._abo._get_text(*bounds)
+
+    def __iter__(self):
+        return iter(self._bounds)
+
+    def __len__(self):
+        return len(self._bounds)
+
+
 def validate_output_parser(abitests_dir=None, output_files=None):  # pragma: no cover
     """
     Validate/test Abinit output parser.
@@ -861,35 +990,108 @@ class AboRobot(Robot):
     """
     EXT = "abo"
 
-    def get_dims_dataframe(self, with_time=True, index=None):
+    # Attributes of AbinitOutputFile with timing info.
+    _TIME_KEYS = ("overall_cputime", "proc0_cputime", "overall_walltime", "proc0_walltime")
+
+    @classmethod
+    def get_index_record(cls, abifile, with_geo=True):
+        """
+        Extract the metadata stored in the index from the |AbinitOutputFile| ``abifile``.
+        The record contains the dimensions and the space group info of each dataset,
+        the timing info and, if ``with_geo``, the info on the final structure.
+        """
+        record = super(AboRobot, cls).get_index_record(abifile, with_geo=with_geo)
+
+        try:
+            dims_dataset, spg_dataset = abifile.get_dims_spginfo_dataset()
+            record["dims"] = [[dtindex, dims, spg_dataset[dtindex]] for dtindex, dims in dims_dataset.items()]
+        except Exception as exc:
+            record["dims"] = None
+            record["dims_exc"] = str(exc)
+
+        record["times"] = OrderedDict([(k, getattr(abifile, k)) for k in cls._TIME_KEYS])
+        record["run_completed"] = abifile.run_completed
+        if with_geo and abifile.run_completed and abifile.final_structure is not None:
+            record["geo"] = _to_jsonable(abifile.final_structure.get_dict4pandas(with_spglib=True))
+
+        return record
+
+    def get_records(self, with_geo=True, nprocs=None, index_path=None):
+        """
+        Return list with the records (see :meth:`get_index_record`) of the output files in the robot.
+
+        Args:
+            with_geo: True if structure info should be extracted.
+            nprocs: Number of processes used to parse the files. None or 1 for serial execution.
+            index_path: Path of the on-disk index with the records extracted in previous calls.
+                If not None, only new files or files whose size/mtime changed are parsed
+                and the index is updated.
+        """
+        index = None
+        if index_path is not None:
+            if os.path.exists(index_path) and os.path.getsize(index_path) > 0:
+                index = RobotIndex.from_file(index_path)
+            else:
+                index = RobotIndex([], filepath=index_path)
+
+        def get_cached_record(abo):
+            # Record extracted by the pool of processes when the robot was built (see Robot._open_filepaths).
+            r = self._get_memo(abo).get("index_record")
+            if r is not None and "times" in r and (r["with_geo"] or not with_geo): return r
+            if index is None or not index.is_uptodate(abo.filepath, with_geo=with_geo): return None
+            r = index.records[os.path.abspath(abo.filepath)]
+            return r if "times" in r else None
+
+        abifiles = self.abifiles
+        records = [get_cached_record(abo) for abo in abifiles]
+        todo = [i for i, r in enumerate(records) if r is None]
+
+        if nprocs is not None and nprocs > 1 and len(todo) > 1:
+            # Reopen the files in the pool of processes.
+            args = [(self.__class__, abifiles[i].filepath, with_geo) for i in todo]
+            for i, r in zip(todo, self._map(_get_index_record, args, nprocs=nprocs)):
+                records[i] = r
+
+        # Serial execution or exception in the pool: use the files already opened.
+        for i in todo:
+            if records[i] is None:
+                records[i] = self.get_index_record(abifiles[i], with_geo=with_geo)
+
+        if index is not None and todo:
+            index.update([records[i] for i in todo])
+            index.write(index_path)
+
+        return records
+
+    def get_dims_dataframe(self, with_time=True, index=None, nprocs=None, index_path=None):
         """
         Build and return |pandas-DataFrame| with the dimensions of the calculation.
 
         Args:
             with_time: True if walltime and cputime should be added
             index: Index of the dataframe. Use relative paths of files if None.
+            nprocs: Number of processes used to parse the files. None or 1 for serial execution.
+            index_path: Path of the on-disk index used to cache the records. See :meth:`get_records`.
         """
         rows, my_index = [], []
-        for i, abo in enumerate(self.abifiles):
-            try:
-                dims_dataset, spg_dataset = abo.get_dims_spginfo_dataset()
-            except Exception as exc:
-                cprint("Exception while trying to get dimensions from %s\n%s" % (abo.relpath, str(exc)), "yellow")
+        records = self.get_records(with_geo=False, nprocs=nprocs, index_path=index_path)
+        for i, (abo, record) in enumerate(zip(self.abifiles, records)):
+            if record["dims"] is None:
+                cprint("Exception while trying to get dimensions from %s\n%s" % (
+                    abo.relpath, record["dims_exc"]), "yellow")
                 continue
 
-            for dtindex, dims in dims_dataset.items():
-                dims = dims.copy()
+            for dtindex, dims, _ in record["dims"]:
+                dims = OrderedDict(dims)
                 dims.update({"dtset": dtindex})
                 # Add walltime and cputime in seconds
-                if with_time:
-                    dims.update(OrderedDict([(k, getattr(abo, k)) for k in
-                        ("overall_cputime", "proc0_cputime", "overall_walltime", "proc0_walltime")]))
+                if with_time: dims.update(record["times"])
                 rows.append(dims)
                 my_index.append(abo.relpath if index is None else index[i])
 
         return pd.DataFrame(rows, index=my_index, columns=list(rows[0].keys()))
 
-    def get_dataframe(self, with_geo=True, with_dims=True, abspath=False, funcs=None):
+    def get_dataframe(self, with_geo=True, with_dims=True, abspath=False, funcs=None, nprocs=None, index_path=None):
         """
         Return a |pandas-DataFrame| with the most important results and the filenames as index.
 
@@ -900,21 +1102,26 @@ class AboRobot(Robot):
             funcs: Function or list of functions to execute to add more data to the DataFrame.
                 Each function receives a |GsrFile| object and returns a tuple (key, value)
                 where key is a string with the name of column and value is the value to be inserted.
+            nprocs: Number of processes used to parse the files. None or 1 for serial execution.
+            index_path: Path of the on-disk index used to cache the records. See :meth:`get_records`.
         """
+        records = self.get_records(with_geo=with_geo, nprocs=nprocs, index_path=index_path)
         rows, row_names = [], []
-        for label, abo in self.items():
+        for (label, abo), record in zip(self.items(), records):
             row_names.append(label)
             d = OrderedDict()
 
             if with_dims:
-                dims_dataset, spg_dataset = abo.get_dims_spginfo_dataset()
+                if record["dims"] is None:
+                    raise RuntimeError("Cannot get dimensions from %s\n%s" % (abo.relpath, record["dims_exc"]))
+                dims_dataset = OrderedDict([(dtindex, dims) for dtindex, dims, _ in record["dims"]])
                 if len(dims_dataset) > 1:
                     cprint("Multiple datasets are not supported. ARGH!", "yellow")
                 d.update(dims_dataset[1])
 
             # Add info on structure.
-            if with_geo and abo.run_completed:
-                d.update(abo.final_structure.get_dict4pandas(with_spglib=True))
+            if with_geo and record["run_completed"]:
+                d.update(record.get("geo", {}))
 
             # Execute functions
             if funcs is not None: d.update(self._exec_funcs(funcs, abo))
@@ -931,8 +1138,7 @@ class AboRobot(Robot):
 
         for label, abo in self.items():
             row_names.append(label)
-            d = OrderedDict([(k, getattr(abo, k)) for k in
-                ("overall_cputime", "proc0_cputime", "overall_walltime", "proc0_walltime")])
+            d = OrderedDict([(k, getattr(abo, k)) for k in self._TIME_KEYS])
             rows.append(d)
 
         return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
@@ -40,6 +40,9 @@ class Robot(NotebookWriter):
     # filepaths are relative to `start`. None for asbolute paths. This flag is set in trim_paths
     start = None
 
+    # List of attributes (dot notation is supported) stored in the metadata index. See build_index.
+    INDEX_ATTRS = []
+
     # Used in iter_lineopt to generate matplotlib linestyles.
     _LINE_COLORS = ["b", "r", "g", "m", "y", "k", "c"]
     _LINE_STYLES = ["-", ":", "--", "-.",]
@@ -52,6 +55,8 @@ class Robot(NotebookWriter):
         """
         self._abifiles, self._do_close = OrderedDict(), OrderedDict()
         self._exceptions = deque(maxlen=100)
+        # Per-file memo (id(abifile) --> dict) with results shared by different dataframe columns.
+        self._memo = {}
 
         for label, abifile in args:
             self.add_file(label, abifile)
@@ -80,7 +85,7 @@ class Robot(NotebookWriter):
                          str(cls.get_supported_extensions()))
 
     @classmethod
-    def from_dir(cls, top, walk=True, abspath=False):
+    def from_dir(cls, top, walk=True, abspath=False, nprocs=None):
         """
         This class method builds a robot by scanning all files located within directory `top`.
         This method should be invoked with a concrete robot class, for example:
@@ -91,29 +96,33 @@ class Robot(NotebookWriter):
             top (str): Root directory
 	    walk: if True, directories inside `top` are included as well.
             abspath: True if paths in index should be absolute. Default: Relative to `top`.
+            nprocs: Number of processes used to extract the metadata of the files. None or 1 for serial execution.
+                See :meth:`_open_filepaths`.
         """
-        new = cls(*cls._open_files_in_dir(top, walk))
+        new = cls._from_opened_items(cls._open_files_in_dir(top, walk, nprocs=nprocs))
         if not abspath: new.trim_paths(start=top)
         return new
 
     @classmethod
-    def from_dirs(cls, dirpaths, walk=True, abspath=False):
+    def from_dirs(cls, dirpaths, walk=True, abspath=False, nprocs=None):
         """
         Similar to `from_dir` but accepts a list of directories instead of a single directory.
 
         Args:
 	    walk: if True, directories inside `top` are included as well.
             abspath: True if paths in index should be absolute. Default: Relative to `top`.
+            nprocs: Number of processes used to extract the metadata of the files. None or 1 for serial execution.
+                See :meth:`_open_filepaths`.
         """
         items = []
         for top in list_strings(dirpaths):
-            items.extend(cls._open_files_in_dir(top, walk))
-        new = cls(*items)
+            items.extend(cls._open_files_in_dir(top, walk, nprocs=nprocs))
+        new = cls._from_opened_items(items)
         if not abspath: new.trim_paths(start=os.getcwd())
         return new
 
     @classmethod
-    def from_dir_glob(cls, pattern, walk=True, abspath=False):
+    def from_dir_glob(cls, pattern, walk=True, abspath=False, nprocs=None):
         """
         This class method builds a robot by scanning all files located within the directories
         matching `pattern` as implemented by glob.glob
@@ -125,36 +134,169 @@ class Robot(NotebookWriter):
             pattern: Pattern string
 	    walk: if True, directories inside `top` are included as well.
             abspath: True if paths in index should be absolute. Default: Relative to getcwd().
+            nprocs: Number of processes used to extract the metadata of the files. None or 1 for serial execution.
+                See :meth:`_open_filepaths`.
         """
         import glob
         items = []
         for top in filter(os.path.isdir, glob.iglob(pattern)):
-            items += cls._open_files_in_dir(top, walk=walk)
-        new = cls(*items)
+            items += cls._open_files_in_dir(top, walk=walk, nprocs=nprocs)
+        new = cls._from_opened_items(items)
         if not abspath: new.trim_paths(start=os.getcwd())
         return new
 
     @classmethod
-    def _open_files_in_dir(cls, top, walk):
-        """Open files in directory tree starting from `top`. Return list of Abinit files."""
+    def _find_files_in_dir(cls, top, walk):
+        """Return list with the paths of the files handled by the robot in the directory tree starting from `top`."""
         if not os.path.isdir(top):
             raise ValueError("%s: no such directory" % str(top))
-        from abipy.abilab import abiopen
-        items = []
+        filepaths = []
         if walk:
             for dirpath, dirnames, filenames in os.walk(top):
-                filenames = [f for f in filenames if cls.class_handles_filename(f)]
-                for f in filenames:
-                    abifile = abiopen(os.path.join(dirpath, f))
-                    if abifile is not None: items.append((abifile.filepath, abifile))
+                filepaths.extend(os.path.join(dirpath, f) for f in filenames if cls.class_handles_filename(f))
         else:
-            filenames = [f for f in os.listdir(top) if cls.class_handles_filename(f)]
-            for f in filenames:
-                abifile = abiopen(os.path.join(top, f))
-                if abifile is not None: items.append((abifile.filepath, abifile))
+            filepaths = [os.path.join(top, f) for f in os.listdir(top) if cls.class_handles_filename(f)]
+
+        return filepaths
+
+    @staticmethod
+    def _map(func, args, nprocs=None):
+        """
+        Apply ``func`` to the items in ``args`` with a pool of ``nprocs`` processes.
+        Results are returned in the same order as ``args``. Serial execution if nprocs is None or 1.
+
+        .. note::
+
+            The netcdf4/HDF5 libraries are not thread-safe hence we use processes and
+            ``func`` should open and close the files itself.
+        """
+        if nprocs is None or nprocs <= 1 or len(args) <= 1:
+            return [func(a) for a in args]
+
+        from multiprocessing import Pool
+        pool = Pool(processes=min(nprocs, len(args)))
+        try:
+            return pool.map(func, args)
+        finally:
+            pool.close()
+            pool.join()
+
+    @classmethod
+    def _open_filepaths(cls, filepaths, nprocs=None):
+        """
+        Open ``filepaths`` with abiopen.
+        Return list of (abifile, exception, record) tuples. abifile is None if an exception was raised.
+
+        If ``nprocs`` > 1, a pool of processes extracts the index records (see :meth:`get_index_record`)
+        of the files: each worker opens the file, computes the metadata (structure, spglib analysis,
+        parameters, scalars) and closes the file. The parent opens the files serially in lazy mode
+        and the records are attached to the robot with :meth:`_attach_index_record` so that
+        the metadata are not recomputed. record is None for serial execution.
+        """
+        filepaths = list(filepaths)
+        if nprocs is None or nprocs <= 1 or len(filepaths) <= 1:
+            return [_abiopen_catch_exc(p) + (None,) for p in filepaths]
+
+        records = cls._map(_get_index_record, [(cls, p, True) for p in filepaths], nprocs=nprocs)
+        return [_abiopen_catch_exc(p, lazy=True) + (r,) for p, r in zip(filepaths, records)]
+
+    @classmethod
+    def _open_files_in_dir(cls, top, walk, nprocs=None):
+        """
+        Open files in directory tree starting from `top`.
+        Return list of (filepath, abifile, record) tuples. See :meth:`_open_filepaths`.
+        """
+        items = []
+        for abifile, exc, record in cls._open_filepaths(cls._find_files_in_dir(top, walk), nprocs=nprocs):
+            if exc is not None: raise exc
+            if abifile is not None: items.append((abifile.filepath, abifile, record))
 
         return items
 
+    @classmethod
+    def _from_opened_items(cls, items):
+        """Build a robot from a list of (label, abifile, record) tuples."""
+        new = cls(*[(label, abifile) for label, abifile, _ in items])
+        for _, abifile, record in items:
+            new._attach_index_record(abifile, record)
+        return new
+
+    def _attach_index_record(self, abifile, record):
+        """
+        Store the index ``record`` extracted by a worker process in the memo of ``abifile``.
+        The structural info of the record is reused by :meth:`_get_geo_dict`.
+        """
+        if record is None: return
+        memo = self._get_memo(abifile)
+        memo["index_record"] = record
+        if record.get("with_geo") and record.get("geo"):
+            memo[("geo", True, ())] = OrderedDict(record["geo"])
+
+    @classmethod
+    def build_index(cls, top, index_path=None, walk=True, nprocs=None, with_geo=True):
+        """
+        Build (or update) the on-disk metadata index of the files handled by the robot
+        in the directory tree starting from ``top``. Only new files or files whose size/mtime
+        changed since the last call (or indexed without structural info if ``with_geo``) are opened.
+        Records are extracted with a pool of ``nprocs`` processes.
+
+        Args:
+            top (str): Root directory.
+            index_path: Path of the index file. If None, ``top/.abipy_<EXT>_index.json`` is used.
+            walk: if True, directories inside ``top`` are included as well.
+            nprocs: Number of processes. None or 1 to extract records serially.
+            with_geo: True if structural info (lattice, spglib analysis) should be stored in the index.
+
+        Return: :class:`RobotIndex` object.
+        """
+        if index_path is None:
+            index_path = os.path.join(top, ".abipy_%s_index.json" % cls.EXT)
+
+        if os.path.exists(index_path) and os.path.getsize(index_path) > 0:
+            index = RobotIndex.from_file(index_path)
+        else:
+            index = RobotIndex([], filepath=index_path)
+        filepaths = [os.path.abspath(p) for p in cls._find_files_in_dir(top, walk)]
+        stale = [p for p in filepaths if not index.is_uptodate(p, with_geo=with_geo)]
+
+        args = [(cls, p, with_geo) for p in stale]
+        new_records = cls._map(_get_index_record, args, nprocs=nprocs)
+        index.update([r for r in new_records if r is not None], keep_paths=filepaths)
+        index.write(index_path)
+
+        return index
+
+    @classmethod
+    def get_index_record(cls, abifile, with_geo=True):
+        """
+        Extract the metadata stored in the index from ``abifile``.
+        Robot subclasses can customize the list of attributes with the ``INDEX_ATTRS`` class attribute.
+        """
+        st = os.stat(abifile.filepath)
+        record = OrderedDict([
+            ("path", os.path.abspath(abifile.filepath)),
+            ("mtime", st.st_mtime),
+            ("size", st.st_size),
+            ("class", abifile.__class__.__name__),
+            ("with_geo", bool(with_geo)),
+            ("params", _to_jsonable(getattr(abifile, "params", {}))),
+        ])
+
+        structure = getattr(abifile, "structure", None)
+        if structure is not None:
+            record["structure"] = structure.as_dict()
+            record["geo"] = _to_jsonable(structure.get_dict4pandas(with_spglib=True)) if with_geo else {}
+
+        scalars = OrderedDict()
+        for aname in cls.INDEX_ATTRS:
+            try:
+                scalars[aname] = _to_jsonable(getattrd(abifile, aname))
+            except Exception:
+                scalars[aname] = None
+        record["scalars"] = scalars
+
+        return record
+
     @classmethod
     def class_handles_filename(cls, filename):
         """True if robot class handles filename."""
@@ -166,31 +308,30 @@ class Robot(NotebookWriter):
                 filename.endswith("." + cls.EXT))  # This for .abo
 
     @classmethod
-    def from_files(cls, filenames, labels=None, abspath=False):
+    def from_files(cls, filenames, labels=None, abspath=False, nprocs=None):
         """
         Build a Robot from a list of `filenames`.
         if labels is None, labels are automatically generated from absolute paths.
 
         Args:
             abspath: True if paths in index should be absolute. Default: Relative to `top`.
+            nprocs: Number of processes used to extract the metadata of the files. None or 1 for serial execution.
+                See :meth:`_open_filepaths`.
         """
         filenames = list_strings(filenames)
-        from abipy.abilab import abiopen
         filenames = [f for f in filenames if cls.class_handles_filename(f)]
         items = []
-        for i, f in enumerate(filenames):
-            try:
-                abifile = abiopen(f)
-            except Exception as exc:
+        opened = cls._open_filepaths(filenames, nprocs=nprocs)
+        for i, (f, (abifile, exc, record)) in enumerate(zip(filenames, opened)):
+            if exc is not None:
                 cprint("Exception while opening file: `%s`" % str(f), "red")
                 cprint(exc, "red")
-                abifile = None
 
             if abifile is not None:
                 label = abifile.filepath if labels is None else labels[i]
-                items.append((label, abifile))
+                items.append((label, abifile, record))
 
-        new = cls(*items)
+        new = cls._from_opened_items(items)
         if labels is None and not abspath: new.trim_paths(start=None)
         return new
 
@@ -289,21 +430,24 @@ class Robot(NotebookWriter):
 
             self.add_file(label, filepath)
 
-    def scan_dir(self, top, walk=True):
+    def scan_dir(self, top, walk=True, nprocs=None):
         """
         Scan directory tree starting from ``top``. Add files to the robot instance.
 
         Args:
             top (str): Root directory
             walk: if True, directories inside ``top`` are included as well.
+            nprocs: Number of processes used to extract the metadata of the files. None or 1 for serial execution.
+                See :meth:`_open_filepaths`.
 
         Return:
             Number of files found.
 	"""
         count = 0
-        for filepath, abifile in self.__class__._open_files_in_dir(top, walk):
+        for filepath, abifile, record in self.__class__._open_files_in_dir(top, walk, nprocs=nprocs):
             count += 1
             self.add_file(filepath, abifile)
+            self._attach_index_record(abifile, record)
 
         return count
 
@@ -378,6 +522,7 @@ class Robot(NotebookWriter):
         """
         if label in self._abifiles:
             abifile = self._abifiles.pop(label)
+            self._memo.pop(id(abifile), None)
             if self._do_close.pop(abifile.filepath, False):
                 try:
                     abifile.close()
@@ -692,6 +837,7 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
         """
         Close all files that have been opened by the Robot.
         """
+        self._memo.clear()
         for abifile in self.abifiles:
             if self._do_close.pop(abifile.filepath, False):
                 try:
@@ -740,10 +886,15 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
     #    else:
     #        return list(od.values())
 
-    def _exec_funcs(self, funcs, arg):
+    def _exec_funcs(self, funcs, arg, columns=None):
         """
-        Execute list of callable functions. Each function receives arg as argument.
+        Execute list of callable functions. Each function receives arg as argument
+        and returns a tuple (key, value). ``funcs`` can also be a dictionary mapping the column name
+        to a function that returns the value. In this case, the functions associated to columns
+        that are not in ``columns`` are not executed. None to execute all of them.
         """
+        if isinstance(funcs, dict):
+            funcs = [(lambda a, k=k, f=f: (k, f(a))) for k, f in funcs.items() if self._wants(columns, k)]
         if not isinstance(funcs, (list, tuple)): funcs = [funcs]
         d = {}
         for func in funcs:
@@ -755,12 +906,77 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
                 self._exceptions.append(str(exc))
         return d
 
+    # Columns produced by Structure.get_dict4pandas.
+    _GEO_KEYS = ("formula", "natom", "alpha", "beta", "gamma", "a", "b", "c", "volume", "abispg_num")
+    _SPGLIB_KEYS = ("spglib_symb", "spglib_num", "spglib_lattice_type")
+
+    @staticmethod
+    def _wants(columns, keys):
+        """
+        True if ``columns`` is None (all columns are requested) or if it contains
+        at least one of the names in ``keys`` (string or list of strings).
+        """
+        if columns is None: return True
+        return any(k in columns for k in list_strings(keys))
+
+    def _get_memo(self, abifile):
+        """Return the dictionary used to cache results computed for ``abifile``."""
+        return self._memo.setdefault(id(abifile), {})
+
+    def _memoize(self, abifile, key, func):
+        """
+        Return the value stored in the memo of ``abifile`` with the given ``key``.
+        Call ``func()`` and cache the result if not available.
+        """
+        memo = self._get_memo(abifile)
+        if key not in memo:
+            memo[key] = func()
+        return memo[key]
+
+    def _get_geo_dict(self, abifile, columns=None, with_spglib=True, structure=None, **kwargs):
+        """
+        Return :class:`OrderedDict` with the structural info of ``abifile`` (see Structure.get_dict4pandas).
+        Spglib is called only if ``with_spglib`` and ``columns`` contains spglib entries.
+        An empty dictionary is returned if ``columns`` does not contain structural entries.
+        Results are cached so that the structure is analyzed only once per file.
+
+        Args:
+            columns: List of columns to compute. None for all.
+            structure: |Structure| object. If None, ``abifile.structure`` is used.
+            kwargs: Passed to Structure.get_dict4pandas
+        """
+        with_spglib = with_spglib and self._wants(columns, self._SPGLIB_KEYS)
+        if not with_spglib and not self._wants(columns, self._GEO_KEYS):
+            return OrderedDict()
+
+        key = ("geo", with_spglib, tuple(sorted(kwargs.items())))
+        # Reuse the results computed with spglib if available.
+        spg_key = ("geo", True, key[2])
+        memo = self._get_memo(abifile)
+        if not with_spglib and spg_key in memo:
+            return OrderedDict((k, v) for k, v in memo[spg_key].items() if k not in self._SPGLIB_KEYS)
+
+        def func():
+            s = abifile.structure if structure is None else structure
+            return s.get_dict4pandas(with_spglib=with_spglib, **kwargs)
+
+        return OrderedDict(self._memoize(abifile, key, func))
+
+    @staticmethod
+    def _project_columns(df, columns):
+        """
+        Select ``columns`` from the |pandas-DataFrame| ``df`` (columns are ordered as in ``columns``).
+        Names that are not present in ``df`` are ignored. Return df if columns is None.
+        """
+        if columns is None: return df
+        return df[[c for c in list_strings(columns) if c in df.columns]]
+
     @staticmethod
     def sortby_label(sortby, param):
         """Return the label to be used when files are sorted with ``sortby``."""
         return "%s %s" % (sortby, param) if not (callable(sortby) or sortby is None) else str(param)
 
-    def get_structure_dataframes(self, abspath=False, filter_abifile=None, **kwargs):
+    def get_structure_dataframes(self, abspath=False, filter_abifile=None, columns=None, **kwargs):
         """
         Wrap dataframes_from_structures function.
 
@@ -768,15 +984,26 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
             abspath: True if paths in index should be absolute. Default: Relative to getcwd().
             filter_abifile: Function that receives an ``abifile`` object and returns
                 True if the file should be added to the plotter.
+            columns: List of columns of the lattice dataframe. None for all.
+                Spglib is not called if no spglib column is requested.
         """
         from abipy.core.structure import dataframes_from_structures
+        items = list(self.items())
+        if filter_abifile is not None:
+            items = [(label, abifile) for label, abifile in items if filter_abifile(abifile)]
+
         if "index" not in kwargs:
-            index = list(self._abifiles.keys())
+            index = [label for label, _ in items]
             if not abspath: index = self._to_relpaths(index)
             kwargs["index"] = index
 
-        abifiles = self.abifiles if filter_abifile is not None else list(filter(filter_abifile, self.abifiles))
-        return dataframes_from_structures(struct_objects=abifiles, **kwargs)
+        if columns is not None:
+            kwargs["with_spglib"] = kwargs.get("with_spglib", True) and self._wants(columns, self._SPGLIB_KEYS)
+
+        dfs = dataframes_from_structures(struct_objects=[abifile for _, abifile in items], **kwargs)
+        if columns is not None:
+            dfs = dfs._replace(lattice=self._project_columns(dfs.lattice, columns))
+        return dfs
 
     def get_lattice_dataframe(self, **kwargs):
         """Return |pandas-DataFrame| with lattice parameters."""
@@ -788,13 +1015,14 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
         dfs = self.get_structure_dataframes(**kwargs)
         return dfs.coords
 
-    def get_params_dataframe(self, abspath=False):
+    def get_params_dataframe(self, abspath=False, columns=None):
         """
         Return |pandas-DataFrame| with the most important parameters.
         that are usually subject to convergence studies.
 
         Args:
             abspath: True if paths in index should be absolute. Default: Relative to `top`.
+            columns: List of parameters to include. None for all.
         """
         rows, row_names = [], []
         for label, abifile in self.items():
@@ -807,7 +1035,8 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
 
         row_names = row_names if abspath else self._to_relpaths(row_names)
         import pandas as pd
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        df = pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return self._project_columns(df, columns)
 
     ##############################################
     # Helper functions to plot pandas dataframes #
@@ -1082,6 +1311,150 @@ Expecting callable or attribute name or key in abifile.params""" % (type(hue), s
         ]
 
 
+def _abiopen_catch_exc(filepath, lazy=None):
+    """Open ``filepath`` with abiopen. Return (abifile, exception)."""
+    from abipy.abilab import abiopen
+    try:
+        return abiopen(filepath, lazy=lazy), None
+    except Exception as exc:
+        return None, exc
+
+
+def _get_index_record(args):
+    """
+    Open the file, extract the record for the index and close the file.
+    Module-level function so that it can be executed by a pool of processes.
+    """
+    robot_cls, filepath, with_geo = args
+    from abipy.abilab import abiopen
+    try:
+        with abiopen(filepath) as abifile:
+            return robot_cls.get_index_record(abifile, with_geo=with_geo)
+    except Exception as exc:
+        cprint("Exception while extracting index record from file: `%s`\n%s" % (filepath, str(exc)), "red")
+        return None
+
+
+def _to_jsonable(obj):
+    """Convert numpy objects to python objects that can be serialized in JSON format."""
+    if isinstance(obj, dict):
+        return OrderedDict((k, _to_jsonable(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [_to_jsonable(v) for v in obj]
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if obj is None or isinstance(obj, (bool, int, float) + six.string_types):
+        return obj
+    try:
+        return float(obj)
+    except (TypeError, ValueError):
+        return str(obj)
+
+
+class RobotIndex(object):
+    """
+    On-disk index with the metadata extracted from the files handled by a :class:`Robot`
+    (path, mtime, size, class, parameters, structure and selected scalars).
+    Records are keyed by absolute path and invalidated when the size or the mtime of the file change.
+    Dataframes can be built from the index without opening the files.
+
+    Usage example:
+
+    .. code-block:: python
+
+        index = GsrRobot.build_index("flow_dir", nprocs=4)
+        df = index.get_dataframe()
+    """
+
+    def __init__(self, records, filepath=None):
+        self.records = OrderedDict((r["path"], r) for r in records)
+        self.filepath = filepath
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Read the index from file ``filepath`` in JSON format."""
+        import json
+        with open(filepath, "rt") as fh:
+            return cls(json.load(fh, object_pairs_hook=OrderedDict), filepath=filepath)
+
+    def write(self, filepath=None):
+        """Write the index to ``filepath`` in JSON format."""
+        import json
+        filepath = self.filepath if filepath is None else filepath
+        with open(filepath, "wt") as fh:
+            json.dump(list(self.records.values()), fh)
+        self.filepath = filepath
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def is_uptodate(self, filepath, with_geo=False):
+        """
+        True if the record associated to ``filepath`` is present and up-to-date.
+        If ``with_geo``, records extracted without structural info are considered stale.
+        """
+        filepath = os.path.abspath(filepath)
+        r = self.records.get(filepath)
+        if r is None: return False
+        if with_geo and not r.get("with_geo", False): return False
+        st = os.stat(filepath)
+        return r["mtime"] == st.st_mtime and r["size"] == st.st_size
+
+    def update(self, records, keep_paths=None):
+        """
+        Add/replace ``records``. If ``keep_paths`` is not None, records whose path
+        is not in ``keep_paths`` are removed.
+        """
+        for r in records:
+            self.records[r["path"]] = r
+        if keep_paths is not None:
+            keep_paths = set(keep_paths)
+            for path in list(self.records.keys()):
+                if path not in keep_paths: self.records.pop(path)
+
+    def _get_index(self, abspath):
+        paths = list(self.records.keys())
+        return paths if abspath else Robot._to_relpaths(paths)
+
+    def get_structures(self):
+        """List of |Structure| objects (None if the record does not contain the structure)."""
+        from abipy.core.structure import Structure
+        return [Structure.from_dict(r["structure"]) if "structure" in r else None for r in self]
+
+    def get_params_dataframe(self, abspath=False):
+        """
+        Return |pandas-DataFrame| with the parameters stored in the index.
+
+        Args:
+            abspath: True if paths in index should be absolute. Default: Relative to getcwd().
+        """
+        import pandas as pd
+        return pd.DataFrame([r["params"] for r in self], index=self._get_index(abspath))
+
+    def get_dataframe(self, with_geo=True, with_params=True, abspath=False):
+        """
+        Return |pandas-DataFrame| with the structural info, the parameters and the scalars stored in the index.
+
+        Args:
+            with_geo: True if structure info should be added to the dataframe
+            with_params: True if the parameters should be added to the dataframe
+            abspath: True if paths in index should be absolute. Default: Relative to getcwd().
+        """
+        rows = []
+        for r in self:
+            d = OrderedDict()
+            if with_geo: d.update(r.get("geo", {}))
+            if with_params: d.update(r["params"])
+            d.update(r["scalars"])
+            rows.append(d)
+
+        import pandas as pd
+        return pd.DataFrame(rows, index=self._get_index(abspath))
+
+
 class HueGroup(object):
     """
     This small object is used by ``group_and_sortby`` to store information abouth the group.
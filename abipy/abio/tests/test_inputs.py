@@ -274,6 +274,42 @@ class TestAbinitInput(AbipyTest):
         #new_inp = si2_inp.new_with_structure(super_structure, scdims=scdims)
         #self.abivalidate_input(new_inp)
 
+    def test_inprocess_ibz_spacegroup(self):
+        """Testing in-process implementation of abiget_ibz and abiget_spacegroup."""
+        from abipy.abio.inputs import _IBZ_CACHE, clear_ibz_cache
+        inp_si = AbinitInput(structure=abidata.cif_file("si.cif"), pseudos=abidata.pseudos("14si.pspnc"))
+        inp_si.set_kmesh(ngkpt=(4, 4, 4), shiftk=(0, 0, 0))
+        clear_ibz_cache()
+
+        ibz = inp_si.abiget_ibz()
+        self.assert_almost_equal(ibz.points, [[0, 0, 0], [0.25, 0, 0], [0.5, 0, 0], [0.25, 0.25, 0],
+            [0.5, 0.25, 0], [-0.25, 0.25, 0], [0.5, 0.5, 0], [-0.25, 0.5, 0.25]])
+        self.assert_almost_equal(ibz.weights * 64, [1, 8, 4, 6, 24, 12, 3, 6])
+        assert len(_IBZ_CACHE) == 1
+
+        # Second call uses the cache. Modifications of the output must not change the cache.
+        ibz.points[0] = 1
+        assert len(inp_si.abiget_ibz()) == 2 and len(_IBZ_CACHE) == 1
+        assert np.all(inp_si.abiget_ibz().points[0] == 0)
+
+        assert len(inp_si.abiget_ibz(kptopt=3).points) == 64
+        assert len(inp_si.abiget_ibz(kptopt=2).points) == 36
+        assert len(inp_si.abiget_ibz(ngkpt=(8, 8, 8)).points) == 29
+        fcc_shiftk = [[0.5, 0.5, 0.5], [0.5, 0.0, 0.0], [0.0, 0.5, 0.0], [0.0, 0.0, 0.5]]
+        ibz = inp_si.abiget_ibz(ngkpt=(4, 4, 4), shiftk=fcc_shiftk)
+        assert len(ibz.points) == 10
+        self.assert_almost_equal(ibz.weights.sum(), 1.0)
+        assert len(_IBZ_CACHE) == 5
+
+        with self.assertRaises(inp_si.Error):
+            inp_si.abiget_ibz(ngkpt=[-1, -1, -1])
+
+        d = inp_si.abiget_spacegroup(retdict=True)
+        assert d == {"bravais": "Bravais cF (face-center cubic)", "spg_number": 227, "spg_symbol": "Fd-3m"}
+        structure = inp_si.abiget_spacegroup()
+        assert structure.abi_spacegroup.spgid == 227
+        assert len(structure.abi_spacegroup.symrel) == 48
+
     def test_abinit_calls(self):
         """Testing AbinitInput methods invoking Abinit."""
         inp_si = AbinitInput(structure=abidata.cif_file("si.cif"), pseudos=abidata.pseudos("14si.pspnc"))
@@ -307,6 +343,16 @@ class TestAbinitInput(AbipyTest):
         assert np.all(ibz.points == [[ 0.,  0.,  0.], [0.5,  0.,  0.], [0.5, 0.5, 0.]])
         assert np.all(ibz.weights == [0.125,  0.5,  0.375])
 
+        # The in-process implementation must agree with Abinit.
+        for ngkpt, shiftk in [((2, 2, 2), (0, 0, 0)), ((4, 4, 4), (0, 0, 0)),
+                              ((4, 4, 4), [[0.5, 0.5, 0.5], [0.5, 0.0, 0.0], [0.0, 0.5, 0.0], [0.0, 0.0, 0.5]])]:
+            abinit_ibz = inp_si.abiget_ibz(ngkpt=ngkpt, shiftk=shiftk, use_abinit=True)
+            native_ibz = inp_si.abiget_ibz(ngkpt=ngkpt, shiftk=shiftk)
+            self.assert_almost_equal(native_ibz.points, abinit_ibz.points)
+            self.assert_almost_equal(native_ibz.weights, abinit_ibz.weights)
+
+        assert inp_si.abiget_spacegroup(use_abinit=True).abi_spacegroup.spgid == 227
+
         # This to test what happes with wrong inputs and Abinit errors.
         wrong = inp_si.deepcopy()
         removed = wrong.pop_vars("ecut")
@@ -336,6 +382,17 @@ class TestAbinitInput(AbipyTest):
         for a, b in zip(irred_perts, irred_perts_values):
             self.assertDictEqual(a, b)
 
+        # Results are cached and the batched version should give the same results.
+        from abipy.abio.inputs import _IRRED_PERTS_CACHE, clear_irred_perts_cache
+        assert len(_IRRED_PERTS_CACHE) >= 2
+        assert inp_gan.abiget_irred_phperts(qpt=(0.5, 0, 0)) == irred_perts
+        clear_irred_perts_cache()
+        assert not _IRRED_PERTS_CACHE
+        all_perts = inp_gan.abiget_irred_phperts_qpoints([(0.5, 0, 0), (0, 0, 0), (0.5, 0, 0)], nprocs=2)
+        assert len(all_perts) == 3 and len(_IRRED_PERTS_CACHE) == 2
+        assert all_perts[0] == irred_perts and all_perts[2] == irred_perts
+        assert all_perts[1] == inp_gan.abiget_irred_phperts(qpt=(0, 0, 0))
+
         # Test abiget_autoparal_pconfs
         inp_si["paral_kgb"] = 0
         pconfs = inp_si.abiget_autoparal_pconfs(max_ncpus=5)
@@ -8,6 +8,7 @@ import abipy.data as abidata
 from abipy import abilab
 from abipy.core.testing import AbipyTest
 from abipy.abio.outputs import AbinitOutputFile, AbinitLogFile, AboRobot
+from abipy.abio.robots import RobotIndex
 
 
 class AbinitLogFileTest(AbipyTest):
@@ -70,10 +71,40 @@ class AbinitOutputTest(AbipyTest):
             abo.seek(0)
             assert abo.next_d2de_scf_cycle() is None
 
+            # Sections are decoded on demand from the memory-mapped file.
+            assert list(abo.datasets.keys()) == [1, 2] and len(abo.datasets) == 2
+            assert abo.datasets[1].startswith("== DATASET  1")
+            assert " -outvars: echo values of preprocessed input variables" in abo.header
+            assert abo.footer.startswith("== END DATASET(S)")
+            with open(abo_path, "rt") as fh:
+                assert abo.header + "".join(abo.datasets.values()) + abo.footer == fh.read()
+            abo.seek(0)
+            assert abo.next_gs_scf_cycle() is not None
+            assert abo.next_gs_scf_cycle() is None
+            abo.seek(0)
+
             timer = abo.get_timer()
             assert len(timer) == 1
             assert str(timer.summarize())
 
+            # Columnar store with the timing data.
+            store = timer.get_store()
+            assert timer.get_store() is store
+            assert len(store) > 0 and len(store.totals) == 2
+            assert set(store.data["mpi_rank"]) == {"0", "world"}
+            self.assert_almost_equal(timer.summarize()["peff"].values, [1.0])
+            table = store.get_section_table(key="wall_time")
+            assert table.shape == (len(store.data[store.data["mpi_rank"] == "0"]), 1)
+            self.assert_almost_equal(table.loc["fourwf%(pot)"].values, [1.659])
+            eff = store.get_efficiency_dataframe()
+            self.assert_almost_equal(eff.loc["total"].values, [1.0])
+            ranking = store.rank_sections(nmax=2)
+            assert list(ranking.index) == ["fourwf%(pot)", "projbd"]
+            assert len(store.get_sections_by_efficiency(nmax=3)) == 3
+            assert "imbalance" in store.get_rank_imbalance()
+            peff = timer.pefficiency()
+            assert peff["total"]["wall_time"] == [1.0]
+
             if self.has_matplotlib():
                 abo.compare_gs_scf_cycles([abo_path], show=False)
                 timer.plot_all(show=False)
@@ -191,5 +222,23 @@ class AbinitOutputTest(AbipyTest):
             time_df = robot.get_time_dataframe()
             self.assert_equal(time_df["overall_walltime"].values, [4.0, 26.1])
 
+            # Extract records with a pool of processes and cache them in the on-disk index.
+            index_path = self.get_tmpname(text=True, suffix=".json")
+            same_dims = robot.get_dims_dataframe(nprocs=2, index_path=index_path)
+            self.assert_equal(same_dims.values, dims.values)
+            index = RobotIndex.from_file(index_path)
+            assert len(index) == 2 and all(index.is_uptodate(r["path"]) for r in index)
+            assert all("geo" not in r for r in index)
+            # Structure info is added to the index only when needed.
+            same_df = robot.get_dataframe(with_geo=True, index_path=index_path)
+            assert list(same_df.columns) == list(df.columns)
+            assert all("geo" in r for r in RobotIndex.from_file(index_path))
+            assert robot.get_records(index_path=index_path) == list(RobotIndex.from_file(index_path))
+
+        # Records extracted by the pool of processes when the robot is built are reused.
+        with AboRobot.from_files(abo_paths, nprocs=2) as par_robot:
+            assert all("times" in par_robot._get_memo(abo)["index_record"] for abo in par_robot.abifiles)
+            self.assert_equal(par_robot.get_dims_dataframe().values, dims.values)
+
             if self.has_nbformat():
                 robot.write_notebook(nbpath=self.get_tmpname(text=True))
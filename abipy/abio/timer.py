@@ -4,12 +4,41 @@ It also provides tools to analyze and to visualize the parallel efficiency.
 """
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import numpy as np
+import pandas as pd
+
+from monty.string import list_strings
 from abipy.core.mixins import NotebookWriter
-from abipy.flowtk import AbinitTimerParser as _Parser
+from abipy.flowtk import AbinitTimerParser as _Parser, ParallelEfficiency
 
 
 class AbinitTimerParser(_Parser, NotebookWriter):
 
+    def get_store(self):
+        """
+        Return :class:`AbinitTimerStore` with the timing data of the files parsed so far.
+        The store is built once and rebuilt only if new files are parsed.
+        """
+        key = tuple(self.filenames)
+        if getattr(self, "_store_key", None) != key:
+            self._store, self._store_key = AbinitTimerStore.from_parser(self), key
+        return self._store
+
+    def summarize(self, **kwargs):
+        """
+        Return |pandas-DataFrame| with the most important results stored in the timers.
+        """
+        return self.get_store().summarize(**kwargs)
+
+    def pefficiency(self):
+        """
+        Analyze the parallel efficiency with the vectorized implementation of :class:`AbinitTimerStore`.
+        Sections that are not present in all the runs are supported.
+
+        Return: :class:`ParallelEfficiency` object.
+        """
+        return self.get_store().get_parallel_efficiency()
+
     def yield_figs(self, **kwargs):  # pragma: no cover
         """
         This function *generates* a predefined list of matplotlib figures with minimal input from the user.
@@ -36,6 +65,7 @@ class AbinitTimerParser(_Parser, NotebookWriter):
             nbv.new_code_cell("parser.plot_efficiency(what='bad', nmax=5);"),
             nbv.new_markdown_cell("# This is a markdown cell"),
             nbv.new_code_cell("parser.plot_pie();"),
+            nbv.new_code_cell("store = parser.get_store()\ndisplay(store.get_efficiency_dataframe())"),
 
             nbv.new_code_cell("""\
 for timer in parser.timers():
@@ -44,3 +74,189 @@ for timer in parser.timers():
         ])
 
         return self._write_nb_nbpath(nb, nbpath)
+
+
+class AbinitTimerStore(object):
+    """
+    Columnar store with the timing data of all the sections, MPI ranks and runs
+    extracted by :class:`AbinitTimerParser`. The data is flattened once in a |pandas-DataFrame|
+    with one row per (file, MPI rank, section) so that efficiency, speedup and ranking analyses
+    are performed with vectorized group-by operations.
+
+    Usage example:
+
+    .. code-block:: python
+
+        store = AbinitTimerStore.from_files(["run1.abo", "run2.abo"])
+        store.get_efficiency_dataframe()
+        store.rank_sections(nmax=10)
+    """
+
+    # Columns with the numerical values of the sections.
+    SECTION_KEYS = ("cpu_time", "cpu_fract", "wall_time", "wall_fract", "ncalls", "gflops")
+
+    def __init__(self, data, totals):
+        """
+        Args:
+            data: |pandas-DataFrame| with one row per (fname, mpi_rank, section).
+            totals: |pandas-DataFrame| with one row per (fname, mpi_rank) with the total times.
+        """
+        self.data = data
+        self.totals = totals
+
+    @classmethod
+    def from_files(cls, filenames):
+        """Build the store from a list of Abinit output files."""
+        parser = AbinitTimerParser()
+        parser.parse(list_strings(filenames))
+        return cls.from_parser(parser)
+
+    @classmethod
+    def from_parser(cls, parser):
+        """Build the store from an :class:`AbinitTimerParser`."""
+        cols = {k: [] for k in ("fname", "mpi_rank", "section") + cls.SECTION_KEYS}
+        tcols = {k: [] for k in ("fname", "mpi_rank", "mpi_nprocs", "omp_nthreads", "cpu_time", "wall_time")}
+
+        for fname in parser.filenames:
+            for mpi_rank, timer in parser._timers[fname].items():
+                for k in ("mpi_nprocs", "omp_nthreads", "cpu_time", "wall_time"):
+                    tcols[k].append(getattr(timer, k))
+                tcols["fname"].append(fname)
+                tcols["mpi_rank"].append(str(mpi_rank).strip())
+
+                nsect = len(timer.sections)
+                cols["fname"].extend([fname] * nsect)
+                cols["mpi_rank"].extend([tcols["mpi_rank"][-1]] * nsect)
+                cols["section"].extend(s.name for s in timer.sections)
+                for k in cls.SECTION_KEYS:
+                    cols[k].extend(getattr(s, k) for s in timer.sections)
+
+        totals = pd.DataFrame(tcols, columns=list(tcols.keys()))
+        totals["tot_ncpus"] = totals["mpi_nprocs"] * totals["omp_nthreads"]
+        data = pd.DataFrame(cols, columns=["fname", "mpi_rank", "section"] + list(cls.SECTION_KEYS))
+        data = data.merge(totals[["fname", "mpi_rank", "tot_ncpus"]], on=["fname", "mpi_rank"], how="left")
+
+        return cls(data, totals)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def filenames(self):
+        """List of files in the store."""
+        return list(pd.unique(self.totals["fname"]))
+
+    def _select_rank(self, df, mpi_rank):
+        """Select the rows of ``df`` associated to ``mpi_rank``. None to select all ranks."""
+        return df if mpi_rank is None else df[df["mpi_rank"] == str(mpi_rank)]
+
+    def _ref_fname(self, mpi_rank):
+        """Name of the run with the minimum number of CPUs used as reference."""
+        totals = self._select_rank(self.totals, mpi_rank)
+        return totals["fname"].values[totals["tot_ncpus"].values.argmin()]
+
+    def summarize(self, mpi_rank="0"):
+        """
+        Return |pandas-DataFrame| with the total times and the parallel efficiency of each run.
+        The run with the minimum number of CPUs is used as reference.
+        """
+        frame = self._select_rank(self.totals, mpi_rank).reset_index(drop=True)
+        frame = frame[["fname", "wall_time", "cpu_time", "mpi_nprocs", "omp_nthreads", "mpi_rank", "tot_ncpus"]]
+
+        i = frame["tot_ncpus"].values.argmin()
+        ref_wtime, ref_ncpus = frame["wall_time"].values[i], frame["tot_ncpus"].values[i]
+        frame["peff"] = (ref_ncpus * ref_wtime) / (frame["wall_time"] * frame["tot_ncpus"])
+
+        return frame
+
+    def get_section_table(self, key="wall_time", mpi_rank="0"):
+        """
+        Return |pandas-DataFrame| with the value of ``key`` for each section (rows) and each run (columns).
+        Times of sections appearing more than once in the same timer are summed.
+        NaN is used if a section is not present in a run.
+        """
+        df = self._select_rank(self.data, mpi_rank)
+        table = df.groupby(["section", "fname"])[key].sum().unstack("fname")
+        # Keep the order of the sections in the first timer and the order of the files.
+        return table.reindex(index=pd.unique(df["section"]), columns=pd.unique(df["fname"]))
+
+    def get_speedup_dataframe(self, key="wall_time", mpi_rank="0"):
+        """
+        Return |pandas-DataFrame| with the speedup of each section (rows) in each run (columns)
+        with respect to the run with the minimum number of CPUs. The row ``total`` gives the speedup of the run.
+        """
+        table = self.get_section_table(key=key, mpi_rank=mpi_rank)
+        totals = self._select_rank(self.totals, mpi_rank).set_index("fname")[key]
+        table.loc["total"] = totals.reindex(table.columns)
+
+        ref = table[self._ref_fname(mpi_rank)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return table.rdiv(ref, axis=0).replace([np.inf, -np.inf], np.nan)
+
+    def get_efficiency_dataframe(self, key="wall_time", mpi_rank="0"):
+        """
+        Return |pandas-DataFrame| with the parallel efficiency of each section (rows) in each run (columns)
+        i.e. the speedup divided by the ratio between the number of CPUs and the number of CPUs in the reference run.
+        """
+        speedup = self.get_speedup_dataframe(key=key, mpi_rank=mpi_rank)
+        ncpus = self._select_rank(self.totals, mpi_rank).set_index("fname")["tot_ncpus"].reindex(speedup.columns)
+        return speedup * (ncpus.min() / ncpus)
+
+    def get_parallel_efficiency(self, mpi_rank="0"):
+        """
+        Return :class:`ParallelEfficiency` object (the format used by the plotting methods of the parser).
+        -1 is used if the efficiency of the section is not defined.
+        """
+        cpu_peff = self.get_efficiency_dataframe(key="cpu_time", mpi_rank=mpi_rank).fillna(-1)
+        wall_peff = self.get_efficiency_dataframe(key="wall_time", mpi_rank=mpi_rank).fillna(-1)
+        cpu_fract = self.get_section_table(key="cpu_fract", mpi_rank=mpi_rank).fillna(0.0)
+        wall_fract = self.get_section_table(key="wall_fract", mpi_rank=mpi_rank).fillna(0.0)
+        cpu_fract.loc["total"] = 100.0
+        wall_fract.loc["total"] = 100.0
+
+        peff = {}
+        for sect_name in wall_peff.index:
+            peff[sect_name] = {
+                "cpu_time": cpu_peff.loc[sect_name].tolist(),
+                "wall_time": wall_peff.loc[sect_name].tolist(),
+                "cpu_fract": cpu_fract.loc[sect_name].tolist(),
+                "wall_fract": wall_fract.loc[sect_name].tolist(),
+            }
+
+        filenames = list(wall_peff.columns)
+        return ParallelEfficiency(filenames, filenames.index(self._ref_fname(mpi_rank)), peff)
+
+    def get_sections_by_efficiency(self, key="wall_time", criterion="mean", nmax=5, reverse=True, mpi_rank="0"):
+        """
+        Return the names of the ``nmax`` sections ordered by parallel efficiency.
+        The reference run is excluded and ``criterion`` ("mean", "min", "max") is used to
+        reduce the efficiencies of the other runs. Sections with undefined efficiency are ignored.
+        Use ``reverse=False`` to get the sections with bad efficiency.
+        """
+        peff = self.get_efficiency_dataframe(key=key, mpi_rank=mpi_rank).drop(index="total")
+        if peff.shape[1] > 1:
+            peff = peff.drop(columns=self._ref_fname(mpi_rank))
+        values = peff.dropna(axis=0, how="any").agg(criterion, axis=1)
+        return list(values.sort_values(ascending=not reverse, kind="mergesort").index[:nmax])
+
+    def rank_sections(self, key="wall_time", nmax=10, aggfunc="sum", mpi_rank="0"):
+        """
+        Return |pandas-DataFrame| with the ``nmax`` sections with the largest value of ``key``
+        across all the runs, reduced with ``aggfunc``. Use mpi_rank=None to include all MPI ranks.
+        """
+        df = self._select_rank(self.data, mpi_rank)
+        ranking = df.groupby("section", sort=False)[key].agg([aggfunc, "mean", "max", "count"])
+        return ranking.sort_values(aggfunc, ascending=False, kind="mergesort").head(nmax)
+
+    def get_rank_imbalance(self, key="wall_time"):
+        """
+        Return |pandas-DataFrame| with the load imbalance among MPI ranks
+        (max over ranks divided by the mean) for each run and section.
+        Only the timers associated to numerical MPI ranks are considered.
+        """
+        df = self.data[self.data["mpi_rank"].str.isdigit()]
+        grouped = df.groupby(["fname", "section"], sort=False)[key]
+        stats = grouped.agg(["min", "max", "mean", "count"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stats["imbalance"] = stats["max"] / stats["mean"]
+        return stats
@@ -22,6 +22,135 @@ from abipy.core.structure import Structure
 from abipy.tools.plotting import add_fig_kwargs, get_ax_fig_plt, get_axarray_fig_plt #, set_axlims, set_visible, set_ax_xylabels
 from abipy.tools.decorators import timeit
 
+
+def _nc_write(group, name, values, dims=None, chunksizes=None, complevel=4):
+    """
+    Write ``values`` in a compressed variable ``name`` of the netcdf group.
+    Complex arrays are stored with an additional dimension of size 2 (real, imag part).
+    ``dims`` is a tuple with the names of the dimensions (created if not present).
+    If None, dimensions named ``name_dim{i}`` are created.
+    """
+    values = np.asarray(values)
+    iscomplex = np.iscomplexobj(values)
+    if iscomplex:
+        values = np.stack((values.real, values.imag), axis=-1)
+        if dims is not None: dims = tuple(dims) + ("two",)
+        if chunksizes is not None: chunksizes = tuple(chunksizes) + (2,)
+    if dims is None:
+        dims = tuple("%s_dim%d" % (name, i) for i in range(values.ndim))
+    for dim, size in zip(dims, values.shape):
+        if dim not in group.dimensions: group.createDimension(dim, size)
+
+    var = group.createVariable(name, values.dtype, dims, zlib=values.ndim > 0,
+                               complevel=complevel, chunksizes=chunksizes)
+    var.iscomplex = int(iscomplex)
+    var[...] = values
+
+
+def _nc_read(group, name, index=None):
+    """
+    Read variable ``name`` from the netcdf group. ``index`` is used to read a slice of the array.
+    """
+    var = group.variables[name]
+    var.set_auto_mask(False)
+    iscomplex = getattr(var, "iscomplex", 0)
+    if index is None:
+        values = var[...]
+    else:
+        index = tuple(index) if isinstance(index, tuple) else (index,)
+        values = var[index + (slice(None),) if iscomplex else index]
+    values = np.asarray(values)
+    if iscomplex: values = values[..., 0] + 1j * values[..., 1]
+    return values
+
+
+def _nc_group(dataset, path):
+    """Return the group with the given path. "/" for the root group."""
+    return dataset if path in (None, "/") else dataset[path]
+
+
+def fermi_integrals(wmesh, vvdos, mumesh, tmesh, dosweight=2.0, max_mem_mb=256):
+    """
+    Compute the transport integrals:
+
+        L^n(T, mu) = dosweight * int dw vvdos(w) (w - mu)^n (-df/dw) (-1 for n = 1)
+
+    for all the temperatures and chemical potentials with the same conventions used by
+    ``BoltzTraP2.bandlib.fermiintegrals``. If the chemical potentials belong to the energy mesh
+    (the default in :class:`BoltztrapResult`), the integrals are correlations between the vvdos
+    and the Fermi-window kernels and are computed with FFTs. The FFT results are accurate only
+    up to round-off errors of the order of eps * max|L^n| so the integrals that are not far above
+    this threshold (e.g. chemical potentials deep inside a gap at low T) are recomputed with
+    the direct sum. Otherwise, the kernels are contracted with the vvdos in chunks of chemical
+    potentials so that the memory allocated for the kernels does not exceed ``max_mem_mb``.
+
+    Args:
+        wmesh: Linear energy mesh in Ha.
+        vvdos: (3, 3, nw) array with the vvdos.
+        mumesh: Chemical potentials in Ha.
+        tmesh: Temperatures in K.
+
+    Return: (3, ntemp, nmu, 3, 3) array with L0, L1, L2.
+    """
+    wmesh = np.asarray(wmesh)
+    mumesh, tmesh = np.atleast_1d(mumesh), np.atleast_1d(tmesh)
+    nw, ntemp, nmu = len(wmesh), len(tmesh), len(mumesh)
+    de = wmesh[1] - wmesh[0]
+    vv = np.reshape(vvdos, (-1, nw))
+    kbt = abu.kb_HaK * tmesh
+
+    def window(x, kbt):
+        # -df/dw = exp(-|x|/kT) / (kT (1 + exp(-|x|/kT))^2) does not overflow.
+        kern = np.exp(-np.abs(x) / kbt)
+        kern /= kbt * (1 + kern) ** 2
+        kern *= dosweight * de
+        return kern
+
+    def direct_sum(mus, kbts):
+        # Three (ntemp, chunk, nw) arrays are allocated for each chunk.
+        out = np.empty((3, len(kbts), len(mus), vv.shape[0]))
+        kbts = kbts[:, None, None]
+        chunk = max(1, int(max_mem_mb * 2**20 / (3 * 8 * len(kbts) * nw)))
+        for start in range(0, len(mus), chunk):
+            stop = min(start + chunk, len(mus))
+            x = wmesh[None, None, :] - mus[None, start:stop, None]
+            kern = window(x, kbts)
+            out[0, :, start:stop] = kern @ vv.T
+            kern *= x
+            out[1, :, start:stop] = -(kern @ vv.T)
+            kern *= x
+            out[2, :, start:stop] = kern @ vv.T
+        return out
+
+    imus = (mumesh - wmesh[0]) / de
+    if not (np.allclose(imus, np.rint(imus), atol=1e-6) and np.all((imus > -0.5) & (imus < nw - 0.5))):
+        return direct_sum(mumesh, kbt).reshape(3, ntemp, nmu, 3, 3)
+
+    # L^n(mu_j) = sum_i K^n(w_i - mu_j) vv(w_i) with w_i - mu_j = (i - j) de.
+    # Use a power of 2 >= 2 nw - 1 to avoid aliasing in the elements we need.
+    lints = np.empty((3, ntemp, nmu, vv.shape[0]))
+    imus = np.rint(imus).astype(int)
+    nfft = 1 << (2 * nw - 2).bit_length()
+    vv_g = np.fft.rfft(vv, n=nfft)
+    abs_vv = np.abs(vv).sum(axis=-1)
+    # Kernels for i - j = nw - 1, ..., -(nw - 1) (reversed order).
+    xs = de * np.arange(nw - 1, -nw, -1)
+    for it in range(ntemp):
+        kern = window(xs, kbt[it])
+        kern_n = np.array([kern, -kern * xs, kern * xs ** 2])
+        k_g = np.fft.rfft(kern_n, n=nfft)
+        corr = np.fft.irfft(k_g[:, None, :] * vv_g[None], n=nfft)
+        lints[:, it] = np.swapaxes(corr[:, :, nw - 1 + imus], 1, 2)
+
+        # Upper bound for |L^n| (3, nvv). The FFT error is of the order of eps * bound.
+        # Recompute with the direct sum the entries for which the relative error may exceed ~1e-8.
+        bound = np.abs(kern_n).max(axis=-1)[:, None] * abs_vv[None, :]
+        inaccurate = np.any(np.abs(lints[:, it]) < 1e8 * np.finfo(float).eps * bound[:, None, :], axis=(0, 2))
+        if np.any(inaccurate):
+            lints[:, it, inaccurate] = direct_sum(mumesh[inaccurate], kbt[it:it + 1])[:, 0]
+
+    return lints.reshape(3, ntemp, nmu, 3, 3)
+
 class AbipyBoltztrap():
     """
     Wrapper to Boltztrap2 interpolator
@@ -104,15 +233,110 @@ class AbipyBoltztrap():
             cls = pickle.load(f)
         return cls
 
+    def to_netcdf(self, filepath):
+        """
+        Save the input data and, if already computed, the equivalences and the coefficients in netcdf format.
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="w") as ds:
+            self._write_ncgroup(ds)
+
     @classmethod
-    def from_ebands(cls):
-        """Initialize from an ebands object"""
-        raise NotImplementedError('TODO')
+    def from_netcdf(cls, filepath, path="/"):
+        """
+        Build the object from the netcdf file produced by :meth:`to_netcdf`.
+        Equivalences and coefficients are read if present so that they are not recomputed.
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="r") as ds:
+            return cls._from_ncgroup(_nc_group(ds, path))
+
+    def _write_ncgroup(self, group):
+        """Write data to the netcdf group."""
+        import json
+        group.fermi, group.nelect, group.volume, group.lpratio = self.fermi, self.nelect, self.volume, self.lpratio
+        group.structure = json.dumps(self.structure.as_dict())
+
+        _nc_write(group, "kpoints", self.kpoints, dims=("nkpt", "three"))
+        _nc_write(group, "eig", self.eig)
+        if self.tmesh is not None: _nc_write(group, "tmesh", self.tmesh)
+        if self.linewidths: _nc_write(group, "linewidths", np.array(self.linewidths))
+        if self.mommat is not None: _nc_write(group, "mommat", self.mommat)
+        if self.magmom is not None: _nc_write(group, "magmom", self.magmom)
+
+        if hasattr(self, "_equivalences"):
+            # Ragged list of [npts_i, 3] arrays --> flattened points + offsets.
+            sizes = [len(equiv) for equiv in self._equivalences]
+            _nc_write(group, "equivalences_offsets", np.concatenate(([0], np.cumsum(sizes))))
+            _nc_write(group, "equivalences_points", np.concatenate(self._equivalences), dims=("npoints", "three"))
+
+        if hasattr(self, "_coefficients"):
+            coeffs = np.asarray(self._coefficients)
+            _nc_write(group, "coefficients", coeffs, dims=("nband", "nequiv"), chunksizes=(1, coeffs.shape[1]))
+            if getattr(self, "_linewidth_coefficients", None):
+                _nc_write(group, "linewidth_coefficients", np.array(self._linewidth_coefficients),
+                          dims=("ntemp_tau", "nband", "nequiv"), chunksizes=(1, 1, coeffs.shape[1]))
 
     @classmethod
-    def from_evk(cls):
-        """Intialize from a EVK file"""
-        raise NotImplementedError('TODO')
+    def _from_ncgroup(cls, group):
+        """Build the object from a netcdf group."""
+        import json
+        structure = Structure.from_dict(json.loads(group.structure))
+        ncvars = group.variables
+        read = lambda name: _nc_read(group, name) if name in ncvars else None
+
+        linewidths = read("linewidths")
+        tmesh = read("tmesh")
+        new = cls(group.fermi, structure, group.nelect, read("kpoints"), read("eig"), group.volume,
+                  linewidths=None if linewidths is None else list(linewidths),
+                  tmesh=None if tmesh is None else list(tmesh),
+                  mommat=read("mommat"), magmom=read("magmom"), lpratio=group.lpratio)
+
+        if "equivalences_points" in ncvars:
+            offsets, points = read("equivalences_offsets"), read("equivalences_points")
+            new._equivalences = [points[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+        if "coefficients" in ncvars:
+            new._coefficients = read("coefficients")
+            if "linewidth_coefficients" in ncvars:
+                new._linewidth_coefficients = list(read("linewidth_coefficients"))
+
+        return new
+
+    @classmethod
+    def from_ebands(cls, ebands, tmesh=None, bstart=None, bstop=None, lpratio=5):
+        """
+        Initialize the interpolation of the bands from an |ElectronBands| object.
+        The eigenvalues are passed to Boltztrap2 as arrays, no intermediate file is produced.
+
+        Args:
+            ebands: |ElectronBands| object with k-points in the IBZ or any object
+                that can be converted with ``ElectronBands.as_ebands``.
+            tmesh: a list of temperatures to use in the fermi integrations
+            bstart, bstop: only consider bands between bstart and bstop
+            lpratio: ratio to multiply by the number of k-points in the IBZ and give the
+                     number of real space points inside a sphere
+        """
+        ebands = ElectronBands.as_ebands(ebands)
+        if ebands.nsppol == 2:
+            raise NotImplementedError("nsppol 2 not implemented")
+        if not ebands.kpoints.is_ibz:
+            raise ValueError("The interpolation requires k-points in the IBZ")
+
+        structure = ebands.structure
+        volume = structure.volume * abu.Ang_Bohr**3
+        #TODO handle spin
+        eig = np.ascontiguousarray(ebands.eigens[0, :, bstart:bstop].T) * abu.eV_Ha
+
+        return cls(ebands.fermie * abu.eV_Ha, structure, ebands.nelect, ebands.kpoints.frac_coords, eig, volume,
+                   linewidths=None, tmesh=tmesh, lpratio=lpratio)
+
+    @classmethod
+    def from_evk(cls, filepath, **kwargs):
+        """
+        Intialize from a netcdf file with the eigenvalues in the IBZ (e.g. EVK.nc, GSR.nc).
+        ``kwargs`` are passed to :meth:`from_ebands`.
+        """
+        return cls.from_ebands(ElectronBands.from_file(filepath), **kwargs)
 
     @classmethod
     def from_dftdata(cls,dftdata,tmesh,lpratio=5):
@@ -152,7 +376,7 @@ class AbipyBoltztrap():
         structure = sigeph.ebands.structure
         volume = sigeph.ebands.structure.volume*abu.Ang_Bohr**3
         nelect = sigeph.ebands.nelect
-        kpoints = [k.frac_coords for k in sigeph.sigma_kpoints]
+        kpoints = sigeph.sigma_kpoints.frac_coords
 
         if sigeph.nsppol == 2:
             raise NotImplementedError("nsppol 2 not implemented")
@@ -161,14 +385,11 @@ class AbipyBoltztrap():
         eig = qpes[0,:,bstart:bstop,0].real.T*abu.eV_Ha
 
         itemp_list = list(range(sigeph.ntemp)) if itemp_list is None else duck.list_ints(itemp_list)
-        linewidths = []
-        tmesh = []
-        for itemp in itemp_list:
-            tmesh.append(sigeph.tmesh[itemp])
-            fermi = sigeph.mu_e[itemp]*abu.eV_Ha
-            #TODO handle spin
-            linewidth = qpes[0, :, bstart:bstop, itemp].imag.T*abu.eV_Ha
-            linewidths.append(linewidth)
+        tmesh = [sigeph.tmesh[itemp] for itemp in itemp_list]
+        if itemp_list: fermi = sigeph.mu_e[itemp_list[-1]]*abu.eV_Ha
+        #TODO handle spin
+        # (ntemp, nband, nkpt) array in Ha, one slice per temperature.
+        linewidths = list(np.transpose(qpes[0, :, bstart:bstop][..., itemp_list].imag, (2, 1, 0))*abu.eV_Ha)
 
         return cls(fermi, structure, nelect, kpoints, eig, volume, linewidths=linewidths,
                    tmesh=tmesh, lpratio=lpratio)
@@ -360,7 +581,12 @@ class BoltztrapResult():
     """
     _attrs = ['_L0','_L1','_L2','_sigma','_seebeck','_kappa']
 
+    # Tensors with shape [ntemp, nmu, 3, 3] that can be stored in the netcdf file.
+    _ONSAGER_NAMES = ['L0','L1','L2','sigma','seebeck','kappa']
+
     def __init__(self,abipyboltztrap,wmesh,dos,vvdos,fermi,tmesh,volume,tau_temp=None,margin=0.1):
+        # netcdf file (filepath, group path) and variables that can be read on demand. See from_netcdf.
+        self._nc, self._ncvars = None, set()
         self.abipyboltztrap = abipyboltztrap
 
         self.fermi  = fermi
@@ -381,6 +607,50 @@ class BoltztrapResult():
         self.dos = dos
         self.vvdos = vvdos
 
+    def __setstate__(self, state):
+        # Support pickle files produced before the introduction of the netcdf format.
+        state.setdefault("_nc", None)
+        state.setdefault("_ncvars", set())
+        for name in ("dos", "vvdos"):
+            if name in state: state["_" + name] = state.pop(name)
+        self.__dict__.update(state)
+
+    @property
+    def dos(self):
+        if self._dos is None: self._dos = self._read_ncvar("dos")
+        return self._dos
+
+    @dos.setter
+    def dos(self, value):
+        self._dos = value
+
+    @property
+    def vvdos(self):
+        if self._vvdos is None: self._vvdos = self._read_ncvar("vvdos")
+        return self._vvdos
+
+    @vvdos.setter
+    def vvdos(self, value):
+        self._vvdos = value
+
+    def _read_ncvar(self, name, index=None):
+        """
+        Read variable ``name`` (optionally only the slice ``index``) from the netcdf file.
+        Return None if not available.
+        """
+        if name not in self._ncvars: return None
+        import netCDF4
+        filepath, path = self._nc
+        with netCDF4.Dataset(filepath, mode="r") as ds:
+            return _nc_read(_nc_group(ds, path), name, index=index)
+
+    def _load_onsager(self, name):
+        """Set the attribute ``_name`` from the netcdf file. Return True if success."""
+        values = self._read_ncvar(name)
+        if values is None: return False
+        setattr(self, "_" + name, values)
+        return True
+
     @property
     def has_tau(self):
         return self.tau_temp is not None
@@ -391,31 +661,31 @@ class BoltztrapResult():
 
     @property
     def L0(self):
-        if not hasattr(self,'_L0'):
+        if not hasattr(self,'_L0') and not self._load_onsager('L0'):
             self.compute_fermiintegrals()
         return self._L0
 
     @property
     def L1(self):
-        if not hasattr(self,'_L1'):
+        if not hasattr(self,'_L1') and not self._load_onsager('L1'):
             self.compute_fermiintegrals()
         return self._L1
 
     @property
     def L2(self):
-        if not hasattr(self,'_L2'):
+        if not hasattr(self,'_L2') and not self._load_onsager('L2'):
             self.compute_fermiintegrals()
         return self._L2
 
     @property
     def sigma(self):
-        if not hasattr(self,'_sigma'):
+        if not hasattr(self,'_sigma') and not self._load_onsager('sigma'):
             self.compute_onsager_coefficients()
         return self._sigma
 
     @property
     def seebeck(self):
-        if not hasattr(self,'_seebeck'):
+        if not hasattr(self,'_seebeck') and not self._load_onsager('seebeck'):
             self.compute_onsager_coefficients()
         return self._seebeck
 
@@ -425,22 +695,21 @@ class BoltztrapResult():
 
     @property
     def kappa(self):
-        if not hasattr(self,'_kappa'):
+        if not hasattr(self,'_kappa') and not self._load_onsager('kappa'):
             self.compute_onsager_coefficients()
         return self._kappa
 
     def set_tmesh(self,tmesh):
         """ Set the temperature mesh"""
         self.tmesh = tmesh
-
-    def set_tmesh(self,tmesh):
-        """ Set the temperature mesh"""
-        self.tmesh = tmesh
+        self.del_attrs()
 
     def del_attrs(self):
         """ Remove all the atributes so they are recomputed """
         for attr in self._attrs:
-            delattr(attr)
+            if hasattr(self, attr): delattr(self, attr)
+        # Tensors stored on file refer to the old meshes.
+        self._ncvars.difference_update(self._ONSAGER_NAMES)
 
     def set_mumesh(self,emin,emax):
         """
@@ -453,12 +722,15 @@ class BoltztrapResult():
         start_idx = np.abs(self.wmesh - emin*abu.eV_Ha - self.fermi).argmin()
         stop_idx  = np.abs(self.wmesh - emax*abu.eV_Ha - self.fermi).argmin()
         self.mumesh = self.wmesh[start_idx:stop_idx]
+        self.del_attrs()
 
-    def compute_fermiintegrals(self):
-        """Compute and store the results of the Fermi integrals"""
-        import BoltzTraP2.bandlib as BL
-        results = BL.fermiintegrals(self.wmesh, self.dos, self.vvdos, mur=self.mumesh, Tr=self.tmesh)
-        _, self._L0, self._L1, self._L2, self._Lm11 = results
+    def compute_fermiintegrals(self, max_mem_mb=256):
+        """
+        Compute and store the results of the Fermi integrals for all the temperatures
+        and chemical potentials. The vvdos is not recomputed when the meshes are changed.
+        """
+        self._L0, self._L1, self._L2 = fermi_integrals(self.wmesh, self.vvdos, self.mumesh, self.tmesh,
+                                                       max_mem_mb=max_mem_mb)
 
     def compute_onsager_coefficients(self):
         """Compute Onsager coefficients"""
@@ -479,13 +751,67 @@ class BoltztrapResult():
         with open(filename,'wb') as f:
             pickle.dump(self,f)
 
+    def to_netcdf(self, filepath):
+        """
+        Write the results in netcdf format. DOS, vvdos and the Onsager tensors
+        already computed are stored in compressed variables.
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="w") as ds:
+            self._write_ncgroup(ds)
+
+    @classmethod
+    def from_netcdf(cls, filepath, path="/", abipyboltztrap=None):
+        """
+        Build the object from the netcdf file produced by :meth:`to_netcdf`.
+        Only the meshes are read here. DOS, vvdos and the Onsager tensors are read
+        when needed and :meth:`get_component` reads only the requested slice.
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="r") as ds:
+            return cls._from_ncgroup(_nc_group(ds, path), filepath, abipyboltztrap=abipyboltztrap)
+
+    def _write_ncgroup(self, group):
+        """Write results to the netcdf group."""
+        group.fermi, group.volume = self.fermi, self.volume
+        if self.tau_temp is not None: group.tau_temp = self.tau_temp
+
+        _nc_write(group, "wmesh", self.wmesh, dims=("nw",))
+        _nc_write(group, "mumesh", self.mumesh, dims=("nmu",))
+        _nc_write(group, "tmesh", self.tmesh, dims=("ntemp",))
+        _nc_write(group, "dos", self.dos, dims=("nw",))
+        _nc_write(group, "vvdos", self.vvdos, dims=("three", "three", "nw"))
+
+        # Onsager tensors [ntemp, nmu, 3, 3], one chunk per temperature.
+        for name in self._ONSAGER_NAMES:
+            values = getattr(self, "_" + name, None)
+            if values is None: values = self._read_ncvar(name)
+            if values is None: continue
+            _nc_write(group, name, values, dims=("ntemp", "nmu", "three", "three"),
+                      chunksizes=(1, len(self.mumesh), 3, 3))
+
+    @classmethod
+    def _from_ncgroup(cls, group, filepath, abipyboltztrap=None):
+        """Build the object from a netcdf group. Large arrays are read on demand."""
+        tau_temp = getattr(group, "tau_temp", None)
+        new = cls(abipyboltztrap, _nc_read(group, "wmesh"), None, None, group.fermi,
+                  _nc_read(group, "tmesh"), group.volume, tau_temp=tau_temp)
+        new.mumesh = _nc_read(group, "mumesh")
+        new._nc, new._ncvars = (filepath, group.path), set(group.variables)
+        return new
+
     def istensor(self,what):
         """Check if a certain quantity is a tensor"""
+        # Avoid reading the full array if the tensor is stored on file.
+        if what in self._ONSAGER_NAMES and what in self._ncvars: return True
         if not hasattr(self,what): return None
         return len(getattr(self,what).shape) > 2
 
     def get_component(self,what,component,itemp):
         i,j = abu.s2itup(component)
+        if not hasattr(self, "_" + what) and what in self._ncvars:
+            # Read only the slice from file.
+            return self._read_ncvar(what, index=(itemp, slice(None), i, j))
         return getattr(self,what)[itemp,:,i,j]
 
     def plot_dos_ax(self,ax,fontsize=8,**kwargs):
@@ -684,6 +1010,45 @@ class BoltztrapResultRobot():
         with open(filename,'wb') as f:
             pickle.dump(self,f)
 
+    def to_netcdf(self, filepath, with_interpolator=True):
+        """
+        Write all the results in a netcdf file (one group per result).
+        If ``with_interpolator``, the :class:`AbipyBoltztrap` object used to produce
+        the results is saved in the ``interpolator`` group.
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="w") as ds:
+            ds.nresults = self.nresults
+            if self.erange is not None: ds.erange = np.array(self.erange)
+            for i, result in enumerate(self.results):
+                result._write_ncgroup(ds.createGroup("result_%d" % i))
+
+            abipyboltztrap = self.results[0].abipyboltztrap
+            if with_interpolator and abipyboltztrap is not None:
+                abipyboltztrap._write_ncgroup(ds.createGroup("interpolator"))
+
+    @classmethod
+    def from_netcdf(cls, filepath, with_interpolator=False):
+        """
+        Build the robot from the netcdf file produced by :meth:`to_netcdf`.
+        Only the meshes are read here. DOS, vvdos and transport tensors are read on demand
+        so that only the quantities that are plotted are loaded.
+
+        Args:
+            with_interpolator: True to read the :class:`AbipyBoltztrap` object (requires ase).
+        """
+        import netCDF4
+        with netCDF4.Dataset(filepath, mode="r") as ds:
+            abipyboltztrap = None
+            if with_interpolator and "interpolator" in ds.groups:
+                abipyboltztrap = AbipyBoltztrap._from_ncgroup(ds.groups["interpolator"])
+            results = [BoltztrapResult._from_ncgroup(ds.groups["result_%d" % i], filepath,
+                                                     abipyboltztrap=abipyboltztrap)
+                       for i in range(int(ds.nresults))]
+            erange = tuple(ds.erange) if "erange" in ds.ncattrs() else None
+
+        return cls(results, erange=erange)
+
     def plot_vvdos_ax(self,ax,legend=True,components=('xx',),itau_list=None,fontsize=8,erange=None,**kwargs):
         """
         Plot the vvdos for all the results in the robot
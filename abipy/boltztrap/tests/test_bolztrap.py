@@ -7,7 +7,7 @@ import numpy as np
 import abipy.data as abidata
 
 from abipy.core.testing import AbipyTest
-from abipy.boltztrap import AbipyBoltztrap, BoltztrapResult
+from abipy.boltztrap import AbipyBoltztrap, BoltztrapResult, BoltztrapResultRobot
 from abipy import abilab
 
 
@@ -47,6 +47,14 @@ class AbipyBoltztrapTest(AbipyTest):
         same_result = BoltztrapResult.from_pickle(pickle_file)
         self.assert_equal(btr.tmesh, same_result.tmesh)
 
+        # Test netcdf format.
+        nc_file = self.get_tmpname(suffix="_BTR.nc")
+        btr.to_netcdf(nc_file)
+        same_robot = BoltztrapResultRobot.from_netcdf(nc_file, with_interpolator=True)
+        assert same_robot.nresults == btr.nresults
+        self.assert_almost_equal(same_robot[0].sigma, btr[0].sigma)
+        assert same_robot[0].abipyboltztrap.ncoefficients == bt.ncoefficients
+
         if self.has_matplotlib():
             # Plot the density of states and VVDOS for multiple temperatures
             assert btr.plot_dos_vvdos(show=False)
@@ -57,3 +65,92 @@ class AbipyBoltztrapTest(AbipyTest):
             assert btr.plot('seebeck', itemp_list=[3], itau_list=[1,2], show=False)
             assert btr.plot('powerfactor', itemp_list=[3], itau_list=None, show=False)
             assert btr.plot_transport(show=False)
+
+    def test_ebands_boltztrap(self):
+        """Test boltztrap interpolation from ElectronBands"""
+        self.skip_if_not_bolztrap2()
+
+        bt = AbipyBoltztrap.from_evk(abidata.ref_file("si_scf_GSR.nc"), tmesh=[300], bstop=4)
+        assert bt.eig.shape == (4, bt.nkpoints)
+        assert bt.linewidths is None
+
+        # A k-path cannot be interpolated.
+        with self.assertRaises(ValueError):
+            AbipyBoltztrap.from_ebands(abidata.ref_file("si_nscf_GSR.nc"))
+
+        btr = bt.run(npts=300, dos_method="histogram")
+        assert btr.nresults == 1
+
+    def test_netcdf_io(self):
+        """Test netcdf I/O of BoltztrapResult without BoltzTraP2"""
+        nw, tmesh = 100, [100, 300]
+        wmesh = np.linspace(-1, 1, nw)
+        results = []
+        for tau_temp in (None, 300):
+            res = BoltztrapResult(None, wmesh, np.random.rand(nw), np.random.rand(3, 3, nw), 0.1, tmesh, 45.0,
+                                  tau_temp=tau_temp)
+            nmu = len(res.mumesh)
+            for name in BoltztrapResult._ONSAGER_NAMES:
+                setattr(res, "_" + name, np.random.rand(len(tmesh), nmu, 3, 3))
+            results.append(res)
+        robot = BoltztrapResultRobot(results, erange=(-0.5, 0.5))
+
+        nc_file = self.get_tmpname(suffix="_BTR.nc")
+        robot.to_netcdf(nc_file)
+        same_robot = BoltztrapResultRobot.from_netcdf(nc_file)
+        assert same_robot.nresults == 2 and same_robot.erange == (-0.5, 0.5)
+        assert same_robot[1].tau_temp == 300 and not same_robot[0].has_tau
+        for res, same in zip(robot, same_robot):
+            # Partial read of a single component from file.
+            self.assert_almost_equal(same.get_component("sigma", "xy", 1), res.get_component("sigma", "xy", 1))
+            assert not hasattr(same, "_sigma")
+            self.assert_almost_equal(same.seebeck, res.seebeck)
+            self.assert_almost_equal(same.dos, res.dos)
+            self.assert_almost_equal(same.vvdos, res.vvdos)
+            self.assert_almost_equal(same.mumesh, res.mumesh)
+
+        # Tensors on file are not used if the meshes are changed.
+        same_robot[0].set_mumesh(-0.2, 0.2)
+        assert "sigma" not in same_robot[0]._ncvars
+
+    def test_fermi_integrals(self):
+        """Test vectorized Fermi integrals"""
+        from abipy.boltztrap import fermi_integrals
+        import abipy.core.abinit_units as abu
+        nw = 200
+        wmesh = np.linspace(-0.2, 0.2, nw)
+        vvdos = np.random.rand(3, 3, nw)
+        tmesh = [300, 1000]
+        de = wmesh[1] - wmesh[0]
+        # Chemical potentials on the energy mesh (FFT) and outside (small chunks).
+        for mumesh in (wmesh[20:-20:7], wmesh[20:-20:7] + de / 3):
+            lints = fermi_integrals(wmesh, vvdos, mumesh, tmesh, max_mem_mb=0.01)
+            assert lints.shape == (3, len(tmesh), len(mumesh), 3, 3)
+
+            for it, temp in enumerate(tmesh):
+                kbt = abu.kb_HaK * temp
+                for imu, mu in enumerate(mumesh):
+                    kern = 2 * de / (4 * kbt * np.cosh((wmesh - mu) / (2 * kbt)) ** 2)
+                    self.assert_almost_equal(lints[0, it, imu], np.sum(kern * vvdos, axis=-1))
+                    self.assert_almost_equal(lints[1, it, imu], -np.sum(kern * (wmesh - mu) * vvdos, axis=-1))
+                    self.assert_almost_equal(lints[2, it, imu], np.sum(kern * (wmesh - mu) ** 2 * vvdos, axis=-1))
+
+        # Gapped vvdos at low T: the integrals are exponentially small for mu inside the gap
+        # and must be positive (L0) with the correct sign of L1 (round-off of the FFT).
+        nw = 1201
+        wmesh = np.linspace(-0.3, 0.3, nw)
+        de = wmesh[1] - wmesh[0]
+        vvdos = np.zeros((3, 3, nw))
+        ene = np.abs(wmesh) - 0.04
+        vvdos[..., ene > 0] = np.sqrt(ene[ene > 0]) * (1 + 0.1 * wmesh[ene > 0])
+        mumesh = wmesh[::10]
+        kbt = abu.kb_HaK * 300
+        lints = fermi_integrals(wmesh, vvdos, mumesh, 300)
+        assert np.all(lints[0, 0, :, 0, 0] > 0)
+        for imu, mu in enumerate(mumesh):
+            x = wmesh - mu
+            kern = 2 * de * np.exp(-np.abs(x) / kbt) / (kbt * (1 + np.exp(-np.abs(x) / kbt)) ** 2)
+            l0 = np.sum(kern * vvdos[0, 0])
+            l1 = -np.sum(kern * x * vvdos[0, 0])
+            self.assert_almost_equal(lints[0, 0, imu, 0, 0] / l0, 1.0)
+            self.assert_almost_equal(lints[1, 0, imu, 0, 0] / l0, l1 / l0)
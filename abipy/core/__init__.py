@@ -1,7 +1,49 @@
 """Core objects."""
-from .kpoints import *
-from .structure import *
-from .symmetries import *
-from .gsphere import *
-from .mesh3d import *
-from .fields import *
+import sys
+
+# Names exported by the submodules. The submodules are imported on first access
+# so that `import abipy` (e.g. to get the version) does not import pymatgen and flowtk.
+# Must be kept in sync with the __all__ of the submodules (see tests/test_core.py).
+_SUBMODULE_NAMES = [
+    ("kpoints", ["issamek", "wrap_to_ws", "wrap_to_bz", "as_kpoints", "Kpoint", "KpointList", "KpointStar",
+                 "Kpath", "IrredZone", "rc_list", "kmesh_from_mpdivs", "Ktables", "find_points_along_path"]),
+    ("structure", ["mp_match_structure", "mp_search", "cod_search", "Structure", "dataframes_from_structures"]),
+    ("symmetries", ["LatticeRotation", "AbinitSpaceGroup"]),
+    ("gsphere", ["GSphere"]),
+    ("mesh3d", ["Mesh3D", "set_fft_backend", "get_fft_backend", "benchmark_fft_backends"]),
+    ("fields", ["Density", "VxcPotential", "VhartreePotential", "VhxcPotential", "VksPotential"]),
+]
+
+_NAME2MODULE = {name: modname for modname, names in _SUBMODULE_NAMES for name in names}
+
+__all__ = list(_NAME2MODULE)
+
+
+def __getattr__(name):
+    """
+    Import the submodule defining ``name`` on first access.
+    Submodules (e.g. ``abipy.core.structure``) are imported if ``name`` is not an exported name.
+    """
+    import importlib
+    if name not in _NAME2MODULE:
+        modname = "%s.%s" % (__name__, name)
+        try:
+            return importlib.import_module(modname)
+        except ImportError as exc:
+            # Re-raise if the error comes from the imports of an existing submodule.
+            if getattr(exc, "name", modname) != modname: raise
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    value = getattr(importlib.import_module("." + _NAME2MODULE[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    # Module-level __getattr__ (PEP 562) is not supported.
+    from .kpoints import *
+    from .structure import *
+    from .symmetries import *
+    from .gsphere import *
+    from .mesh3d import *
+    from .fields import *
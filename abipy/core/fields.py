@@ -476,42 +476,52 @@ class _Field(Has_Structure):
 
         # Spline bessel integrals.
         datag = np.reshape(self.datag, (self.nspden, -1))
-        #print("datag[0]", datag[0, 0] * self.structure.volume, datag.shape)
         gvecs = self.mesh.gvecs
         gmods = self.mesh.gmods
         gmax = gmods.max()
         from abipy.tools import bessel
-        splines = {s: bessel.spline_int_jlqr(0, gmax, rcut_symbol[s]) for s in self.structure.symbol_set}
 
         # 4 pi sum_G n(G) e^{iGRo} int_0^{rcut} r**2 j_l(Gr} dr
+        # All the atoms of the same species share the radial integral so we treat them in a single
+        # matrix-matrix product. Atoms are processed in chunks to limit the size of the phase matrix.
+        natom = len(self.structure)
+        frac_coords = self.structure.frac_coords
+        symbols = np.array([site.specie.symbol for site in self.structure])
+        chunk = max(1, int(2**24 // max(1, len(gvecs))))
+        res = np.empty((natom, self.nspden), dtype=np.complex128)
+
+        for symbol in self.structure.symbol_set:
+            fg = datag * bessel.spline_int_jlqr(0, gmax, rcut_symbol[symbol])(gmods)
+            iatoms = np.where(symbols == symbol)[0]
+            for start in range(0, len(iatoms), chunk):
+                inds = iatoms[start:start+chunk]
+                phases = np.exp(2j * np.pi * np.dot(frac_coords[inds], gvecs.T))
+                res[inds] = np.dot(phases, fg.T) * (4 * np.pi)
+
+        # Compute densities and magnetization.
+        ntot, nup, ndown, mx, my, mz = 6 * (None,)
+        if self.nspinor == 1:
+            res = res.real
+            if self.nspden == 1:
+                ntot = res[:, 0]
+            elif self.nspden == 2:
+                nup, ndown = res[:, 0], res[:, 1]
+                ntot, mz = nup + ndown, nup - ndown
+
+        elif self.nspinor == 2:
+            raise NotImplementedError()
+
+        # Fill DataFrame rows.
         rows = []
         for iatom, site in enumerate(self.structure):
             symbol = site.specie.symbol
-            phases = np.exp(2j * np.pi * np.dot(gvecs, site.frac_coords))
-            fg = datag * phases * splines[symbol](gmods)
-            res_nspden = np.sum(fg, axis=1)  * (4 * np.pi)
-            #print("result:", res_nspden, res_nspden.shape, (datag * fg).shape)
-
-            # Compute densities and magnetization.
-            ntot, nup, ndown, mx, my, mz = 6 * (None,)
-            if self.nspinor == 1:
-                res_nspden = res_nspden.real
-                if self.nspden == 1:
-                    ntot = res_nspden[0]
-                elif self.nspden == 2:
-                    nup, ndown = res_nspden
-                    ntot, mz = nup + ndown, nup - ndown
-
-            elif self.nspinor == 2:
-                raise NotImplementedError()
-                ntot, mx, my, mz = scalvec_from_spinmat(res_nspden)
-                nup, ndown = 0.5 * (ntot + mz), 0.5 * (ntot - mz)
-
-            # Fill DataFrame row.
             rows.append(OrderedDict([
                 ("iatom", iatom), ("symbol", symbol),
-                ("ntot", ntot), ("nup", nup), ("ndown", ndown),
-                ("mx", mx), ("my", my), ("mz", mz),
+                ("ntot", None if ntot is None else ntot[iatom]),
+                ("nup", None if nup is None else nup[iatom]),
+                ("ndown", None if ndown is None else ndown[iatom]),
+                ("mx", mx), ("my", my),
+                ("mz", None if mz is None else mz[iatom]),
                 ("rsph_ang", rcut_symbol[symbol]), ("frac_coords", site.frac_coords),
             ]))
 
@@ -528,6 +538,43 @@ class _Field(Has_Structure):
         return df
 
 
+    def get_radial_histograms(self, rmax, nbins=100):
+        """
+        Compute radial histograms of the field around each atom by summing the values
+        on the real-space gridpoints located inside the sphere of radius ``rmax``.
+        All the atoms and all the ``nspden`` components are treated in a single pass
+        using the table of gridpoints returned by ``Mesh3D.get_sphere_table``.
+        The integral inside a sphere of radius ``r <= rmax`` can be then obtained from
+        the cumulative sum of the histogram without rescanning the grid.
+
+        Args:
+            rmax: Maximum radius of the spheres in Angstrom.
+            nbins: Number of radial bins.
+
+        Return: |AttrDict| with:
+
+            edges: [nbins + 1] array with the edges of the radial bins.
+            hist: [natom, nspden, nbins] array with the integral of the field in each radial shell.
+            cumint: [natom, nspden, nbins] array with the integral inside the sphere of radius ``edges[1:]``.
+            symbols: List with the chemical symbol of each atom.
+        """
+        natom = len(self.structure)
+        table = self.mesh.get_sphere_table(self.structure.cart_coords, rmax)
+        edges = np.linspace(0, rmax, num=nbins + 1)
+        ibins = np.minimum(np.searchsorted(edges, table.dist, side="right") - 1, nbins - 1)
+        ihist = table.ipoint * nbins + ibins
+
+        datar = np.reshape(self.datar, (self.nspden, -1))
+        hist = np.empty((natom, self.nspden, nbins))
+        for ispden in range(self.nspden):
+            hist[:, ispden] = np.reshape(np.bincount(ihist, weights=datar[ispden, table.ifft],
+                                         minlength=natom * nbins), (natom, nbins))
+        hist *= self.mesh.dv
+
+        return AttrDict(edges=edges, hist=hist, cumint=np.cumsum(hist, axis=-1),
+                        symbols=[site.specie.symbol for site in self.structure])
+
+
 class _DensityField(_Field):
     """Base class for density-like fields."""
 
@@ -469,6 +469,125 @@ def find_irred_kpoints_generic(structure, kfrac_coords, verbose=1):
     return dict2namedtuple(irred_map=np.array(irred_map, dtype=np.int))
 
 
+def spglib_symrecs(structure, kptopt=1, types=None, symprec=None, angle_tolerance=None):
+    """
+    Return (nsym, 3, 3) integer array with the rotations in reciprocal space (reduced coordinates)
+    used to reduce a k-mesh with the given Abinit ``kptopt``. Uses spglib_ to find the
+    symmetries of the structure. The inversion is added if time-reversal can be used.
+
+    Args:
+        structure: |Structure| object.
+        kptopt: Abinit kptopt (1, 2, 3 or 4).
+        types: List of integers used to distinguish the atoms. Default: atomic numbers.
+            Can be used to break symmetries e.g. in magnetic systems.
+        symprec, angle_tolerance: Tolerances passed to spglib. None to use the global values.
+    """
+    kptopt = int(kptopt)
+    if kptopt not in (1, 2, 3, 4):
+        raise ValueError("kptopt %s is not supported. Must be in (1, 2, 3, 4)" % kptopt)
+
+    identity = np.eye(3, dtype=np.int)
+    if kptopt in (1, 4):
+        import spglib
+        types = structure.atomic_numbers if types is None else types
+        cell = (structure.lattice.matrix, structure.frac_coords, types)
+        symprec = _SPGLIB_SYMPREC if symprec is None else symprec
+        angle_tolerance = _SPGLIB_ANGLE_TOLERANCE if angle_tolerance is None else angle_tolerance
+        symd = spglib.get_symmetry(cell, symprec=symprec, angle_tolerance=angle_tolerance)
+        # S_k = (R^{-1})^T. Remove duplicated rotations associated to different fractional translations.
+        symrecs = np.rint([np.linalg.inv(r).T for r in symd["rotations"]]).astype(np.int)
+        symrecs = np.unique(symrecs, axis=0)
+    else:
+        symrecs = np.reshape(identity, (1, 3, 3))
+
+    if has_timrev_from_kptopt(kptopt):
+        symrecs = np.unique(np.concatenate((symrecs, -symrecs)), axis=0)
+
+    # Put the identity first.
+    isid = np.array([np.all(s == identity) for s in symrecs])
+    return np.concatenate((symrecs[isid], symrecs[~isid]))
+
+
+def ibz_from_mesh(structure, ngkpt, shiftk, kptopt=1, types=None, symprec=None, angle_tolerance=None):
+    """
+    Compute the k-points in the IBZ and the corresponding weights for a Monkhorst-Pack mesh
+    defined by ``ngkpt`` and ``shiftk`` without calling Abinit.
+
+    The algorithm follows the one used in Abinit (smpbz + symkpt):
+    the points of the full mesh are generated with the first reduced coordinate varying fastest
+    (shifts in the inner loop) and folded in ]-1/2, 1/2]. The points are sorted by their
+    length and the shortest point of each star is selected as representative.
+    The irreducible points are returned in the order in which they appear in the full mesh.
+
+    Args:
+        structure: |Structure| object.
+        ngkpt: Number of divisions of the mesh.
+        shiftk: Shifts in reduced coordinates. Shape (nshiftk, 3).
+        kptopt: Abinit kptopt (1, 2, 3 or 4).
+        types, symprec, angle_tolerance: See :func:`spglib_symrecs`.
+
+    Return:
+        `namedtuple` with attributes:
+            points: |numpy-array| with the points in the IBZ in reduced coordinates.
+            weights: |numpy-array| with weights of the points (normalized to one).
+            bz2ibz: |numpy-array| with the index of the irreducible point associated to each point of the full mesh.
+    """
+    ngkpt = np.asarray(ngkpt, dtype=np.int).reshape(3)
+    shiftk = np.reshape(shiftk, (-1, 3)).astype(np.float)
+
+    # Use integer coordinates on a mesh fine enough to represent all the shifts.
+    for lcm in range(1, 129):
+        if np.allclose(shiftk * lcm, np.rint(shiftk * lcm), atol=1e-8): break
+    else:
+        raise ValueError("Cannot represent shiftk %s on a finite integer mesh" % str(shiftk))
+    fine = ngkpt * lcm
+
+    # Full mesh: first reduced coordinate varies fastest (Fortran order), shifts in the inner loop.
+    grid = np.indices(ngkpt).reshape(3, -1, order="F").T
+    ishifts = np.rint(shiftk * lcm).astype(np.int)
+    gfine = (grid[:, None, :] * lcm + ishifts[None, :, :]).reshape(-1, 3) % fine
+
+    # Remove duplicated points (possible if shifts are equivalent) keeping the first occurrence.
+    lin = np.ravel_multi_index(gfine.T, fine)
+    _, first = np.unique(lin, return_index=True)
+    keep = np.sort(first)
+    gfine, lin = gfine[keep], lin[keep]
+    nkbz = len(lin)
+
+    # Reduced coordinates in ]-1/2, 1/2].
+    kbz = gfine / fine
+    kbz -= np.ceil(kbz - 0.5 - 1e-10)
+
+    # Lookup table: linear index on the fine mesh --> index in kbz.
+    lookup = -np.ones(np.prod(fine), dtype=np.int)
+    lookup[lin] = np.arange(nkbz)
+
+    # Images of each point: symrec works on reduced coordinates i.e on gfine / fine.
+    # Need g' = S g with S applied in units of 1/fine along each direction.
+    symrecs = spglib_symrecs(structure, kptopt=kptopt, types=types, symprec=symprec,
+                             angle_tolerance=angle_tolerance)
+    kimg = np.einsum("sij,kj->ski", symrecs, kbz)
+    gimg = np.rint(kimg * fine)
+    on_mesh = np.all(np.abs(kimg * fine - gimg) < 1e-6, axis=-1)
+    gimg = gimg.astype(np.int) % fine
+    images = np.where(on_mesh, lookup[np.ravel_multi_index(np.moveaxis(gimg, -1, 0), fine)], -1)
+
+    # Loop over points sorted by length. The first point of each star is the representative.
+    kcart = np.dot(kbz, structure.lattice.reciprocal_lattice.matrix)
+    order = np.argsort(np.round(np.sum(kcart ** 2, axis=1), decimals=10), kind="mergesort")
+    bz2rep = -np.ones(nkbz, dtype=np.int)
+    for ik in order:
+        if bz2rep[ik] != -1: continue
+        img = images[:, ik]
+        img = img[img >= 0]
+        bz2rep[img[bz2rep[img] == -1]] = ik
+        bz2rep[ik] = ik
+
+    reps, bz2ibz, counts = np.unique(bz2rep, return_inverse=True, return_counts=True)
+
+    return dict2namedtuple(points=kbz[reps], weights=counts / nkbz, bz2ibz=bz2ibz)
+
+
 class KpointsError(Exception):
     """Base error class for KpointList exceptions."""
 
@@ -2,21 +2,135 @@
 """This module contains the class defining Uniform 3D meshes."""
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import time
 import numpy as np
 
 from itertools import product as iproduct
-from collections import deque
+from collections import deque, OrderedDict
 from monty.functools import lazy_property
 from numpy.random import random
-from numpy.fft import fftn, ifftn, fftshift, ifftshift, fftfreq
+from numpy.fft import fftshift, ifftshift, fftfreq
 from abipy.tools import duck
 
 
 __all__ = [
     "Mesh3D",
+    "set_fft_backend",
+    "get_fft_backend",
+    "benchmark_fft_backends",
 ]
 
 
+# Global options for the FFT library used by Mesh3D.
+_FFT_BACKEND = {"name": "numpy", "nthreads": 1}
+
+_FFT_BACKEND_NAMES = ("numpy", "scipy", "pyfftw")
+
+
+def set_fft_backend(name="numpy", nthreads=1):
+    """
+    Select the FFT library used by |Mesh3D| objects.
+
+    Args:
+        name: "numpy", "scipy" (``scipy.fft`` with ``nthreads`` workers) or "pyfftw" (requires pyFFTW).
+        nthreads: Number of threads used by the "scipy" and "pyfftw" backends.
+
+    Return: dictionary with the previous options.
+    """
+    name = name.lower()
+    if name not in _FFT_BACKEND_NAMES:
+        raise ValueError("Wrong FFT backend: `%s`. Choose among: %s" % (name, str(_FFT_BACKEND_NAMES)))
+    if name in ("scipy", "pyfftw"):
+        # Check that the library is installed without importing it.
+        from importlib.util import find_spec
+        if find_spec(name) is None:
+            raise ImportError("%s is not installed. Use `pip install %s` or select another FFT backend." % (name, name))
+
+    old = _FFT_BACKEND.copy()
+    _FFT_BACKEND.update(name=name, nthreads=int(nthreads))
+    return old
+
+
+def get_fft_backend():
+    """Return dictionary with the name of the FFT backend and the number of threads."""
+    return _FFT_BACKEND.copy()
+
+
+def _build_fft_plan(backend, nthreads, kind, shape, dtype, axes, overwrite):
+    """
+    Return function performing the FFT of ``kind`` ("fftn", "ifftn", "rfftn", "irfftn")
+    on arrays with given ``shape`` and ``dtype`` along ``axes``.
+    For "irfftn", ``shape`` is the shape of the output array.
+    """
+    if backend == "numpy":
+        import numpy.fft as npfft
+        func = getattr(npfft, kind)
+        if kind == "irfftn":
+            s = [shape[ax] for ax in axes]
+            return lambda a: func(a, s=s, axes=axes)
+        return lambda a: func(a, axes=axes)
+
+    elif backend == "scipy":
+        import scipy.fft as spfft
+        func = getattr(spfft, kind)
+        if kind == "irfftn":
+            s = [shape[ax] for ax in axes]
+            return lambda a: func(a, s=s, axes=axes, overwrite_x=overwrite, workers=nthreads)
+        return lambda a: func(a, axes=axes, overwrite_x=overwrite, workers=nthreads)
+
+    elif backend == "pyfftw":
+        import pyfftw
+        if kind == "irfftn":
+            in_shape = list(shape)
+            in_shape[axes[-1]] = shape[axes[-1]] // 2 + 1
+            a = pyfftw.empty_aligned(in_shape, dtype=np.complex128)
+            s = [shape[ax] for ax in axes]
+            plan = pyfftw.builders.irfftn(a, s=s, axes=axes, overwrite_input=overwrite,
+                                          threads=nthreads, avoid_copy=False)
+        else:
+            a = pyfftw.empty_aligned(shape, dtype=dtype)
+            plan = getattr(pyfftw.builders, kind)(a, axes=axes, overwrite_input=overwrite,
+                                                  threads=nthreads, avoid_copy=False)
+        # Return a copy since the output array of the plan is reused at each call.
+        return lambda a: plan(a).copy()
+
+    raise ValueError("Wrong FFT backend: `%s`" % backend)
+
+
+def benchmark_fft_backends(shape=(64, 64, 64), ndat=1, nreps=5, nthreads=1, verbose=1):
+    """
+    Benchmark the FFT backends available in the present environment.
+    Executes ``nreps`` R --> G and G --> R transforms of ``ndat`` complex arrays defined on a cubic mesh.
+
+    Return: dictionary mapping the name of the backend to the wall-time (s) for one pair of transforms.
+    """
+    mesh = Mesh3D(shape, np.eye(3))
+    fr = mesh.crandom(extra_dims=ndat)
+    old = get_fft_backend()
+    timings = {}
+    try:
+        for name in _FFT_BACKEND_NAMES:
+            try:
+                set_fft_backend(name, nthreads=nthreads)
+            except ImportError:
+                continue
+            # Warmup to build plans.
+            mesh.fft_g2r(mesh.fft_r2g(fr))
+            start = time.time()
+            for i in range(nreps):
+                mesh.fft_g2r(mesh.fft_r2g(fr))
+            timings[name] = (time.time() - start) / nreps
+    finally:
+        set_fft_backend(**old)
+
+    if verbose:
+        print("FFT benchmark: shape: %s, ndat: %d, nthreads: %d" % (str(shape), ndat, nthreads))
+        for name, t in timings.items():
+            print("%8s: %.4f (s), speedup wrt numpy: %.2f" % (name, t, timings["numpy"] / t))
+
+    return timings
+
+
 class Mesh3D(object):
     r"""
     Descriptor-class for uniform 3D meshes.
@@ -41,6 +155,9 @@ class Mesh3D(object):
            0-----4      +-----x
 
     """
+    # Maximum number of G-sphere tables cached by get_sphere_table.
+    max_sphere_tables = 8
+
     def __init__(self, shape, vectors):
         """
         Construct ``Mesh3D`` object.
@@ -192,57 +309,116 @@ class Mesh3D(object):
         #shape = extra_dims + self.shape)
         return np.reshape(arr, (-1,) + self.shape)
 
-    def fft_r2g(self, fr, shift_fg=False):
+    def __getstate__(self):
+        # FFT plans and tables are not pickled.
+        d = self.__dict__.copy()
+        d.pop("_fft_plans", None)
+        d.pop("_sphere_tables", None)
+        return d
+
+    def _get_fft_plan(self, kind, shape, dtype, axes, overwrite=False):
+        """
+        Return function performing the FFT with the current backend.
+        Plans are cached in the mesh so that they can be reused when
+        transforms of arrays with the same shape are performed.
+        """
+        backend, nthreads = _FFT_BACKEND["name"], _FFT_BACKEND["nthreads"]
+        key = (backend, nthreads, kind, tuple(shape), np.dtype(dtype).str, tuple(axes), overwrite)
+        plans = self.__dict__.setdefault("_fft_plans", {})
+        if key not in plans:
+            plans[key] = _build_fft_plan(backend, nthreads, kind, tuple(shape), dtype, tuple(axes), overwrite)
+        return plans[key]
+
+    def fft_r2g(self, fr, shift_fg=False, overwrite=False):
         """
         FFT of array ``fr`` given in real space.
+        Arrays with ndim > 3 are transformed in a single batched call along the last three axes.
+        If ``overwrite``, the backend is allowed to destroy the input array.
         """
         ndim, shape = fr.ndim, fr.shape
 
         if ndim == 1:
             fr = np.reshape(fr, self.shape)
-            return self.fft_r2g(fr, shift_fg=shift_fg).flatten()
+            return self.fft_r2g(fr, shift_fg=shift_fg, overwrite=overwrite).flatten()
 
-        elif ndim == 3:
+        elif ndim >= 3:
             assert self.size == np.prod(shape[-3:])
-            fg = fftn(fr)
-            if shift_fg: fg = fftshift(fg)
-
-        elif ndim > 3:
-            assert self.size == np.prod(shape[-3:])
-            axes = np.arange(ndim)[-3:]
-            fg = fftn(fr, axes=axes)
+            axes = tuple(range(ndim))[-3:]
+            fg = self._get_fft_plan("fftn", shape, fr.dtype, axes, overwrite=overwrite)(fr)
             if shift_fg: fg = fftshift(fg, axes=axes)
 
         else:
             raise NotImplementedError("ndim < 3 are not supported")
 
-        return fg / self.size
+        fg /= self.size
+        return fg
 
-    def fft_g2r(self, fg, fg_ishifted=False):
+    def fft_g2r(self, fg, fg_ishifted=False, overwrite=False):
         """
         FFT of array ``fg`` given in G-space.
+        Arrays with ndim > 3 are transformed in a single batched call along the last three axes.
+        If ``overwrite``, the backend is allowed to destroy the input array.
         """
         ndim, shape = fg.ndim, fg.shape
 
         if ndim == 1:
             fg = np.reshape(fg, self.shape)
-            return self.fft_g2r(fg, fg_ishifted=fg_ishifted).flatten()
+            return self.fft_g2r(fg, fg_ishifted=fg_ishifted, overwrite=overwrite).flatten()
 
-        if ndim == 3:
+        if ndim >= 3:
             assert self.size == np.prod(shape[-3:])
-            if fg_ishifted: fg = ifftshift(fg)
-            fr = ifftn(fg)
+            axes = tuple(range(ndim))[-3:]
+            if fg_ishifted: fg = ifftshift(fg, axes=axes)
+            fr = self._get_fft_plan("ifftn", shape, fg.dtype, axes, overwrite=overwrite)(fg)
 
-        elif ndim > 3:
+        else:
+            raise NotImplementedError("ndim < 3 are not supported")
+
+        fr *= self.size
+        return fr
+
+    def rfft_r2g(self, fr, overwrite=False):
+        """
+        Real-to-complex FFT of the real array ``fr`` given in real space.
+        Only the non-negative frequencies along z are returned i.e. the shape
+        of the output is (..., nx, ny, nz // 2 + 1). Use ``rfft_g2r`` to go back to real space.
+        As in ``fft_r2g``, the output has the same rank as the input (1D arrays are flattened).
+        """
+        if np.iscomplexobj(fr):
+            raise TypeError("rfft_r2g requires a real array, received %s" % fr.dtype)
+        ndim, shape = fr.ndim, fr.shape
+
+        if ndim == 1:
+            fr = np.reshape(fr, self.shape)
+            return self.rfft_r2g(fr, overwrite=overwrite).flatten()
+
+        elif ndim >= 3:
             assert self.size == np.prod(shape[-3:])
-            axes = np.arange(ndim)[-3:]
-            if fg_ishifted: fg = ifftshift(fg, axes=axes)
-            fr = ifftn(fg, axes=axes)
+            axes = tuple(range(ndim))[-3:]
+            fg = self._get_fft_plan("rfftn", shape, fr.dtype, axes, overwrite=overwrite)(fr)
 
         else:
             raise NotImplementedError("ndim < 3 are not supported")
 
-        return fr * self.size
+        fg /= self.size
+        return fg
+
+    def rfft_g2r(self, fg, overwrite=False):
+        """
+        Complex-to-real FFT of the array ``fg`` in the half-complex format produced by ``rfft_r2g``.
+        Return real array with shape (..., nx, ny, nz) (flattened if ``fg`` is 1D).
+        """
+        half_shape = (self.nx, self.ny, self.nz // 2 + 1)
+        if fg.ndim == 1:
+            fg = np.reshape(fg, half_shape)
+            return self.rfft_g2r(fg, overwrite=overwrite).flatten()
+
+        assert fg.shape[-3:] == half_shape
+        axes = tuple(range(fg.ndim))[-3:]
+        out_shape = fg.shape[:-3] + self.shape
+        fr = self._get_fft_plan("irfftn", out_shape, fg.dtype, axes, overwrite=overwrite)(fg)
+        fr *= self.size
+        return fr
 
     #def fourier_interp(self, data, new_mesh, inspace="r"):
     #    """
@@ -448,6 +624,76 @@ class Mesh3D(object):
         # iz = int(np.rint(coords[2]*self.nz))
         # return (ix, iy, iz)
 
+    def _sphere_offsets(self, radius):
+        """
+        Return [noff, 3] |numpy-array| with the integer offsets of all the gridpoints
+        that may fall inside a sphere of given radius centered on one gridpoint.
+        """
+        maxdiag = max([np.linalg.norm(self.dvx+self.dvy+self.dvz),
+                       np.linalg.norm(self.dvx+self.dvy-self.dvz),
+                       np.linalg.norm(self.dvx-self.dvy+self.dvz),
+                       np.linalg.norm(self.dvx-self.dvy-self.dvz)])
+        c_ab = np.cross(self.dvx, self.dvy)
+        c_bc = np.cross(self.dvy, self.dvz)
+        c_ca = np.cross(self.dvz, self.dvx)
+        h_ab = np.abs(np.dot(c_ab, self.dvz) / np.linalg.norm(c_ab))
+        h_bc = np.abs(np.dot(c_bc, self.dvx) / np.linalg.norm(c_bc))
+        h_ca = np.abs(np.dot(c_ca, self.dvy) / np.linalg.norm(c_ca))
+        factors = 1.01 * (radius + 0.5 * maxdiag) / np.array([h_bc, h_ca, h_ab])
+        mins = np.floor(-factors).astype(int)
+        maxes = np.ceil(factors).astype(int)
+
+        grids = np.meshgrid(*[np.arange(mins[i], maxes[i]) for i in range(3)], indexing="ij")
+        return np.stack([g.ravel() for g in grids], axis=-1)
+
+    def get_sphere_table(self, points, radius):
+        """
+        Build the table with all the gridpoints located inside the spheres
+        centered on ``points`` (cartesian coordinates) with the given ``radius``.
+        The computation is vectorized over the gridpoints and the table
+        is cached so that it can be reused for fields defined on the same mesh.
+        At most ``max_sphere_tables`` tables are kept (least recently used are discarded).
+
+        Return: |AttrDict| with the following entries:
+
+            ipoint: Index of the sphere for each entry of the table.
+            ifft: Index of the gridpoint in the (flattened) FFT box.
+            dist: Distance between the gridpoint and the center of the sphere.
+
+        Entries are sorted by ``ipoint``.
+        """
+        points = np.reshape(points, (-1, 3))
+        key = (float(radius), points.tobytes())
+        cache = self.__dict__.setdefault("_sphere_tables", OrderedDict())
+        if key in cache:
+            cache[key] = table = cache.pop(key)
+            return table
+
+        offsets = self._sphere_offsets(radius)
+        dvecs = np.array([self.dvx, self.dvy, self.dvz])
+        nxyz = np.array(self.shape)
+        closest = np.rint(np.dot(points, self.inv_vectors) * nxyz).astype(int)
+
+        ipoint_list, ifft_list, dist_list = [], [], []
+        for ipoint, (pp, cc) in enumerate(zip(points, closest)):
+            ixyz = cc + offsets
+            dist = np.linalg.norm(np.dot(ixyz, dvecs) - pp, axis=1)
+            mask = dist <= radius
+            ixyz = np.mod(ixyz[mask], nxyz)
+            ifft_list.append(np.ravel_multi_index(ixyz.T, self.shape))
+            dist_list.append(dist[mask])
+            ipoint_list.append(np.full(len(dist_list[-1]), ipoint, dtype=int))
+
+        from monty.collections import AttrDict
+        table = AttrDict(radius=float(radius),
+                         ipoint=np.concatenate(ipoint_list),
+                         ifft=np.concatenate(ifft_list),
+                         dist=np.concatenate(dist_list))
+        while cache and len(cache) >= self.max_sphere_tables:
+            cache.popitem(last=False)
+        cache[key] = table
+        return table
+
     # @DW TODO Add test.
     def dist_gridpoints_in_spheres(self, points, radius):
         # c_ab = np.cross(self.vectors[0], self.vectors[1])
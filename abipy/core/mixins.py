@@ -8,7 +8,9 @@ import six
 import collections
 import tempfile
 import pickle
+import threading
 
+from contextlib import contextmanager
 from time import ctime
 import numpy as np
 from monty.os.path import which
@@ -26,8 +28,42 @@ __all__ = [
     "Has_PhononBands",
     "NotebookWriter",
     "Has_Header",
+    "lazy_open",
+    "is_lazy_open",
 ]
 
+
+_LAZY_OPEN = threading.local()
+
+
+def is_lazy_open():
+    """
+    True if we are inside a :func:`lazy_open` context i.e. if the constructors
+    of the :class:`AbinitNcFile` subclasses should read only dimensions and header variables.
+    """
+    return getattr(_LAZY_OPEN, "value", False)
+
+
+@contextmanager
+def lazy_open(lazy=True):
+    """
+    Context manager used to open files in lazy mode. Example::
+
+        with lazy_open():
+            gsr = GsrFile("out_GSR.nc")
+
+        # Structure and energy are read here, ebands are not loaded.
+        print(gsr.structure.get_space_group_info(), gsr.energy)
+
+    The flag is thread-local so that files opened in other threads are not affected.
+    """
+    old = is_lazy_open()
+    _LAZY_OPEN.value = bool(lazy)
+    try:
+        yield
+    finally:
+        _LAZY_OPEN.value = old
+
 @six.add_metaclass(abc.ABCMeta)
 class BaseFile(object):
     """
@@ -156,6 +192,23 @@ class AbinitNcFile(BaseFile):
         """String with abinit version: three digits separated by comma."""
         return self.reader.rootgrp.getncattr("abinit_version")
 
+    def get_read_report(self, sortby="time"):
+        """
+        Return |pandas-DataFrame| with the variables read from file so far,
+        the number of reads, the wall-time in seconds and the number of bytes.
+
+        Args:
+            sortby: Name of the column used to sort the rows (descending order). None to disable sorting.
+        """
+        import pandas as pd
+        stats = getattr(self.reader, "read_stats", {})
+        rows = [[k] + list(v) for k, v in stats.items()]
+        df = pd.DataFrame(rows, columns=["varname", "count", "time", "nbytes"])
+        if sortby is not None and len(df):
+            df = df.sort_values(by=sortby, ascending=False)
+
+        return df
+
     @abc.abstractproperty
     def params(self):
         """
@@ -11,6 +11,7 @@ import pickle
 import six
 import numpy as np
 import scipy
+import scipy.linalg
 import time
 
 from collections import deque, OrderedDict
@@ -75,6 +76,29 @@ def find_degs_sk(enesb, atol):
     return degs
 
 
+def average_over_degs(values, ref_eigens, atol):
+    """
+    Average ``values`` over the set of degenerate states found in ``ref_eigens``.
+
+    Args:
+        values: Array of shape [..., nsppol, nkpt, nband] e.g. interpolated values for different datasets.
+        ref_eigens: Reference energies of shape [nsppol, nkpt, nband] used to detect degeneracies.
+        atol: Absolute tolerance. See :func:`find_degs_sk`.
+
+    Return:
+        New array with the averaged values.
+    """
+    values = np.array(values)
+    nsppol, nkpt = ref_eigens.shape[:2]
+    for spin in range(nsppol):
+        for ik in range(nkpt):
+            for dgbs in find_degs_sk(ref_eigens[spin, ik], atol):
+                if len(dgbs) == 1: continue
+                values[..., spin, ik, dgbs] = values[..., spin, ik, dgbs].mean(axis=-1)[..., None]
+
+    return values
+
+
 def map_bz2ibz(structure, ibz, ngkpt, has_timrev):
     ngkpt = np.asarray(ngkpt, dtype=dp.int)
 
@@ -792,15 +816,8 @@ class ElectronInterpolator(object):
         new_nkpt = len(kfrac_coords)
         ref_eigens = np.reshape(ref_eigens, (self.nsppol, new_nkpt, self.nband))
 
-        # Interpolate eigenvales.
-        new_eigens = self.interp_kpts(kfrac_coords).eigens
-
-        # Average interpolated values over degenerates bands.
-        for spin in range(self.nsppol):
-            for ik in range(new_nkpt):
-                for dgbs in find_degs_sk(ref_eigens[spin, ik], atol):
-                    if len(dgbs) == 1: continue
-                    new_eigens[spin, ik, dgbs] = new_eigens[spin, ik, dgbs].sum() / len(dgbs)
+        # Interpolate eigenvales and average interpolated values over degenerates bands.
+        new_eigens = average_over_degs(self.interp_kpts(kfrac_coords).eigens, ref_eigens, atol)
 
         return dict2namedtuple(eigens=new_eigens, dedk=None, dedk2=None)
 
@@ -898,29 +915,32 @@ class SkwInterpolator(ElectronInterpolator):
         r2min = r2vals[1]
         inv_rhor = 1.0 / ((1.0 - c1 * r2vals / r2min) ** 2 + c2 * (r2vals / r2min) ** 3)
 
+        # Filter high-frequency.
+        self.rcut, self.rsigma = None, None
+        self._rfilter = None
+        if filter_params is not None:
+            self.rcut = filter_params[0] * np.sqrt(r2vals[-1])
+            self.rsigma = rsigma = filter_params[1]
+            if self.verbose:
+                print("Applying filter (Eq 9 of PhysRevB.61.1639) with rcut:", self.rcut, ", rsigma", self.rsigma)
+            from scipy.special import erfc
+            self._rfilter = 0.5 * erfc((np.sqrt(r2vals) - self.rcut) / self.rsigma)
+
         # Construct star functions for the ab-initio k-points.
-        nsppol, nband, nkpt, nr = self.nsppol, self.nband, self.nkpt, self.nr
-        self.skr = np.empty((nkpt, nr), dtype=np.complex)
-        for ik, kpt in enumerate(kpts):
-            self.skr[ik] = self.get_stark(kpt)
+        nsppol, nband, nkpt = self.nsppol, self.nband, self.nkpt
+        self.kpts = np.reshape(kpts, (nkpt, 3))
+        # S R for all the operations of the point group so that S^t k . R = k . S R
+        self._srpts = np.matmul(self.ptg_symrel, self.rpts.T).transpose(0, 2, 1).copy()
+        self.skr = self.get_stark_kpts(self.kpts)
 
         # Build H(k,k') matrix (Hermitian)
-        hmat = np.empty((nkpt-1, nkpt-1), dtype=np.complex)
-        for jk in range(nkpt-1):
-            v_jkr = self.skr[jk, 1:] - self.skr[nkpt-1, 1:]
-            #for ik in range(jk + 1):
-            for ik in range(nkpt-1):
-                v_ikr = inv_rhor[1:] * (self.skr[ik, 1:] - self.skr[nkpt-1, 1:])
-                hmat[ik, jk] = np.vdot(v_jkr, v_ikr)
-                if ik == jk: hmat[ik, jk] = hmat[ik, jk].real
-
-        # Solving system of linear equations to get lambda coeffients (eq. 10 of PRB 38 2721)..."
-        de_kbs = np.empty((nkpt-1, nband, nsppol), dtype=np.complex)
-        for spin in range(nsppol):
-            for ib in range(nband):
-                de_kbs[:, ib, spin] = eigens[spin, 0:nkpt-1, ib] - eigens[spin, nkpt-1, ib]
-
-        # Solve all bands and spins at once
+        self._inv_rhor = inv_rhor
+        self._dskr = self.skr[:nkpt-1, 1:] - self.skr[nkpt-1, 1:]
+        hmat = np.matmul(self._dskr * inv_rhor[1:], self._dskr.conj().T)
+        hmat[np.diag_indices(nkpt-1)] = hmat.diagonal().real
+
+        # The LU factorization depends only on the k-points, the lattice and the symmetries.
+        # It is computed once and used to solve eq. 10 of PRB 38 2721 for any set of data, see get_coefs.
         # FIXME: Portability problem with scipy 0.19 in which linalg.solve wraps the expert drivers
         # http://scipy.github.io/devdocs/release.0.19.0.html#foreign-function-interface-improvements
         if scipy.__version__ == "0.19.0":
@@ -928,39 +948,17 @@ class SkwInterpolator(ElectronInterpolator):
             warnings.warn("linalg.solve in scipy 0.19.0 gives weird results. Use at your own risk!!!")
 
         try:
-            lmb_kbs = scipy.linalg.solve(hmat, np.reshape(de_kbs, (-1, nband * nsppol)))
-            #lmb_kbs = scipy.linalg.solve(hmat, np.reshape(de_kbs, (-1, nband * nsppol)),
-                    #sym_pos=True, lower=False, overwrite_a=True, overwrite_b=True, check_finite=False)
-                    #sym_pos=False, lower=False, overwrite_a=False, overwrite_b=False, check_finite=True)
+            self._hmat_lu = scipy.linalg.lu_factor(hmat, check_finite=True)
+            if np.any(np.diagonal(self._hmat_lu[0]) == 0):
+                raise scipy.linalg.LinAlgError("Singular matrix")
 
         except scipy.linalg.LinAlgError as exc:
             print("Cannot solve system of linear equations to get lambda coeffients (eq. 10 of PRB 38 2721)")
             print("This usually happens when there are symmetrical k-points passed to the interpolator.")
             raise exc
 
-        lmb_kbs = np.reshape(lmb_kbs, (-1, nband, nsppol))
-
-        # Compute coefficients.
-        self.coefs = np.empty((nsppol, nband, nr), dtype=np.complex)
-        for spin in range(nsppol):
-            for ib in range(nband):
-                for ir in range(1, nr):
-                    self.coefs[spin, ib, ir] = inv_rhor[ir] \
-                        * np.vdot(self.skr[:nkpt-1, ir] - self.skr[nkpt-1, ir], lmb_kbs[:nkpt-1, ib, spin])
-
-                self.coefs[spin, ib, 0] = eigens[spin, nkpt-1, ib] \
-                    - np.dot(self.coefs[spin, ib, 1:nr], self.skr[nkpt-1, 1:nr])
-
-        # Filter high-frequency.
-        self.rcut, self.rsigma = None, None
-        if filter_params is not None:
-            self.rcut = filter_params[0] * np.sqrt(r2vals[-1])
-            self.rsigma = rsigma = filter_params[1]
-            if self.verbose:
-                print("Applying filter (Eq 9 of PhysRevB.61.1639) with rcut:", rcut, ", rsigma", self.rsigma)
-            from scipy.special import erfc
-            for ir in range(1, nr):
-                self.coefs[:, :, ir] *= 0.5 * erfc((np.sqrt(r2vals[ir]) - self.rcut) / self.rsigma)
+        # Compute coefficients for all bands and spins at once.
+        self.coefs = self.get_coefs(eigens)
 
         # Prepare workspace arrays for star functions.
         self.cached_kpt = np.ones(3) * np.inf
@@ -968,19 +966,22 @@ class SkwInterpolator(ElectronInterpolator):
         self.cached_kpt_dk2 = np.ones(3) * np.inf
 
         # Compare ab-initio data with interpolated results.
-        mae = 0.0
-        for spin in range(nsppol):
-            for ik, kpt in enumerate(kpts):
-                skw_eb = self.eval_sk(spin, kpt)
-                mae += np.abs(eigens[spin, ik] - skw_eb).sum()
-                if self.verbose >= 10:
-                    # print interpolated eigenvales
-                    for band in range(self.nband):
-                        e0 = eigens[spin, ik, band]
-                        eskw = skw_eb[band]
-                        print("spin", spin, "band", band, "ikpt", ik, "e0", e0, "eskw", eskw, "diff", e0 - eskw)
+        skw_eigens = self.eval_coefs(self.kpts, self.coefs, real=not self.iscomplexobj)
+        if self.verbose >= 10:
+            # print interpolated eigenvales
+            for spin, ik, band in itertools.product(range(nsppol), range(nkpt), range(nband)):
+                e0, eskw = eigens[spin, ik, band], skw_eigens[spin, ik, band]
+                print("spin", spin, "band", band, "ikpt", ik, "e0", e0, "eskw", eskw, "diff", e0 - eskw)
 
-        mae *= 1e3 / (nsppol * nkpt * nband)
+        self.mae = self._check_mae(eigens, skw_eigens)
+
+    @staticmethod
+    def _check_mae(data, skw_data):
+        """
+        Compute the mean absolute error (meV) between the ab-initio data and the interpolated values.
+        Raise RuntimeError if the interpolation failed, print warning if the error is large.
+        """
+        mae = np.abs(data - skw_data).mean() * 1e3
         if np.isnan(mae) or np.isinf(mae) or mae > 1000:
             raise RuntimeError("Interpolation went bananas! mae = %s" % mae)
 
@@ -991,7 +992,87 @@ class SkwInterpolator(ElectronInterpolator):
             cprint("Large error in SKW interpolation!", "red")
             cprint("MAE:", mae, "[meV]", "red")
 
-        self.mae = mae
+        return mae
+
+    def get_coefs(self, data):
+        """
+        Compute the SKW coefficients for data given on the ab-initio k-points of the interpolator.
+        The star functions and the factorization of H(k,k') are computed in the constructor
+        so that many datasets (e.g. bands, temperatures, real and imaginary parts) are fitted
+        by solving a single linear system with multiple right-hand sides.
+
+        Args:
+            data: numpy array of shape [..., nkpt, nband] e.g. [nsppol, nkpt, nband] or [ndata, nsppol, nkpt, nband].
+
+        Return:
+            Complex array of shape [..., nband, nr]
+        """
+        data = np.asarray(data)
+        if data.ndim < 2 or data.shape[-2] != self.nkpt:
+            raise ValueError("data should have shape [..., %d, nband] but got array of shape: %s" %
+                (self.nkpt, data.shape))
+        nkpt, shape = self.nkpt, data.shape[:-2] + data.shape[-1:]
+
+        # [nkpt, ndata] matrix with all the right-hand sides.
+        rhs = np.reshape(np.moveaxis(data, -2, 0), (nkpt, -1)).astype(np.complex)
+        lmb = scipy.linalg.lu_solve(self._hmat_lu, rhs[:nkpt-1] - rhs[nkpt-1])
+
+        coefs = np.empty((self.nr, rhs.shape[1]), dtype=np.complex)
+        coefs[1:] = self._inv_rhor[1:, None] * np.matmul(self._dskr.conj().T, lmb)
+        coefs[0] = rhs[nkpt-1] - np.matmul(self.skr[nkpt-1, 1:], coefs[1:])
+        if self._rfilter is not None:
+            coefs[1:] *= self._rfilter[1:, None]
+
+        return np.moveaxis(np.reshape(coefs, (self.nr,) + shape), 0, -1)
+
+    def eval_coefs(self, kfrac_coords, coefs, real=True):
+        """
+        Evaluate the interpolants defined by ``coefs`` on a set of k-points with a single matrix product.
+
+        Args:
+            kfrac_coords: K-points in reduced coordinates.
+            coefs: Array of shape [..., nband, nr] (see get_coefs).
+            real: True if the real part should be returned (real input data).
+
+        Return:
+            Array of shape [..., len(kfrac_coords), nband]
+        """
+        values = np.swapaxes(np.matmul(coefs, self.get_stark_kpts(kfrac_coords).T), -1, -2)
+        return values.real if real else values
+
+    def new_with_data(self, data, coefs=None):
+        """
+        Return new interpolator for ``data`` [nsppol, nkpt, nband] given on the same ab-initio k-points.
+        The star functions and the factorization of H(k,k') are shared with self.
+        ``coefs`` can be used to pass the coefficients already computed with get_coefs.
+        """
+        import copy
+        new = copy.copy(self)
+        # Remove the results cached by self and reset the workspace arrays.
+        new.__dict__.pop("_cached_eigens", None)
+        new.__dict__.pop("_cached_edos", None)
+        new.cached_kpt = np.ones(3) * np.inf
+        new.cached_kpt_dk1 = np.ones(3) * np.inf
+        new.cached_kpt_dk2 = np.ones(3) * np.inf
+
+        data = np.atleast_3d(data)
+        new.iscomplexobj = np.iscomplexobj(data)
+        new.nsppol, _, new.nband = data.shape
+        new.coefs = self.get_coefs(data) if coefs is None else coefs
+        new.mae = new._check_mae(data, new.eval_coefs(self.kpts, new.coefs, real=not new.iscomplexobj))
+        return new
+
+    def interp_kpts(self, kfrac_coords, dk1=False, dk2=False):
+        """
+        Interpolate energies on an arbitrary set of k-points. Optionally, compute
+        gradients and Hessian matrices. Energies are computed for all the k-points with a single matrix product.
+        See :meth:`ElectronInterpolator.interp_kpts`
+        """
+        if dk1 or dk2:
+            return super(SkwInterpolator, self).interp_kpts(kfrac_coords, dk1=dk1, dk2=dk2)
+
+        eigens = self.eval_coefs(kfrac_coords, self.coefs, real=not self.iscomplexobj)
+        return dict2namedtuple(eigens=eigens, dedk=None, dedk2=None)
 
     def __str__(self):
         return self.to_string()
@@ -1101,13 +1182,29 @@ class SkwInterpolator(ElectronInterpolator):
         Return:
             complex array of shape [self.nr]
         """
-        two_pi = 2.0 * np.pi
-        skr = np.zeros(self.nr, dtype=np.complex)
-        _np_exp = np.exp
-        for omat in self.ptg_symrel:
-            sk = two_pi * np.matmul(omat.T, kpt)
-            skr += _np_exp(1.j * np.matmul(self.rpts, sk))
-        skr /= self.ptg_nsym
+        return self.get_stark_kpts(kpt)[0]
+
+    def get_stark_kpts(self, kfrac_coords, max_mem_mb=64):
+        """
+        Return the star functions for a set of k-points.
+
+        Args:
+            kfrac_coords: K-points in reduced coordinates.
+            max_mem_mb: Maximum memory (Mb) used for the phases of the symmetrized R-points.
+
+        Return:
+            complex array of shape [len(kfrac_coords), self.nr]
+        """
+        kfrac_coords = np.reshape(kfrac_coords, (-1, 3))
+        nk, nsym, nr = len(kfrac_coords), self.ptg_nsym, self.nr
+        srpts = np.reshape(self._srpts, (nsym * nr, 3)).T
+        skr = np.empty((nk, nr), dtype=np.complex)
+
+        chunk = max(1, int(max_mem_mb * 2**20 / (16 * nsym * nr)))
+        for start in range(0, nk, chunk):
+            stop = min(start + chunk, nk)
+            phases = np.exp((2j * np.pi) * np.matmul(kfrac_coords[start:stop], srpts))
+            skr[start:stop] = np.reshape(phases, (stop - start, nsym, nr)).mean(axis=1)
 
         return skr
 
@@ -1019,7 +1019,7 @@ class Structure(pymatgen.Structure, NotebookWriter):
         from abipy.abio import factories
         gsinp = factories.gs_input(self, HGH_TABLE, spin_mode="unpolarized")
         gsinp["chkprim"] = 0
-        d = gsinp.abiget_spacegroup(tolsym=tolsym, retdict=True)
+        d = gsinp.abiget_spacegroup(tolsym=tolsym, retdict=True, use_abinit=True)
         if pre: d = {pre + k: v for k, v in d.items()}
         return d
 
@@ -1225,8 +1225,10 @@ class Structure(pymatgen.Structure, NotebookWriter):
         spglib_symbol, spglib_number, spglib_lattice_type = None, None, None
         if with_spglib:
             try:
-                spglib_symbol, spglib_number = self.get_space_group_info(symprec=symprec, angle_tolerance=angle_tolerance)
-                spglib_lattice_type = self.spget_lattice_type(symprec=symprec, angle_tolerance=angle_tolerance)
+                # A single spglib analysis is used for symbol, number and lattice type.
+                spgan = SpacegroupAnalyzer(self, symprec=symprec, angle_tolerance=angle_tolerance)
+                spglib_symbol, spglib_number = spgan.get_space_group_symbol(), spgan.get_space_group_number()
+                spglib_lattice_type = spgan.get_lattice_type()
             except Exception as exc:
                 cprint("Spglib couldn't find space group symbol and number for composition %s" % str(self.composition), "red")
                 print("Exception:\n", exc)
@@ -0,0 +1,25 @@
+"""Tests for the abipy.core package."""
+from __future__ import print_function, division, unicode_literals, absolute_import
+
+import importlib
+import abipy.core as core
+
+from abipy.core.testing import AbipyTest
+
+
+class TestCorePackage(AbipyTest):
+    """Unit tests for the lazy attributes of abipy.core"""
+
+    def test_lazy_names(self):
+        """Testing lazy names exported by abipy.core"""
+        # The table of names must be consistent with the __all__ of the submodules.
+        for modname, names in core._SUBMODULE_NAMES:
+            module = importlib.import_module("abipy.core." + modname)
+            assert names == list(module.__all__)
+            for name in names:
+                assert getattr(core, name) is getattr(module, name)
+
+        # Submodules are accessible as attributes.
+        assert core.func1d is importlib.import_module("abipy.core.func1d")
+        with self.assertRaises(AttributeError):
+            core.foobar_does_not_exist
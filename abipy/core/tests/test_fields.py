@@ -134,6 +134,12 @@ class TestScalarField(AbipyTest):
         self.assert_almost_equal(df["rsph_ang"].values, 2 * [1.11])
         df = si_den.integrate_in_spheres(rcut_symbol=2, out=False)
 
+        hist = si_den.get_radial_histograms(rmax=2, nbins=40)
+        assert hist.hist.shape == (2, 1, 40) and len(hist.edges) == 41
+        assert hist.symbols == ["Si", "Si"]
+        self.assert_almost_equal(hist.cumint[..., -1], hist.hist.sum(axis=-1))
+        assert np.all(hist.cumint[..., -1] < ne)
+
         if self.has_matplotlib():
             assert si_den.plot_line(0, 1, num=1000, show=False)
             assert si_den.plot_line([0, 0, 0], [1, 0, 0], num=1000, cartesian=True, show=False)
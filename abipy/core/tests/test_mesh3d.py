@@ -79,6 +79,26 @@ class TestMesh3D(AbipyTest):
                     r += shift
                     self.assert_equal(mesh_443.i_closest_gridpoints(r), [[ix, iy, iz]])
 
+    def test_sphere_table(self):
+        """Testing gridpoints in spheres"""
+        rprimd = np.reshape([0, 2., 2, 2, 0, 2, 2, 2, 0], (3, 3))
+        mesh = Mesh3D((15, 15, 15), rprimd)
+        points = np.array([[0, 0, 0], [1, 1, 1.]])
+        table = mesh.get_sphere_table(points, radius=1.3)
+        assert mesh.get_sphere_table(points, radius=1.3) is table
+        assert np.all(table.dist <= 1.3)
+
+        # The cache is bounded and the most recently used table survives.
+        for i in range(2 * mesh.max_sphere_tables):
+            mesh.get_sphere_table(points, radius=0.5 + 0.05 * i)
+            assert mesh.get_sphere_table(points, radius=1.3) is table
+        assert len(mesh._sphere_tables) == mesh.max_sphere_tables
+
+        ref = mesh.dist_gridpoints_in_spheres(points, radius=1.3)
+        for ipoint in range(len(points)):
+            ref_ifft = sorted(np.ravel_multi_index(t[0], mesh.shape) for t in ref[ipoint])
+            self.assert_equal(np.sort(table.ifft[table.ipoint == ipoint]), ref_ifft)
+
     def test_fft(self):
         """Test FFT transforms with mesh3d"""
         rprimd = np.array([1.,0,0, 0,1,0, 0,0,1])
@@ -100,6 +120,42 @@ class TestMesh3D(AbipyTest):
                 int_g = fg[..., 0, 0, 0]
                 self.assert_almost_equal(int_r, int_g)
 
+    def test_fft_backends(self):
+        """Test FFT backends and real-to-complex transforms with mesh3d"""
+        mesh = Mesh3D((12, 3, 5), np.eye(3))
+        with self.assertRaises(ValueError):
+            set_fft_backend("foo")
+
+        old = get_fft_backend()
+        assert old["name"] == "numpy"
+        try:
+            for name in ("numpy", "scipy"):
+                set_fft_backend(name, nthreads=2)
+                assert get_fft_backend()["name"] == name
+                for exdim in [(), 1, (3, 1)]:
+                    fg = mesh.crandom(extra_dims=exdim)
+                    self.assert_almost_equal(mesh.fft_r2g(mesh.fft_g2r(fg)), fg)
+                    fr = mesh.random(extra_dims=exdim)
+                    half_fg = mesh.rfft_r2g(fr)
+                    assert half_fg.shape[-3:] == (12, 3, 3)
+                    self.assert_almost_equal(half_fg, mesh.fft_r2g(fr)[..., :3])
+                    self.assert_almost_equal(mesh.rfft_g2r(half_fg), fr)
+                # rfft_r2g has the same shape contract as fft_r2g.
+                fr = mesh.random(extra_dims=())
+                assert mesh.rfft_r2g(fr).ndim == 3
+                flat_fg = mesh.rfft_r2g(fr.flatten())
+                assert flat_fg.shape == (12 * 3 * 3,)
+                self.assert_almost_equal(flat_fg, mesh.rfft_r2g(fr).flatten())
+                self.assert_almost_equal(mesh.rfft_g2r(flat_fg), fr.flatten())
+                with self.assertRaises(NotImplementedError):
+                    mesh.rfft_r2g(np.reshape(fr, (12, 15)))
+        finally:
+            set_fft_backend(**old)
+
+        self.serialize_with_pickle(mesh)
+        timings = benchmark_fft_backends(shape=(8, 8, 8), ndat=2, nreps=1, verbose=0)
+        assert "numpy" in timings
+
     #def test_trilinear_interp(self):
     #    rprimd = np.array([1.,0,0, 0,1,0, 0,0,1])
     #    rprimd.shape = (3,3)
@@ -62,9 +62,25 @@ class TestSkwInterpolator(AbipyTest):
         #res12 = skw.interp_kpts(new_kcoords, dk1=True, dk2=True)
         #print(res12.dedk2)
 
+        # Fit multiple datasets with the same factorization.
+        data = np.array([ebands.eigens, 2 * ebands.eigens + 1])
+        coefs = skw.get_coefs(data)
+        assert coefs.shape == (2, skw.nsppol, skw.nband, skw.nr)
+        self.assert_almost_equal(coefs[0], skw.coefs)
+        values = skw.eval_coefs(new_kcoords, coefs)
+        assert values.shape == (2, skw.nsppol, len(new_kcoords), skw.nband)
+        self.assert_almost_equal(values[0], new_eigens)
+        self.assert_almost_equal(values[1], 2 * new_eigens + 1)
+        new_skw = skw.new_with_data(data[1], coefs=coefs[1])
+        self.assert_almost_equal(new_skw.interp_kpts(new_kcoords).eigens, values[1])
+        assert new_skw.nr == skw.nr and new_skw.mae < 1e-6
+
         # Test interpolation routines (high-level API).
         edos = skw.get_edos(kmesh, is_shift=None, method="gaussian", step=0.1, width=0.2, wmesh=None)
         jdos = skw.get_jdos_q0(kmesh, is_shift=None, method="gaussian", step=0.1, width=0.2, wmesh=None)
+        # The new interpolator must not share the caches of the parent.
+        new_skw = skw.new_with_data(data[1], coefs=coefs[1])
+        assert skw._cached_eigens and "_cached_eigens" not in new_skw.__dict__
         #nest = skw.get_nesting_at_e0(qpoints, kmesh, e0, width=0.2, is_shift=None)
 
         # Test pickle
@@ -2100,7 +2100,7 @@ class DdbRobot(Robot):
     #    return retcode, results
 
     def get_dataframe_at_qpoint(self, qpoint=None, units="eV", asr=2, chneut=1, dipdip=1,
-	    with_geo=True, with_spglib=True, abspath=False, funcs=None):
+	    with_geo=True, with_spglib=True, abspath=False, funcs=None, columns=None):
         """
 	Call anaddb to compute the phonon frequencies at a single q-point using the DDB files treated
 	by the robot and the given anaddb input arguments. LO-TO splitting is not included.
@@ -2117,6 +2117,10 @@ class DdbRobot(Robot):
             funcs: Function or list of functions to execute to add more data to the DataFrame.
                 Each function receives a |DdbFile| object and returns a tuple (key, value)
                 where key is a string with the name of column and value is the value to be inserted.
+                A dictionary mapping column names to functions returning the value is also accepted.
+            columns: List of column names. If not None, only these columns are computed
+                and the DataFrame columns are ordered as in ``columns``.
+                Anaddb is not invoked if no "mode" column is requested.
 
         Return:
             |pandas-DataFrame|
@@ -2130,6 +2134,8 @@ class DdbRobot(Robot):
             if any(np.any(ddb.qpoints[0] != qpoint) for ddb in self.abifiles):
                 raise ValueError("All the q-points in the DDB files must be equal")
 
+        with_modes = columns is None or any(str(c).startswith("mode") for c in columns)
+
         rows, row_names = [], []
         for i, (label, ddb) in enumerate(self.items()):
             row_names.append(label)
@@ -2137,27 +2143,31 @@ class DdbRobot(Robot):
             #d = {aname: getattr(ddb, aname) for aname in attrs}
             #d.update({"qpgap": mdf.get_qpgap(spin, kpoint)})
 
-            # Call anaddb to get the phonon frequencies. Note lo_to_splitting set to False.
-            phbands = ddb.anaget_phmodes_at_qpoint(qpoint=qpoint, asr=asr, chneut=chneut,
-               dipdip=dipdip, lo_to_splitting=False)
-            # [nq, nmodes] array
-            freqs = phbands.phfreqs[0, :] * phfactor_ev2units(units)
+            structure = ddb.structure
+            if with_modes:
+                # Call anaddb to get the phonon frequencies. Note lo_to_splitting set to False.
+                phbands = ddb.anaget_phmodes_at_qpoint(qpoint=qpoint, asr=asr, chneut=chneut,
+                   dipdip=dipdip, lo_to_splitting=False)
+                # [nq, nmodes] array
+                freqs = phbands.phfreqs[0, :] * phfactor_ev2units(units)
 
-            d.update({"mode" + str(i): freqs[i] for i in range(len(freqs))})
+                d.update({"mode" + str(i): freqs[i] for i in range(len(freqs))})
+                structure = phbands.structure
 
             # Add convergence parameters
             d.update(ddb.params)
 
-            # Add info on structure.
+            # Add info on structure (cached, spglib is called only if needed).
             if with_geo:
-                d.update(phbands.structure.get_dict4pandas(with_spglib=with_spglib))
+                d.update(self._get_geo_dict(ddb, columns=columns, with_spglib=with_spglib, structure=structure))
 
             # Execute functions.
-            if funcs is not None: d.update(self._exec_funcs(funcs, ddb))
+            if funcs is not None: d.update(self._exec_funcs(funcs, ddb, columns=columns))
             rows.append(d)
 
         row_names = row_names if not abspath else self._to_relpaths(row_names)
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        df = pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return self._project_columns(df, columns)
 
     def anaget_phonon_plotters(self, **kwargs):
         r"""
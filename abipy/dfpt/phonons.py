@@ -23,7 +23,7 @@ from pymatgen.core.periodic_table import Element
 from pymatgen.phonon.bandstructure import PhononBandStructureSymmLine
 from pymatgen.phonon.dos import CompletePhononDos as PmgCompletePhononDos, PhononDos as PmgPhononDos
 from abipy.core.func1d import Function1D
-from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_PhononBands, NotebookWriter
+from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_PhononBands, NotebookWriter, is_lazy_open
 from abipy.core.kpoints import Kpoint, Kpath
 from abipy.abio.robots import Robot
 from abipy.iotools import ETSF_Reader
@@ -1985,8 +1985,8 @@ class PhbstFile(AbinitNcFile, Has_Structure, Has_PhononBands, NotebookWriter):
         super(PhbstFile, self).__init__(filepath)
         self.reader = PHBST_Reader(filepath)
 
-        # Initialize Phonon bands and add metadata from ncfile
-        self._phbands = PhononBands.from_file(filepath)
+        # Initialize Phonon bands and add metadata from ncfile (delayed to the first access in lazy mode).
+        if not is_lazy_open(): self.phbands
 
     def __str__(self):
         return self.to_string()
@@ -2011,17 +2011,23 @@ class PhbstFile(AbinitNcFile, Has_Structure, Has_PhononBands, NotebookWriter):
     @property
     def structure(self):
         """|Structure| object"""
+        # Avoid reading the phonon bands if we only need the structure.
+        if "phbands" not in self.__dict__: return self._structure
         return self.phbands.structure
 
+    @lazy_property
+    def _structure(self):
+        return self.reader.read_structure()
+
     @property
     def qpoints(self):
         """List of q-point objects."""
         return self.phbands.qpoints
 
-    @property
+    @lazy_property
     def phbands(self):
         """|PhononBands| object"""
-        return self._phbands
+        return PhononBands.from_file(self.filepath)
 
     def close(self):
         """Close the file."""
@@ -0,0 +1,346 @@
+# coding: utf-8
+"""
+Vectorized tools to analyze molecular dynamics trajectories stored in HIST.nc files:
+partial radial distribution functions, mean square displacements, velocity autocorrelation
+functions and vibrational density of states.
+
+All the functions operate directly on the ``xred``, ``rprimd`` and ``vel`` arrays read
+in chunks of steps with ``HistReader.iter_chunks`` so that memory does not depend on
+the length of the trajectory and the computational cost scales linearly with the number of steps.
+"""
+from __future__ import print_function, division, unicode_literals, absolute_import
+
+import itertools
+import numpy as np
+import abipy.core.abinit_units as abu
+
+from monty.collections import AttrDict
+from pymatgen.core.periodic_table import Element
+
+
+__all__ = [
+    "find_pairs",
+    "compute_partial_rdfs",
+    "compute_msd",
+    "compute_vacf",
+    "compute_vdos",
+]
+
+# Default max time lag (in sampled steps) and max number of time origins kept in memory
+# by compute_msd and compute_vacf. These values do not depend on the length of the trajectory.
+DEFAULT_MAX_LAG = 1000
+MAX_ORIGINS = 100
+
+
+def cell_heights(lattice):
+    """
+    Return the distance between the opposite faces of the cell defined by the rows of ``lattice``.
+    """
+    lattice = np.asarray(lattice)
+    volume = abs(np.linalg.det(lattice))
+    return np.array([volume / np.linalg.norm(np.cross(lattice[j], lattice[k]))
+                     for j, k in ((1, 2), (2, 0), (0, 1))])
+
+
+def find_pairs(xred, lattice, rmax):
+    """
+    Find all the ordered pairs of atoms (i, j), with i != j, whose minimum-image distance is <= rmax.
+    A cell list is used if the cell can be divided in at least 3 bins along each direction,
+    all the pairs are computed otherwise.
+
+    Args:
+        xred: (natom, 3) array with reduced coordinates.
+        lattice: (3, 3) array with the lattice vectors (rows).
+        rmax: Cutoff radius in the same units as ``lattice``. Must be smaller than half the smallest height of the cell.
+
+    Return: (i, j, dist) arrays.
+    """
+    xred = np.mod(xred, 1.0)
+    natom = len(xred)
+    heights = cell_heights(lattice)
+    if rmax > 0.5 * heights.min() + 1e-8:
+        raise ValueError("rmax: %s is larger than half the smallest height of the cell: %s" % (rmax, heights.min()))
+
+    ncells = np.maximum(np.floor(heights / rmax).astype(int), 1)
+
+    if np.any(ncells < 3):
+        ii, jj = np.nonzero(~np.eye(natom, dtype=bool))
+    else:
+        # Build table (ncells_tot, maxocc) with the indices of the atoms in each bin (-1 for empty slots).
+        cidx = np.floor(xred * ncells).astype(int) % ncells
+        flat = np.ravel_multi_index(cidx.T, ncells)
+        order = np.argsort(flat, kind="mergesort")
+        counts = np.bincount(flat, minlength=np.prod(ncells))
+        starts = np.cumsum(counts) - counts
+        table = np.full((len(counts), counts.max()), -1, dtype=int)
+        table[flat[order], np.arange(natom) - starts[flat[order]]] = order
+
+        cells = np.array(np.unravel_index(np.arange(len(counts)), ncells)).T
+        ii_list, jj_list = [], []
+        for shift in itertools.product((-1, 0, 1), repeat=3):
+            neigh = np.ravel_multi_index(((cells + shift) % ncells).T, ncells)
+            ia = np.broadcast_to(table[:, :, None], (len(counts), table.shape[1], table.shape[1]))
+            ib = np.broadcast_to(table[neigh][:, None, :], ia.shape)
+            mask = (ia >= 0) & (ib >= 0) & (ia != ib)
+            ii_list.append(ia[mask])
+            jj_list.append(ib[mask])
+        ii, jj = np.concatenate(ii_list), np.concatenate(jj_list)
+
+    dred = xred[jj] - xred[ii]
+    dred -= np.rint(dred)
+    dist = np.linalg.norm(np.dot(dred, lattice), axis=-1)
+    mask = dist <= rmax
+
+    return ii[mask], jj[mask], dist[mask]
+
+
+def _get_types(reader):
+    """Return (typat, symbols) with 0-based types and chemical symbols of the types."""
+    znucl, typat = reader.znucl_typat
+    return typat - 1, [Element.from_Z(int(z)).symbol for z in znucl]
+
+
+def _get_dt_fs(reader, step):
+    """Time step in fs between two sampled steps."""
+    dtion = float(np.ravel(reader.read_value("dtion"))[0])
+    return dtion * abu.Time_Sec * 1e15 * (1 if step is None else step)
+
+
+def compute_partial_rdfs(reader, rmax=None, nbins=200, start=None, stop=None, step=None, chunksize=500):
+    """
+    Compute the partial radial distribution functions g_ab(r) averaged over the selected steps.
+
+    Args:
+        reader: :class:`HistReader` object.
+        rmax: Maximum distance in Angstrom. If None, half the smallest height of the initial cell is used.
+        nbins: Number of bins.
+        start, stop, step: Select the steps with the slice [start:stop:step].
+        chunksize: Number of steps read from file in a single call.
+
+    Return: |AttrDict| with:
+
+        rmesh: [nbins] array with the center of the bins in Angstrom.
+        rdfs: dictionary mapping the pair of symbols (a, b) to the [nbins] array with g_ab(r).
+        nsteps: Number of steps used for the average.
+    """
+    typat, symbols = _get_types(reader)
+    ntypat = len(symbols)
+    natom_type = np.bincount(typat, minlength=ntypat)
+
+    if rmax is None:
+        rprimd0 = reader.read_steps("rprimd", start=0, stop=1)[0] * abu.Bohr_Ang
+        rmax = 0.5 * cell_heights(rprimd0).min()
+
+    edges = np.linspace(0, rmax, num=nbins + 1)
+    shell_vols = 4 * np.pi / 3 * (edges[1:] ** 3 - edges[:-1] ** 3)
+    # Number of ordered pairs for each couple of types.
+    npairs = np.outer(natom_type, natom_type) - np.diag(natom_type)
+    npairs = np.where(npairs > 0, npairs, 1).ravel()
+
+    gsum = np.zeros((ntypat * ntypat, nbins))
+    nsteps = 0
+    for chunk in reader.iter_chunks(varnames=("xred", "rprimd"), chunksize=chunksize,
+                                    start=start, stop=stop, step=step):
+        for xred, rprimd in zip(chunk.xred, chunk.rprimd):
+            lattice = rprimd * abu.Bohr_Ang
+            ii, jj, dist = find_pairs(xred, lattice, rmax)
+            ibin = np.minimum((dist / rmax * nbins).astype(int), nbins - 1)
+            ipair = typat[ii] * ntypat + typat[jj]
+            hist = np.bincount(ipair * nbins + ibin, minlength=ntypat * ntypat * nbins)
+            volume = abs(np.linalg.det(lattice))
+            gsum += np.reshape(hist, (ntypat * ntypat, nbins)) * volume / (npairs[:, None] * shell_vols)
+            nsteps += 1
+
+    gsum /= max(nsteps, 1)
+    rdfs = {}
+    for ta, tb in itertools.product(range(ntypat), repeat=2):
+        rdfs[(symbols[ta], symbols[tb])] = gsum[ta * ntypat + tb]
+
+    return AttrDict(rmesh=0.5 * (edges[1:] + edges[:-1]), rdfs=rdfs, nsteps=nsteps)
+
+
+def _correlate(frames, max_lag, origin_stride, kernel):
+    """
+    Accumulate kernel(x(t0), x(t0 + lag)) for all lags <= max_lag and for time origins
+    separated by ``origin_stride`` steps. Only the data associated to the active time origins
+    is kept in memory hence the cost is linear in the number of steps.
+
+    Args:
+        frames: Iterator producing (natom, 3) arrays.
+        kernel: Function receiving the current frame and the (norigins, natom, 3) array
+            with the frames at the time origins. Must return a (norigins, natom) array.
+
+    Return: ([max_lag + 1, natom] array with the average over the time origins, [max_lag + 1] array with counts)
+    """
+    norig = max_lag // origin_stride + 1
+    origins, origin_t = None, np.full(norig, -1, dtype=int)
+    acc, counts = None, np.zeros(max_lag + 1, dtype=int)
+
+    for it, frame in enumerate(frames):
+        if origins is None:
+            origins = np.empty((norig,) + frame.shape)
+            acc = np.zeros((max_lag + 1, frame.shape[0]))
+        if it % origin_stride == 0:
+            slot = (it // origin_stride) % norig
+            origins[slot], origin_t[slot] = frame, it
+
+        lags = it - origin_t
+        active = (origin_t >= 0) & (lags <= max_lag)
+        # Lags are unique since the time origins are different.
+        acc[lags[active]] += kernel(frame, origins[active])
+        counts[lags[active]] += 1
+
+    if acc is None:
+        raise ValueError("Empty list of steps")
+
+    valid = counts > 0
+    return acc[valid] / counts[valid, None], counts[valid]
+
+
+def _get_lag_params(nsel, max_lag, origin_stride):
+    """
+    Return (max_lag, origin_stride) for a trajectory with ``nsel`` selected steps.
+    If origin_stride is None, the stride is chosen so that at most MAX_ORIGINS + 1 frames
+    are stored in the buffer of time origins used by ``_correlate``.
+    """
+    max_lag = min(DEFAULT_MAX_LAG if max_lag is None else max_lag, max(nsel - 1, 1))
+    if origin_stride is None:
+        origin_stride = max(1, -(-max_lag // MAX_ORIGINS))
+    return max_lag, origin_stride
+
+
+def _iter_unwrapped_xcart(reader, start, stop, step, chunksize):
+    """Generate the unwrapped cartesian positions in Angstrom."""
+    prev_xred, xcart = None, None
+    for chunk in reader.iter_chunks(varnames=("xred", "rprimd"), chunksize=chunksize,
+                                    start=start, stop=stop, step=step):
+        for xred, rprimd in zip(chunk.xred, chunk.rprimd):
+            lattice = rprimd * abu.Bohr_Ang
+            if prev_xred is None:
+                xcart = np.dot(xred, lattice)
+            else:
+                dred = xred - prev_xred
+                dred -= np.rint(dred)
+                xcart = xcart + np.dot(dred, lattice)
+            prev_xred = xred
+            yield xcart
+
+
+def _average_over_types(values, typat, symbols):
+    """Average the [nt, natom] array over the atoms of the same type."""
+    return {symbol: values[:, typat == itype].mean(axis=1) for itype, symbol in enumerate(symbols)
+            if np.any(typat == itype)}
+
+
+def compute_msd(reader, max_lag=None, origin_stride=None, start=None, stop=None, step=None, chunksize=500):
+    """
+    Compute the mean square displacement with multiple time origins from the unwrapped positions.
+
+    Args:
+        reader: :class:`HistReader` object.
+        max_lag: Maximum time lag in units of sampled steps. If None, DEFAULT_MAX_LAG
+            (or the number of selected steps - 1 if smaller).
+        origin_stride: Distance between two consecutive time origins in units of sampled steps.
+            If None, the stride is chosen so that at most MAX_ORIGINS + 1 frames are kept in memory.
+        start, stop, step: Select the steps with the slice [start:stop:step].
+        chunksize: Number of steps read from file in a single call.
+
+    Return: |AttrDict| with:
+
+        times: Time lags in fs.
+        msd: Total MSD in Angstrom^2.
+        msd_type: dictionary mapping the chemical symbol to the MSD averaged over the atoms of this type.
+        msd_atom: [nlags, natom] array with the MSD of each atom.
+        buffer_size: Number of time origins kept in memory.
+    """
+    nsel = len(np.arange(reader.num_steps)[start:stop:step])
+    max_lag, origin_stride = _get_lag_params(nsel, max_lag, origin_stride)
+
+    msd_atom, counts = _correlate(_iter_unwrapped_xcart(reader, start, stop, step, chunksize),
+                                  max_lag, origin_stride,
+                                  kernel=lambda cur, orig: np.sum((cur - orig) ** 2, axis=-1))
+
+    typat, symbols = _get_types(reader)
+    return AttrDict(
+        times=np.arange(len(counts)) * _get_dt_fs(reader, step),
+        msd=msd_atom.mean(axis=1),
+        msd_type=_average_over_types(msd_atom, typat, symbols),
+        msd_atom=msd_atom,
+        buffer_size=max_lag // origin_stride + 1,
+    )
+
+
+def compute_vacf(reader, max_lag=None, origin_stride=None, normalize=True, start=None, stop=None, step=None,
+                 chunksize=500):
+    """
+    Compute the velocity autocorrelation function with multiple time origins
+    from the velocities stored in the HIST file.
+
+    Args:
+        reader: :class:`HistReader` object.
+        max_lag: Maximum time lag in units of sampled steps. If None, DEFAULT_MAX_LAG
+            (or the number of selected steps - 1 if smaller).
+        origin_stride: Distance between two consecutive time origins in units of sampled steps.
+            If None, the stride is chosen so that at most MAX_ORIGINS + 1 frames are kept in memory.
+        normalize: True if the functions should be normalized to 1 at t = 0.
+        start, stop, step: Select the steps with the slice [start:stop:step].
+        chunksize: Number of steps read from file in a single call.
+
+    Return: |AttrDict| with:
+
+        times: Time lags in fs.
+        vacf: Total VACF (mass-weighted average over atoms).
+        vacf_type: dictionary mapping the chemical symbol to the VACF averaged over the atoms of this type.
+        buffer_size: Number of time origins kept in memory.
+    """
+    nsel = len(np.arange(reader.num_steps)[start:stop:step])
+    max_lag, origin_stride = _get_lag_params(nsel, max_lag, origin_stride)
+
+    def frames():
+        for chunk in reader.iter_chunks(varnames=("vel",), chunksize=chunksize, start=start, stop=stop, step=step):
+            for vel in chunk.vel:
+                yield vel
+
+    vacf_atom, counts = _correlate(frames(), max_lag, origin_stride,
+                                   kernel=lambda cur, orig: np.sum(cur * orig, axis=-1))
+
+    typat, symbols = _get_types(reader)
+    amu = np.reshape(reader.read_value("amu"), -1)[typat]
+    vacf = np.dot(vacf_atom, amu) / amu.sum()
+    vacf_type = _average_over_types(vacf_atom, typat, symbols)
+
+    if normalize:
+        vacf = vacf / vacf[0] if vacf[0] != 0 else vacf
+        vacf_type = {k: (v / v[0] if v[0] != 0 else v) for k, v in vacf_type.items()}
+
+    return AttrDict(times=np.arange(len(counts)) * _get_dt_fs(reader, step), vacf=vacf, vacf_type=vacf_type,
+                    buffer_size=max_lag // origin_stride + 1)
+
+
+def compute_vdos(times, vacf, window="hann"):
+    """
+    Compute the vibrational density of states from the Fourier transform of the velocity autocorrelation function.
+
+    Args:
+        times: Time lags in fs (equally spaced).
+        vacf: Values of the VACF.
+        window: "hann" to damp the VACF at large lags, None to use the raw data.
+
+    Return: |AttrDict| with the frequencies in THz and meV and the VDOS normalized to one.
+    """
+    vacf = np.asarray(vacf, dtype=float)
+    if window == "hann":
+        # Half Hann window, equal to 1 at t = 0 and 0 at the maximum lag.
+        vacf = vacf * np.cos(0.5 * np.pi * np.arange(len(vacf)) / len(vacf)) ** 2
+    elif window is not None:
+        raise ValueError("Invalid value for window: %s" % str(window))
+
+    # Even extension of C(t) so that the transform is real.
+    ext = np.concatenate([vacf, vacf[-2:0:-1]])
+    dt_ps = (times[1] - times[0]) * 1e-3
+    vdos = np.abs(np.fft.rfft(ext).real)
+    freqs_thz = np.fft.rfftfreq(len(ext), d=dt_ps)
+    df = freqs_thz[1] - freqs_thz[0] if len(freqs_thz) > 1 else 1.0
+    if vdos.sum() > 0: vdos /= vdos.sum() * df
+
+    return AttrDict(freqs_thz=freqs_thz, freqs_mev=freqs_thz * abu.Ha_meV / abu.Ha_THz, vdos=vdos)
@@ -81,7 +81,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
     @lazy_property
     def final_pressure(self):
         """Final pressure in Gpa."""
-        cart_stress_tensors, pressures = self.reader.read_cart_stress_tensors()
+        cart_stress_tensors, pressures = self.reader.read_cart_stress_tensors(start=-1)
         return pressures[-1]
 
     #@lazy_property
@@ -94,7 +94,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
         # [time, natom, 3]
         var = self.reader.read_variable("fcart")
         forces = units.ArrayWithUnit(var[step], "Ha bohr^-1").to("eV ang^-1")
-        fmods = np.array([np.linalg.norm(force) for force in forces])
+        fmods = np.linalg.norm(forces, axis=-1)
 
         return AttrDict(
             fmin=fmods.min(),
@@ -126,7 +126,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
         #an.get_percentage_bond_dist_changes(max_radius=3.0)
         app("")
 
-        cart_stress_tensors, pressures = self.reader.read_cart_stress_tensors()
+        cart_stress_tensors, pressures = self.reader.read_cart_stress_tensors(start=-1)
         app("Stress tensor (Cartesian coordinates in GPa):\n%s" % cart_stress_tensors[-1])
         app("Pressure: %.3f [GPa]" % pressures[-1])
 
@@ -142,20 +142,44 @@ class HistFile(AbinitNcFile, NotebookWriter):
         """Step indices."""
         return list(range(self.num_steps))
 
-    @property
+    @lazy_property
     def initial_structure(self):
         """The initial |Structure|."""
-        return self.structures[0]
+        return self.reader.read_structures(stop=1)[0]
 
-    @property
+    @lazy_property
     def final_structure(self):
         """The |Structure| of the last iteration."""
-        return self.structures[-1]
+        return self.reader.read_structures(start=-1)[0]
 
     @lazy_property
     def structures(self):
-        """List of |Structure| objects at the different steps."""
-        return self.reader.read_all_structures()
+        """
+        List of |Structure| objects at the different steps.
+
+        .. note::
+
+            This method builds a |Structure| for each step and should be avoided for long trajectories.
+            Use ``iter_structures`` or the ``reader.iter_chunks`` method to process the data in chunks.
+        """
+        structures = self.reader.read_all_structures()
+        # Reuse the objects that might have been already built.
+        structures[0], structures[-1] = self.initial_structure, self.final_structure
+        return structures
+
+    def iter_structures(self, start=None, stop=None, step=None, chunksize=1000):
+        """
+        Generate the |Structure| objects for the steps in the slice [start:stop:step].
+        Data are read from file in chunks of ``chunksize`` steps.
+        """
+        for chunk in self.reader.iter_chunks(varnames=("xred", "rprimd", "fcart"), chunksize=chunksize,
+                                             start=start, stop=stop, step=step):
+            for structure in self.reader.structures_from_chunk(chunk):
+                yield structure
+
+    def get_sampled_steps(self, sampling=1):
+        """|numpy-array| with the indices of the steps selected with stride ``sampling``."""
+        return np.arange(0, self.num_steps, sampling)
 
     @lazy_property
     def etotals(self):
@@ -181,37 +205,12 @@ class HistFile(AbinitNcFile, NotebookWriter):
         from pymatgen.io.vasp.outputs import Xdatcar
         return Xdatcar(filepath, **kwargs)
 
-    def write_xdatcar(self, filepath="XDATCAR", groupby_type=True, overwrite=False, to_unit_cell=False):
+    def _get_symbols_group_ids(self, groupby_type):
         """
-        Write Xdatcar file with unit cell and atomic positions to file ``filepath``.
-
-        Args:
-            filepath: Xdatcar filename. If None, a temporary file is created.
-            groupby_type: If True, atoms are grouped by type. Note that this option
-                may change the order of the atoms. This option is needed because
-                there are post-processing tools (e.g. ovito) that do not work as expected
-                if the atoms in the structure are not grouped by type.
-            overwrite: raise RuntimeError, if False and filepath exists.
-            to_unit_cell (bool): Whether to translate sites into the unit cell.
-
-        Return:
-            path to Xdatcar file.
+        Return the list of symbols (one per atom), the mapping symbol --> list of atom indices
+        and the permutation of the atoms used when ``groupby_type`` is True.
         """
-        if filepath is not None and os.path.exists(filepath) and not overwrite:
-            raise RuntimeError("Cannot overwrite pre-existing file `%s`" % filepath)
-        if filepath is None:
-            import tempfile
-            fd, filepath = tempfile.mkstemp(text=True, suffix="_XDATCAR")
-
-        # int typat[natom], double znucl[npsp]
-        # NB: typat is double in the HIST.nc file
-        typat = self.reader.read_value("typat").astype(int)
-        znucl = self.reader.read_value("znucl")
-        ntypat = self.reader.read_dimvalue("ntypat")
-        num_pseudos = self.reader.read_dimvalue("npsp")
-        if num_pseudos != ntypat:
-            raise NotImplementedError("Alchemical mixing is not supported, num_pseudos != ntypat")
-        #print("znucl:", znucl, "\ntypat:", typat)
+        znucl, typat = self.reader.znucl_typat
 
         symb2pos = OrderedDict()
         symbols_atom = []
@@ -230,6 +229,43 @@ class HistFile(AbinitNcFile, NotebookWriter):
                 group_ids.extend(pos_list)
             group_ids = np.array(group_ids, dtype=np.int)
 
+        return symbols_atom, symb2pos, group_ids
+
+    @staticmethod
+    def _check_filepath(filepath, overwrite, suffix):
+        """Return filepath. Create temporary file if filepath is None."""
+        if filepath is not None and os.path.exists(filepath) and not overwrite:
+            raise RuntimeError("Cannot overwrite pre-existing file `%s`" % filepath)
+        if filepath is None:
+            import tempfile
+            fd, filepath = tempfile.mkstemp(text=True, suffix=suffix)
+        return filepath
+
+    def write_xdatcar(self, filepath="XDATCAR", groupby_type=True, overwrite=False, to_unit_cell=False,
+                      chunksize=1000):
+        """
+        Write Xdatcar file with unit cell and atomic positions to file ``filepath``.
+
+        Args:
+            filepath: Xdatcar filename. If None, a temporary file is created.
+            groupby_type: If True, atoms are grouped by type. Note that this option
+                may change the order of the atoms. This option is needed because
+                there are post-processing tools (e.g. ovito) that do not work as expected
+                if the atoms in the structure are not grouped by type.
+            overwrite: raise RuntimeError, if False and filepath exists.
+            to_unit_cell (bool): Whether to translate sites into the unit cell.
+            chunksize: Number of steps read and formatted in a single block.
+
+        Return:
+            path to Xdatcar file.
+        """
+        filepath = self._check_filepath(filepath, overwrite, "_XDATCAR")
+        symbols_atom, symb2pos, group_ids = self._get_symbols_group_ids(groupby_type)
+
+        # Format string for one configuration. Step index and coordinates are formatted in a single call.
+        natom = len(group_ids)
+        frame_fmt = "Direct configuration= %d\n" + natom * "%.12f %.12f %.12f\n"
+
         comment = " %s\n" % self.initial_structure.formula
         with open(filepath, "wt") as fh:
             # comment line  + scaling factor set to 1.0
@@ -245,15 +281,58 @@ class HistFile(AbinitNcFile, NotebookWriter):
                 fh.write(" ".join(str(len(p)) for p in symb2pos.values()) + "\n")
 
             # Write atomic positions in reduced coordinates.
-            xred_list = self.reader.read_value("xred")
-            if to_unit_cell:
-                xred_list = xred_list % 1
+            for chunk in self.reader.iter_chunks(varnames=("xred",), chunksize=chunksize):
+                xred = chunk.xred[:, group_ids]
+                if to_unit_cell: xred = xred % 1
+                nframes = len(chunk.steps)
+                data = np.concatenate([chunk.steps[:, None] + 1, np.reshape(xred, (nframes, -1))], axis=1)
+                fh.write((nframes * frame_fmt) % tuple(data.ravel().tolist()))
 
-            for step in range(self.num_steps):
-                fh.write("Direct configuration= %d\n" % (step + 1))
-                frac_coords = xred_list[step, group_ids]
-                for fs in frac_coords:
-                    fh.write("%.12f %.12f %.12f\n" % (fs[0], fs[1], fs[2]))
+        return filepath
+
+    def write_extxyz(self, filepath="traj.extxyz", groupby_type=False, overwrite=False, to_unit_cell=False,
+                     start=None, stop=None, step=None, chunksize=1000):
+        """
+        Write the trajectory in extended XYZ format with lattice, cartesian positions (Angstrom),
+        forces (eV/Angstrom) and total energy (eV) for each step.
+
+        Args:
+            filepath: Filename. If None, a temporary file is created.
+            groupby_type: If True, atoms are grouped by type.
+            overwrite: raise RuntimeError, if False and filepath exists.
+            to_unit_cell (bool): Whether to translate sites into the unit cell.
+            start, stop, step: Select the steps with the slice [start:stop:step].
+            chunksize: Number of steps read and formatted in a single block.
+
+        Return:
+            path to the extxyz file.
+        """
+        filepath = self._check_filepath(filepath, overwrite, ".extxyz")
+        symbols_atom, symb2pos, group_ids = self._get_symbols_group_ids(groupby_type)
+
+        natom = len(group_ids)
+        frame_fmt = "%d\n" % natom
+        frame_fmt += ('Lattice="' + " ".join(9 * ["%.10f"]) +
+                      '" Properties=species:S:1:pos:R:3:forces:R:3 energy=%.10f pbc="T T T"\n')
+        for iat in group_ids:
+            frame_fmt += "%s %s\n" % (symbols_atom[iat], " ".join(6 * ["%.10f"]))
+
+        with open(filepath, "wt") as fh:
+            for chunk in self.reader.iter_chunks(varnames=("xred", "rprimd", "fcart", "etotal"),
+                                                 chunksize=chunksize, start=start, stop=stop, step=step):
+                nframes = len(chunk.steps)
+                xred = chunk.xred[:, group_ids]
+                if to_unit_cell: xred = xred % 1
+                rprimd = chunk.rprimd * units.bohr_to_ang
+                xcart = np.einsum("tij,tjk->tik", xred, rprimd)
+                fcart = units.ArrayWithUnit(chunk.fcart[:, group_ids], "Ha bohr^-1").to("eV ang^-1")
+                etotal = units.EnergyArray(chunk.etotal, "Ha").to("eV")
+                data = np.concatenate([
+                    np.reshape(rprimd, (nframes, 9)),
+                    np.reshape(etotal, (nframes, 1)),
+                    np.reshape(np.concatenate([xcart, fcart], axis=-1), (nframes, -1)),
+                ], axis=1)
+                fh.write((nframes * frame_fmt) % tuple(data.ravel().tolist()))
 
         return filepath
 
@@ -281,20 +360,25 @@ class HistFile(AbinitNcFile, NotebookWriter):
         #else:
         #    hist.mvanimate()
 
-    def plot_ax(self, ax, what, fontsize=12, **kwargs):
+    def plot_ax(self, ax, what, fontsize=12, sampling=1, **kwargs):
         """
         Helper function to plot quantity ``what`` on axis ``ax``.
 
         Args:
             fontsize: fontsize for legend
+            sampling: Plot one step every ``sampling`` steps. Only the selected steps are read from file.
             kwargs are passed to matplotlib plot method
         """
         label = None
+        steps = self.get_sampled_steps(sampling=sampling)
+        if what in ("abc", "a", "b", "c", "angles", "alpha", "beta", "gamma", "volume"):
+            lattice = self.reader.read_lattice_params(step=sampling)
+
         if what == "energy":
             # Total energy in eV.
             marker = kwargs.pop("marker", "o")
             label = kwargs.pop("label", "Energy")
-            ax.plot(self.steps, self.etotals, label=label, marker=marker, **kwargs)
+            ax.plot(steps, self.etotals[::sampling], label=label, marker=marker, **kwargs)
             ax.set_ylabel('Energy (eV)')
 
         elif what == "abc":
@@ -302,8 +386,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
             mark = kwargs.pop("marker", None)
             markers = ["o", "^", "v"] if mark is None else 3 * [mark]
             for i, label in enumerate(["a", "b", "c"]):
-                ax.plot(self.steps, [s.lattice.abc[i] for s in self.structures], label=label,
-                        marker=markers[i], **kwargs)
+                ax.plot(steps, lattice.abc[:, i], label=label, marker=markers[i], **kwargs)
             ax.set_ylabel("abc (A)")
 
         elif what in ("a", "b", "c"):
@@ -312,8 +395,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
             if marker is None:
                 marker = {"a": "o", "b": "^", "c": "v"}[what]
             label = kwargs.pop("label", what)
-            ax.plot(self.steps, [s.lattice.abc[i] for s in self.structures], label=label,
-                    marker=marker, **kwargs)
+            ax.plot(steps, lattice.abc[:, i], label=label, marker=marker, **kwargs)
             ax.set_ylabel('%s (A)' % what)
 
         elif what == "angles":
@@ -321,8 +403,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
             mark = kwargs.pop("marker", None)
             markers = ["o", "^", "v"] if mark is None else 3 * [mark]
             for i, label in enumerate(["alpha", "beta", "gamma"]):
-                ax.plot(self.steps, [s.lattice.angles[i] for s in self.structures], label=label,
-                        marker=markers[i], **kwargs)
+                ax.plot(steps, lattice.angles[:, i], label=label, marker=markers[i], **kwargs)
             ax.set_ylabel(r"$\alpha\beta\gamma$ (degree)")
 
         elif what in ("alpha", "beta", "gamma"):
@@ -332,39 +413,32 @@ class HistFile(AbinitNcFile, NotebookWriter):
                 marker = {"alpha": "o", "beta": "^", "gamma": "v"}[what]
 
             label = kwargs.pop("label", what)
-            ax.plot(self.steps, [s.lattice.angles[i] for s in self.structures], label=label,
-                    marker=marker, **kwargs)
+            ax.plot(steps, lattice.angles[:, i], label=label, marker=marker, **kwargs)
             ax.set_ylabel(r"$\%s$ (degree)" % what)
 
         elif what == "volume":
             marker = kwargs.pop("marker", "o")
-            ax.plot(self.steps, [s.lattice.volume for s in self.structures], marker=marker, **kwargs)
+            ax.plot(steps, lattice.volumes, marker=marker, **kwargs)
             ax.set_ylabel(r'$V\, (A^3)$')
 
         elif what == "pressure":
-            stress_cart_tensors, pressures = self.reader.read_cart_stress_tensors()
+            stress_cart_tensors, pressures = self.reader.read_cart_stress_tensors(step=sampling)
             marker = kwargs.pop("marker", "o")
             label = kwargs.pop("label", "P")
-            ax.plot(self.steps, pressures, label=label, marker=marker, **kwargs)
+            ax.plot(steps, pressures, label=label, marker=marker, **kwargs)
             ax.set_ylabel('P (GPa)')
 
         elif what == "forces":
-            forces_hist = self.reader.read_cart_forces()
-            fmin_steps, fmax_steps, fmean_steps, fstd_steps = [], [], [], []
-            for step in range(self.num_steps):
-                forces = forces_hist[step]
-                fmods = np.sqrt([np.dot(force, force) for force in forces])
-                fmean_steps.append(fmods.mean())
-                fstd_steps.append(fmods.std())
-                fmin_steps.append(fmods.min())
-                fmax_steps.append(fmods.max())
+            fmods = self.reader.read_force_norms(step=sampling)
+            fmin_steps, fmax_steps = fmods.min(axis=1), fmods.max(axis=1)
+            fmean_steps, fstd_steps = fmods.mean(axis=1), fmods.std(axis=1)
 
             mark = kwargs.pop("marker", None)
             markers = ["o", "^", "v", "X"] if mark is None else 4 * [mark]
-            ax.plot(self.steps, fmin_steps, label="min |F|", marker=markers[0], **kwargs)
-            ax.plot(self.steps, fmax_steps, label="max |F|", marker=markers[1], **kwargs)
-            ax.plot(self.steps, fmean_steps, label="mean |F|", marker=markers[2], **kwargs)
-            ax.plot(self.steps, fstd_steps, label="std |F|", marker=markers[3], **kwargs)
+            ax.plot(steps, fmin_steps, label="min |F|", marker=markers[0], **kwargs)
+            ax.plot(steps, fmax_steps, label="max |F|", marker=markers[1], **kwargs)
+            ax.plot(steps, fmean_steps, label="mean |F|", marker=markers[2], **kwargs)
+            ax.plot(steps, fstd_steps, label="std |F|", marker=markers[3], **kwargs)
             label = "std |F"
             ax.set_ylabel('F stats (eV/A)')
 
@@ -378,7 +452,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
 
 
     @add_fig_kwargs
-    def plot(self, ax_list=None, fontsize=8, **kwargs):
+    def plot(self, ax_list=None, fontsize=8, sampling=1, **kwargs):
         """
         Plot the evolution of structural parameters (lattice lengths, angles and volume)
         as well as pressure, info on forces and total energy.
@@ -386,6 +460,7 @@ class HistFile(AbinitNcFile, NotebookWriter):
         Args:
             ax_list: List of |matplotlib-Axes|. If None, a new figure is created.
             fontsize: fontsize for legend
+            sampling: Plot one step every ``sampling`` steps.
 
         Returns: |matplotlib-Figure|
         """
@@ -397,18 +472,19 @@ class HistFile(AbinitNcFile, NotebookWriter):
         assert len(ax_list) == len(what_list)
 
         for what, ax in zip(what_list, ax_list):
-            self.plot_ax(ax, what, fontsize=fontsize, marker="o")
+            self.plot_ax(ax, what, fontsize=fontsize, sampling=sampling, marker="o")
 
         return fig
 
     @add_fig_kwargs
-    def plot_energies(self, ax=None, fontsize=12, **kwargs):
+    def plot_energies(self, ax=None, fontsize=12, sampling=1, **kwargs):
         """
         Plot the total energies as function of the iteration step.
 
         Args:
             ax: |matplotlib-Axes| or None if a new figure should be created.
             fontsize: Legend and title fontsize.
+            sampling: Plot one step every ``sampling`` steps.
 
         Returns: |matplotlib-Figure|
         """
@@ -416,9 +492,10 @@ class HistFile(AbinitNcFile, NotebookWriter):
         ax, fig, plt = get_ax_fig_plt(ax=ax)
 
         terms = self.reader.read_eterms()
+        steps = self.get_sampled_steps(sampling=sampling)
         for key, values in terms.items():
             if np.all(values == 0.0): continue
-            ax.plot(self.steps, values, marker="o", label=key)
+            ax.plot(steps, values[::sampling], marker="o", label=key)
 
         ax.set_xlabel('Step')
         ax.set_ylabel('Energies (eV)')
@@ -427,6 +504,103 @@ class HistFile(AbinitNcFile, NotebookWriter):
 
         return fig
 
+    def get_partial_rdfs(self, rmax=None, nbins=200, start=None, stop=None, step=None, chunksize=500):
+        """
+        Compute the partial radial distribution functions averaged over the steps in [start:stop:step].
+        See :func:`abipy.dynamics.analysis.compute_partial_rdfs` for the meaning of the arguments.
+        """
+        from abipy.dynamics.analysis import compute_partial_rdfs
+        return compute_partial_rdfs(self.reader, rmax=rmax, nbins=nbins, start=start, stop=stop, step=step,
+                                    chunksize=chunksize)
+
+    def get_msd(self, max_lag=None, origin_stride=None, start=None, stop=None, step=None, chunksize=500):
+        """
+        Compute the mean square displacement with multiple time origins.
+        See :func:`abipy.dynamics.analysis.compute_msd` for the meaning of the arguments.
+        """
+        from abipy.dynamics.analysis import compute_msd
+        return compute_msd(self.reader, max_lag=max_lag, origin_stride=origin_stride,
+                           start=start, stop=stop, step=step, chunksize=chunksize)
+
+    def get_vacf(self, max_lag=None, origin_stride=None, normalize=True, start=None, stop=None, step=None,
+                 chunksize=500):
+        """
+        Compute the velocity autocorrelation function with multiple time origins.
+        See :func:`abipy.dynamics.analysis.compute_vacf` for the meaning of the arguments.
+        """
+        from abipy.dynamics.analysis import compute_vacf
+        return compute_vacf(self.reader, max_lag=max_lag, origin_stride=origin_stride, normalize=normalize,
+                            start=start, stop=stop, step=step, chunksize=chunksize)
+
+    def get_vdos(self, window="hann", **kwargs):
+        """
+        Compute the vibrational DOS from the Fourier transform of the VACF.
+        kwargs are passed to ``get_vacf``.
+        """
+        from abipy.dynamics.analysis import compute_vdos
+        vacf = self.get_vacf(**kwargs)
+        return compute_vdos(vacf.times, vacf.vacf, window=window)
+
+    @add_fig_kwargs
+    def plot_rdfs(self, rmax=None, nbins=200, step=None, ax=None, fontsize=12, **kwargs):
+        """
+        Plot the partial radial distribution functions.
+
+        Args:
+            rmax: Maximum distance in Angstrom. If None, half the smallest height of the initial cell is used.
+            nbins: Number of bins.
+            step: Use one step every ``step`` steps.
+            ax: |matplotlib-Axes| or None if a new figure should be created.
+            fontsize: Legend and title fontsize.
+
+        Returns: |matplotlib-Figure|
+        """
+        ax, fig, plt = get_ax_fig_plt(ax=ax)
+        rdf = self.get_partial_rdfs(rmax=rmax, nbins=nbins, step=step)
+
+        done = set()
+        for (sa, sb), values in rdf.rdfs.items():
+            # g_ab == g_ba
+            if (sb, sa) in done: continue
+            done.add((sa, sb))
+            ax.plot(rdf.rmesh, values, label="%s-%s" % (sa, sb), **kwargs)
+
+        ax.set_xlabel("r (A)")
+        ax.set_ylabel("g(r)")
+        ax.grid(True)
+        ax.legend(loc="best", fontsize=fontsize, shadow=True)
+
+        return fig
+
+    @add_fig_kwargs
+    def plot_msd(self, max_lag=None, origin_stride=None, step=None, ax=None, fontsize=12, **kwargs):
+        """
+        Plot the mean square displacement for each type of atom.
+
+        Args:
+            max_lag: Maximum time lag in units of sampled steps. None for default.
+            origin_stride: Distance between two consecutive time origins in units of sampled steps.
+                None to keep a bounded number of time origins in memory.
+            step: Use one step every ``step`` steps.
+            ax: |matplotlib-Axes| or None if a new figure should be created.
+            fontsize: Legend and title fontsize.
+
+        Returns: |matplotlib-Figure|
+        """
+        ax, fig, plt = get_ax_fig_plt(ax=ax)
+        msd = self.get_msd(max_lag=max_lag, origin_stride=origin_stride, step=step)
+
+        ax.plot(msd.times, msd.msd, label="All", **kwargs)
+        for symbol, values in msd.msd_type.items():
+            ax.plot(msd.times, values, label=symbol, **kwargs)
+
+        ax.set_xlabel("t (fs)")
+        ax.set_ylabel(r"MSD (A$^2$)")
+        ax.grid(True)
+        ax.legend(loc="best", fontsize=fontsize, shadow=True)
+
+        return fig
+
     def yield_figs(self, **kwargs):  # pragma: no cover
         """
         This function *generates* a predefined list of matplotlib figures with minimal input from the user.
@@ -533,6 +707,8 @@ class HistRobot(Robot):
     """
     EXT = "HIST"
 
+    INDEX_ATTRS = ["num_steps", "final_energy", "final_pressure"]
+
     def to_string(self, verbose=0):
         """String representation with verbosity level ``verbose``."""
         s = ""
@@ -608,7 +784,7 @@ class HistRobot(Robot):
         return ["energy", "abc", "angles", "volume", "pressure", "forces"]
 
     @add_fig_kwargs
-    def gridplot(self, what_list=None, sharex="row", sharey="row", fontsize=8, **kwargs):
+    def gridplot(self, what_list=None, sharex="row", sharey="row", fontsize=8, sampling=1, **kwargs):
         """
         Plot the ``what`` value extracted from multiple HIST.nc_ files on a grid.
 
@@ -618,6 +794,7 @@ class HistRobot(Robot):
             sharex: True if xaxis should be shared.
             sharey: True if yaxis should be shared.
             fontsize: fontsize for legend.
+            sampling: Plot one step every ``sampling`` steps.
 
         Returns: |matplotlib-Figure|
         """
@@ -634,7 +811,7 @@ class HistRobot(Robot):
             for icol, hist in enumerate(self.abifiles):
                 ax = ax_mat[irow, icol]
                 ax.grid(True)
-                hist.plot_ax(ax_mat[irow, icol], what, fontsize=fontsize, marker="o")
+                hist.plot_ax(ax_mat[irow, icol], what, fontsize=fontsize, sampling=sampling, marker="o")
 
                 if irow == 0:
                     ax.set_title(hist.relpath, fontsize=fontsize)
@@ -646,7 +823,7 @@ class HistRobot(Robot):
         return fig
 
     @add_fig_kwargs
-    def combiplot(self, what_list=None, colormap="jet", fontsize=6, **kwargs):
+    def combiplot(self, what_list=None, colormap="jet", fontsize=6, sampling=1, **kwargs):
         """
         Plot multiple HIST.nc_ files on a grid. One plot for each ``what`` value.
 
@@ -654,6 +831,7 @@ class HistRobot(Robot):
             what_list: List of strings with the quantities to plot. If None, all quanties are plotted.
             colormap: matplotlib color map.
             fontsize: fontisize for legend.
+            sampling: Plot one step every ``sampling`` steps.
 
         Returns: |matplotlib-Figure|.
         """
@@ -673,7 +851,8 @@ class HistRobot(Robot):
         for i, (ax, what) in enumerate(zip(ax_list, what_list)):
             for ih, hist in enumerate(self.abifiles):
                 label= None if i != 0 else hist.relpath
-                hist.plot_ax(ax, what, color=cmap(ih / len(self)), label=label, fontsize=fontsize)
+                hist.plot_ax(ax, what, color=cmap(ih / len(self)), label=label, fontsize=fontsize,
+                             sampling=sampling)
 
             if label is not None:
                 ax.legend(loc="best", fontsize=fontsize, shadow=True)
@@ -735,37 +914,102 @@ class HistReader(ETSF_Reader):
         """Number of atoms un the unit cell."""
         return self.read_dimvalue("natom")
 
-    def read_all_structures(self):
-        """Return the list of structures at the different iteration steps."""
-        rprimd_list = self.read_value("rprimd")
-        xred_list = self.read_value("xred")
+    def read_steps(self, varname, start=None, stop=None, step=None):
+        """
+        Read the values of ``varname`` only for the steps in the slice [start:stop:step].
+        The first dimension of the variable must be the time dimension.
+        """
+        return np.array(self.read_variable(varname)[start:stop:step])
+
+    def iter_chunks(self, varnames=("xred", "rprimd", "fcart", "strten"), chunksize=1000,
+                    start=None, stop=None, step=None):
+        """
+        Generate |AttrDict| with the values of ``varnames`` for blocks of at most ``chunksize`` steps
+        selected with the slice [start:stop:step]. Only one chunk is kept in memory.
+        The ``steps`` entry gives the indices of the steps in the chunk.
+        """
+        stride = 1 if step is None else int(step)
+        if stride <= 0:
+            raise ValueError("step should be positive while it is: %s" % stride)
+        steps = np.arange(self.num_steps)[start:stop:stride]
+        for i in range(0, len(steps), chunksize):
+            csteps = steps[i:i+chunksize]
+            # Use a regular slice so that netcdf reads a single hyperslab.
+            sl = slice(csteps[0], csteps[-1] + 1, stride)
+            chunk = AttrDict(steps=csteps)
+            for vname in varnames:
+                chunk[vname] = np.array(self.read_variable(vname)[sl])
+            yield chunk
 
-        # Alchemical mixing is not supported.
+    @lazy_property
+    def znucl_typat(self):
+        """znucl and typat arrays. Alchemical mixing is not supported."""
         num_pseudos = self.read_dimvalue("npsp")
         ntypat = self.read_dimvalue("ntypat")
         if num_pseudos != ntypat:
             raise NotImplementedError("Alchemical mixing is not supported, num_pseudos != ntypat")
 
-        znucl, typat = self.read_value("znucl"), self.read_value("typat").astype(int)
-        #print(znucl.dtype, typat)
-        cart_forces_step = self.read_cart_forces(unit="eV ang^-1")
+        # NB: typat is double in the HIST.nc file
+        return self.read_value("znucl"), self.read_value("typat").astype(int)
+
+    def structures_from_chunk(self, chunk):
+        """
+        Build the list of structures from a chunk produced by ``iter_chunks``.
+        The chunk must contain ``xred``, ``rprimd`` and ``fcart``.
+        """
+        znucl, typat = self.znucl_typat
+        cart_forces = units.ArrayWithUnit(chunk.fcart, "Ha bohr^-1").to("eV ang^-1")
 
         structures = []
-        #print("typat", type(typat))
-        for step in range(self.num_steps):
+        for i in range(len(chunk.steps)):
             s = Structure.from_abivars(
-                xred=xred_list[step],
-                rprim=rprimd_list[step],
+                xred=chunk.xred[i],
+                rprim=chunk.rprimd[i],
                 acell=3 * [1.0],
                 # FIXME ntypat, typat, znucl are missing!
                 znucl=znucl,
                 typat=typat,
             )
-            s.add_site_property("cartesian_forces", cart_forces_step[step])
+            s.add_site_property("cartesian_forces", cart_forces[i])
             structures.append(s)
 
         return structures
 
+    def read_structures(self, start=None, stop=None, step=None):
+        """Return the list of structures for the steps in the slice [start:stop:step]."""
+        chunk = AttrDict(steps=np.arange(self.num_steps)[start:stop:step])
+        for vname in ("xred", "rprimd", "fcart"):
+            chunk[vname] = self.read_steps(vname, start=start, stop=stop, step=step)
+        return self.structures_from_chunk(chunk)
+
+    def read_all_structures(self):
+        """Return the list of structures at the different iteration steps."""
+        return self.read_structures()
+
+    def read_lattice_params(self, start=None, stop=None, step=None):
+        """
+        Compute the lattice parameters directly from ``rprimd`` for the steps in the slice [start:stop:step].
+
+        Return: |AttrDict| with the lattice lengths ``abc`` (nsteps, 3) in Angstrom,
+        the ``angles`` (nsteps, 3) in degrees and the ``volumes`` (nsteps) in Angstrom^3.
+        """
+        rprimd = self.read_steps("rprimd", start=start, stop=stop, step=step) * units.bohr_to_ang
+        abc = np.linalg.norm(rprimd, axis=-1)
+        angles = np.empty_like(abc)
+        for i, (j, k) in enumerate(((1, 2), (0, 2), (0, 1))):
+            cos = np.sum(rprimd[:, j] * rprimd[:, k], axis=-1) / (abc[:, j] * abc[:, k])
+            angles[:, i] = np.degrees(np.arccos(np.clip(cos, -1, 1)))
+
+        return AttrDict(abc=abc, angles=angles, volumes=np.abs(np.linalg.det(rprimd)))
+
+    def read_force_norms(self, start=None, stop=None, step=None, unit="eV ang^-1"):
+        """
+        Return |numpy-array| of shape (nsteps, natom) with the norm of the cartesian forces
+        in unit ``unit`` for the steps in the slice [start:stop:step].
+        """
+        fcart = self.read_steps("fcart", start=start, stop=stop, step=step)
+        return units.ArrayWithUnit(np.linalg.norm(fcart, axis=-1), "Ha bohr^-1").to(unit)
+
     def read_eterms(self, unit="eV"):
         """|AttrDict| with the decomposition of the total energy in units ``unit``"""
         return AttrDict(
@@ -788,25 +1032,23 @@ class HistReader(ETSF_Reader):
         """
         return self.read_value("fred")
 
-    def read_cart_stress_tensors(self):
+    def read_cart_stress_tensors(self, start=None, stop=None, step=None):
         """
         Return the stress tensors (nstep x 3 x 3) in cartesian coordinates (GPa)
         and the list of pressures in GPa unit.
+        Only the steps in the slice [start:stop:step] are read.
         """
         # Abinit stores 6 unique components of this symmetric 3x3 tensor:
         # Given in order (1,1), (2,2), (3,3), (3,2), (3,1), (2,1).
-        c = self.read_value("strten")
-        tensors = np.empty((self.num_steps, 3, 3), dtype=np.float)
+        c = self.read_steps("strten", start=start, stop=stop, step=step)
+        tensors = np.empty((len(c), 3, 3), dtype=np.float)
 
-        for step in range(self.num_steps):
-            for i in range(3): tensors[step, i,i] = c[step, i]
-            for p, (i, j) in enumerate(((2,1), (2,0), (1,0))):
-                tensors[step, i,j] = c[step, 3+p]
-                tensors[step, j,i] = c[step, 3+p]
+        for i in range(3): tensors[:, i, i] = c[:, i]
+        for p, (i, j) in enumerate(((2,1), (2,0), (1,0))):
+            tensors[:, i, j] = c[:, 3+p]
+            tensors[:, j, i] = c[:, 3+p]
 
         tensors *= abu.HaBohr3_GPa
-        pressures = np.empty(self.num_steps)
-        for step, tensor in enumerate(tensors):
-            pressures[step] = - tensor.trace() / 3
+        pressures = - np.trace(tensors, axis1=1, axis2=2) / 3
 
         return tensors, pressures
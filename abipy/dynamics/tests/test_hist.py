@@ -1,6 +1,7 @@
 """"Tests for HIST.nc files."""
 from __future__ import division, print_function, unicode_literals
 
+import numpy as np
 import abipy.data as abidata
 from abipy import abilab
 from abipy.core.testing import AbipyTest
@@ -55,6 +56,67 @@ class HistFileTest(AbipyTest):
         for i in range(3):
             self.assert_almost_equal(cart_stress_tensors[-1, i, i], 5.01170783E-08 * abu.HaBohr3_GPa)
 
+        # Test chunked reader.
+        chunks = list(hist.reader.iter_chunks(chunksize=3, step=2))
+        assert len(chunks) == 2
+        self.assert_equal(chunks[0].steps, [0, 2, 4])
+        self.assert_equal(chunks[1].steps, [6])
+        self.assert_almost_equal(chunks[1].xred[0], hist.reader.read_value("xred")[-1])
+        assert chunks[0].strten.shape == (3, 6)
+        with self.assertRaises(ValueError):
+            list(hist.reader.iter_chunks(step=-1))
+
+        structs = list(hist.iter_structures(step=3, chunksize=2))
+        assert len(structs) == 3
+        self.assert_almost_equal(structs[-1].frac_coords, hist.final_structure.frac_coords)
+        lattice = hist.reader.read_lattice_params(step=3)
+        self.assert_almost_equal(lattice.abc[-1], hist.final_structure.lattice.abc)
+        self.assert_almost_equal(lattice.angles[0], hist.initial_structure.lattice.angles)
+        self.assert_almost_equal(lattice.volumes[-1], hist.final_structure.volume)
+        tensors, sampled_pressures = hist.reader.read_cart_stress_tensors(step=2)
+        self.assert_almost_equal(sampled_pressures, pressures[::2])
+        assert hist.reader.read_force_norms(start=-1).shape == (1, 2)
+        self.assert_equal(hist.get_sampled_steps(sampling=3), [0, 3, 6])
+
+        # Test structural-dynamics analytics.
+        rdf = hist.get_partial_rdfs(nbins=50, step=2)
+        assert rdf.nsteps == 4 and len(rdf.rmesh) == 50
+        assert ("Si", "C") in rdf.rdfs and ("C", "Si") in rdf.rdfs
+        self.assert_almost_equal(rdf.rdfs[("Si", "C")], rdf.rdfs[("C", "Si")])
+        msd = hist.get_msd(origin_stride=2, chunksize=2)
+        assert msd.msd[0] == 0 and set(msd.msd_type.keys()) == {"Si", "C"}
+        assert msd.msd_atom.shape == (len(msd.times), 2)
+        vacf = hist.get_vacf(normalize=False)
+        assert len(vacf.vacf) == len(vacf.times)
+
+        # The buffer of time origins does not depend on the length of the trajectory.
+        from abipy.dynamics.analysis import _get_lag_params, _correlate, MAX_ORIGINS
+        assert msd.buffer_size <= MAX_ORIGINS + 1 and vacf.buffer_size <= MAX_ORIGINS + 1
+        for nsel in (10, 10**4, 10**7):
+            max_lag, origin_stride = _get_lag_params(nsel, None, None)
+            assert max_lag // origin_stride + 1 <= MAX_ORIGINS + 1
+        traj = np.cumsum(np.random.RandomState(1).randn(3000, 2, 3), axis=0)
+        max_lag, origin_stride = _get_lag_params(len(traj), None, None)
+        msd_atom, counts = _correlate(iter(traj), max_lag, origin_stride,
+                                      kernel=lambda cur, orig: np.sum((cur - orig) ** 2, axis=-1))
+        lag = max_lag // 2
+        ref = np.sum((traj[lag::origin_stride] - traj[:-lag:origin_stride]) ** 2, axis=-1)
+        self.assert_almost_equal(msd_atom[lag], ref[:counts[lag]].mean(axis=0))
+        vdos = hist.get_vdos()
+        assert len(vdos.freqs_thz) == len(vdos.vdos)
+
+        from abipy.dynamics.analysis import find_pairs
+        rng = np.random.RandomState(0)
+        xred, lattice = rng.rand(100, 3), 10 * np.eye(3)
+        ii, jj, dist = find_pairs(xred, lattice, rmax=3)
+        dred = xred[None, :, :] - xred[:, None, :]
+        dred -= np.rint(dred)
+        alld = np.linalg.norm(np.dot(dred, lattice), axis=-1)
+        assert len(ii) == np.sum(alld <= 3) - 100
+        self.assert_almost_equal(dist, alld[ii, jj])
+        with self.assertRaises(ValueError):
+            find_pairs(xred, lattice, rmax=6)
+
         same_structure = abilab.Structure.from_file(abidata.ref_file("sic_relax_HIST.nc"))
         self.assert_almost_equal(same_structure.frac_coords, hist.final_structure.frac_coords)
 
@@ -68,10 +130,25 @@ class HistFileTest(AbipyTest):
         assert xdatcar.structures[0] ==  xdatcar_nogroup.structures[0]
         assert xdatcar.structures[-1] ==  xdatcar_nogroup.structures[-1]
 
+        # Test extxyz writer.
+        xyz_path = hist.write_extxyz(filepath=None, step=3, chunksize=2)
+        with open(xyz_path, "rt") as fh:
+            lines = fh.readlines()
+        assert len(lines) == 3 * (2 + hist.reader.natom)
+        assert int(lines[0]) == 2 and 'Properties=species:S:1:pos:R:3:forces:R:3' in lines[1]
+        tokens = lines[-1].split()
+        assert tokens[0] == "Si" and len(tokens) == 7
+        self.assert_almost_equal([float(t) for t in tokens[1:4]], hist.final_structure[1].coords)
+        with self.assertRaises(RuntimeError):
+            hist.write_extxyz(filepath=xyz_path)
+
         # Test matplotlib plots.
         if self.has_matplotlib():
             assert hist.plot(show=False)
             assert hist.plot_energies(show=False)
+            assert hist.plot(sampling=2, show=False)
+            assert hist.plot_rdfs(nbins=20, show=False)
+            assert hist.plot_msd(show=False)
 
         # Test notebook generation.
         if self.has_nbformat():
@@ -101,6 +178,7 @@ class HistFileTest(AbipyTest):
                 what_list = ["energy", "abc", "pressure", "forces"]
                 assert robot.gridplot(what=what_list, fontsize=4, show=False)
                 assert robot.combiplot(colormap="viridis", show=False)
+                assert robot.gridplot(what_list=["abc", "volume"], sampling=2, show=False)
                 assert robot.plot_lattice_convergence(fontsize=10, show=False)
                 assert robot.plot_lattice_convergence(what_list=("a", "alpha"), show=False)
 
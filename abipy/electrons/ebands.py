@@ -3119,12 +3119,15 @@ class ElectronsReader(ETSF_Reader, KpointsReaderMixin):
     .. rubric:: Inheritance Diagram
     .. inheritance-diagram:: ElectronReader
     """
-    def read_ebands(self):
+    def read_ebands(self, structure=None):
         """
         Returns an instance of |ElectronBands|. Main entry point for client code
+
+        Args:
+            structure: |Structure| object already read from file. If None, the structure is read here.
         """
         return ElectronBands(
-            structure=self.read_structure(),
+            structure=self.read_structure() if structure is None else structure,
             kpoints=self.read_kpoints(),
             eigens=self.read_eigenvalues(),
             fermie=self.read_fermie(),
@@ -11,7 +11,8 @@ from monty.termcolor import cprint
 from monty.functools import lazy_property
 from monty.string import marquee, list_strings
 from pymatgen.core.periodic_table import Element
-from abipy.core.mixins import AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter
+from abipy.core.mixins import (AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter,
+    is_lazy_open)
 from abipy.electrons.ebands import ElectronsReader
 from abipy.tools import gaussian
 from abipy.tools.plotting import set_axlims, get_axarray_fig_plt, add_fig_kwargs, get_ax_fig_plt
@@ -92,8 +93,8 @@ class FatBandsFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, N
         super(FatBandsFile, self).__init__(filepath)
         self.reader = r = ElectronsReader(filepath)
 
-        # Initialize the electron bands from file
-        self._ebands = r.read_ebands()
+        # Initialize the electron bands from file (delayed to the first access in lazy mode).
+        if not is_lazy_open(): self.ebands
         self.natom = len(self.structure)
 
         # Read metadata so that we know how to handle the content of the file.
@@ -271,15 +272,15 @@ class FatBandsFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, N
 
         return walm_sbk
 
-    @property
+    @lazy_property
     def ebands(self):
         """|ElectronBands| object."""
-        return self._ebands
+        return self.reader.read_ebands(structure=self.structure)
 
-    @property
+    @lazy_property
     def structure(self):
         """|Structure| object."""
-        return self.ebands.structure
+        return self.reader.read_structure()
 
     @lazy_property
     def params(self):
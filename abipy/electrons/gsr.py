@@ -17,7 +17,8 @@ from monty.collections import AttrDict, dict2namedtuple
 from monty.functools import lazy_property
 from pymatgen.core.units import EnergyArray, ArrayWithUnit
 from pymatgen.entries.computed_entries import ComputedEntry, ComputedStructureEntry
-from abipy.core.mixins import AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter
+from abipy.core.mixins import (AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter,
+    is_lazy_open)
 from abipy.tools.plotting import add_fig_kwargs, get_axarray_fig_plt
 from abipy.tools.tensors import Stress
 from abipy.abio.robots import Robot
@@ -46,6 +47,9 @@ class GsrFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Notebo
             print("energy: ", gsr.energy)
             gsr.ebands.plot()
 
+    If the file is opened inside a :func:`abipy.core.mixins.lazy_open` context,
+    the constructor does not read anything and the |ElectronBands| are loaded on first access.
+
     .. rubric:: Inheritance Diagram
     .. inheritance-diagram:: GsrFile
     """
@@ -57,14 +61,11 @@ class GsrFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Notebo
     def __init__(self, filepath):
         super(GsrFile, self).__init__(filepath)
 
-        self.reader = r = GsrReader(filepath)
-
-        # Initialize the electron bands from file
-        self._ebands = r.read_ebands()
+        self.reader = GsrReader(filepath)
 
-        # Add forces to structure
-        if self.is_scf_run:
-            self.structure.add_site_property("cartesian_forces", self.cart_forces)
+        if not is_lazy_open():
+            # Initialize the electron bands from file
+            self.ebands
 
     def __str__(self):
         """String representation."""
@@ -95,10 +96,10 @@ class GsrFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Notebo
 
         return "\n".join(lines)
 
-    @property
+    @lazy_property
     def ebands(self):
         """|ElectronBands| object."""
-        return self._ebands
+        return self.reader.read_ebands(structure=self.structure)
 
     @lazy_property
     def is_scf_run(self):
@@ -118,10 +119,16 @@ class GsrFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Notebo
         """Cutoff energy in Hartree for the PAW double grid (Abinit input variable)"""
         return units.Energy(self.reader.read_value("pawecutdg"), "Ha")
 
-    @property
+    @lazy_property
     def structure(self):
         """|Structure| object."""
-        return self.ebands.structure
+        structure = self.reader.read_structure()
+
+        # Add forces to structure
+        if self.is_scf_run:
+            structure.add_site_property("cartesian_forces", self.cart_forces)
+
+        return structure
 
     @lazy_property
     def energy(self):
@@ -399,7 +406,13 @@ class GsrRobot(Robot, RobotWithEbands):
     """
     EXT = "GSR"
 
-    def get_dataframe(self, with_geo=True, abspath=False, funcs=None, **kwargs):
+    INDEX_ATTRS = [
+        "energy", "pressure", "max_force",
+        "ecut", "pawecutdg",
+        "tsmear", "nsppol", "nspinor", "nspden",
+    ]
+
+    def get_dataframe(self, with_geo=True, abspath=False, funcs=None, columns=None, **kwargs):
         """
         Return a |pandas-DataFrame| with the most important GS results.
         and the filenames as index.
@@ -407,6 +420,8 @@ class GsrRobot(Robot, RobotWithEbands):
         Args:
             with_geo: True if structure info should be added to the dataframe
             abspath: True if paths in index should be absolute. Default: Relative to getcwd().
+            columns: List of column names. If not None, only these columns are computed
+                and the DataFrame columns are ordered as in ``columns``.
 
         kwargs:
             attrs:
@@ -414,6 +429,7 @@ class GsrRobot(Robot, RobotWithEbands):
             funcs: Function or list of functions to execute to add more data to the DataFrame.
                 Each function receives a |GsrFile| object and returns a tuple (key, value)
                 where key is a string with the name of column and value is the value to be inserted.
+                A dictionary mapping column names to functions returning the value is also accepted.
         """
         # Add attributes specified by the users
         # TODO add more columns
@@ -423,15 +439,16 @@ class GsrRobot(Robot, RobotWithEbands):
             "tsmear", "nkpt",
             "nsppol", "nspinor", "nspden",
         ] + kwargs.pop("attrs", [])
+        attrs = [aname for aname in attrs if self._wants(columns, aname)]
 
         rows, row_names = [], []
         for label, gsr in self.items():
             row_names.append(label)
             d = OrderedDict()
 
-            # Add info on structure.
+            # Add info on structure (cached, spglib is called only if needed).
             if with_geo:
-                d.update(gsr.structure.get_dict4pandas(with_spglib=True))
+                d.update(self._get_geo_dict(gsr, columns=columns, with_spglib=True))
 
             for aname in attrs:
                 if aname == "nkpt":
@@ -442,11 +459,12 @@ class GsrRobot(Robot, RobotWithEbands):
                 d[aname] = value
 
             # Execute functions
-            if funcs is not None: d.update(self._exec_funcs(funcs, gsr))
+            if funcs is not None: d.update(self._exec_funcs(funcs, gsr, columns=columns))
             rows.append(d)
 
         row_names = row_names if not abspath else self._to_relpaths(row_names)
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        df = pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return self._project_columns(df, columns)
 
     def get_eos_fits_dataframe(self, eos_names="murnaghan"):
         """
@@ -18,7 +18,7 @@ from monty.termcolor import cprint
 from monty.bisect import find_le, find_ge
 from abipy.core.func1d import Function1D
 from abipy.core.kpoints import Kpoint, KpointList, Kpath, IrredZone, has_timrev_from_kptopt
-from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter
+from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter, is_lazy_open
 from abipy.iotools import ETSF_Reader
 from abipy.tools.plotting import (ArrayPlotter, add_fig_kwargs, get_ax_fig_plt, get_axarray_fig_plt, Marker,
     set_axlims, set_visible, rotate_ticklabels, ax_append_title)
@@ -619,12 +619,20 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
 
         self._ebands = ebands = reader.ks_bands
 
-        qplist_spin = self.qplist_spin
+        # In lazy mode, QP results are read on first access.
+        if not is_lazy_open():
+            for aname in ("qplist_spin", "qpgaps", "qpenes", "ksgaps"):
+                getattr(self, aname)
 
-        # TODO handle the case in which nkptgw < nkibz
-        self.qpgaps = reader.read_qpgaps()
-        self.qpenes = reader.read_qpenes()
-        self.ksgaps = reader.read_ksgaps()
+    @lazy_property
+    def qpenes(self):
+        """|numpy-array| with the QP energies read from file."""
+        return self.reader.read_qpenes()
+
+    @lazy_property
+    def ksgaps(self):
+        """|numpy-array| of shape [nsppol, nkibz] with the KS gaps in eV."""
+        return self.reader.read_ksgaps()
 
     @property
     def sigma_kpoints(self):
@@ -734,6 +742,7 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
     @lazy_property
     def qpgaps(self):
         """|numpy-array| of shape [nsppol, nkibz] with the QP direct gaps in eV."""
+        # TODO handle the case in which nkptgw < nkibz
         return self.reader.read_qpgaps()
 
     def get_qpgap(self, spin, kpoint, with_ksgap=False):
@@ -1826,7 +1835,8 @@ class SigresRobot(Robot, RobotWithEbands):
 
         return table
 
-    def get_qpgaps_dataframe(self, spin=None, kpoint=None, with_geo=False, abspath=False, funcs=None, **kwargs):
+    def get_qpgaps_dataframe(self, spin=None, kpoint=None, with_geo=False, abspath=False, funcs=None,
+                             columns=None, **kwargs):
         """
         Return a |pandas-DataFrame| with the QP gaps for all files in the robot.
 
@@ -1838,6 +1848,9 @@ class SigresRobot(Robot, RobotWithEbands):
             funcs: Function or list of functions to execute to add more data to the DataFrame.
                 Each function receives a |SigresFile| object and returns a tuple (key, value)
                 where key is a string with the name of column and value is the value to be inserted.
+                A dictionary mapping column names to functions returning the value is also accepted.
+            columns: List of column names. If not None, only these columns are computed
+                and the DataFrame columns are ordered as in ``columns``.
         """
         # TODO: Ideally one should select the k-point for which we have the fundamental gap for the given spin
         # TODO: In principle the SIGRES might have different k-points
@@ -1849,6 +1862,7 @@ class SigresRobot(Robot, RobotWithEbands):
             #"nspinor", "nspden", #"ecut", "pawecutdg",
             #"tsmear", "nkibz",
         ] + kwargs.pop("attrs", [])
+        attrs = [aname for aname in attrs if self._wants(columns, aname)]
 
         rows, row_names = [], []
         for label, sigres in self.items():
@@ -1857,22 +1871,23 @@ class SigresRobot(Robot, RobotWithEbands):
             for aname in attrs:
                 d[aname] = getattr(sigres, aname, None)
 
-            qpgap = sigres.get_qpgap(spin, kpoint)
-            d.update({"qpgap": qpgap})
+            if self._wants(columns, "qpgap"):
+                d["qpgap"] = sigres.get_qpgap(spin, kpoint)
 
             # Add convergence parameters
             d.update(sigres.params)
 
-            # Add info on structure.
+            # Add info on structure (cached, spglib is called only if needed).
             if with_geo:
-                d.update(sigres.structure.get_dict4pandas(with_spglib=True))
+                d.update(self._get_geo_dict(sigres, columns=columns, with_spglib=True))
 
             # Execute functions.
-            if funcs is not None: d.update(self._exec_funcs(funcs, sigres))
+            if funcs is not None: d.update(self._exec_funcs(funcs, sigres, columns=columns))
             rows.append(d)
 
         row_names = row_names if not abspath else self._to_relpaths(row_names)
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        df = pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return self._project_columns(df, columns)
 
     # An alias to have a common API for robots.
     get_dataframe = get_qpgaps_dataframe
@@ -135,6 +135,54 @@ class GSRFileTestCase(AbipyTest):
             if self.has_nbformat():
                 gsr.write_notebook(nbpath=self.get_tmpname(text=True))
 
+    def test_gsr_lazy_open(self):
+        """Testing GSR file opened in lazy mode."""
+        from abipy.abilab import abiopen
+        from abipy.core.mixins import is_lazy_open
+        path = abidata.ref_file("si_scf_GSR.nc")
+
+        with GsrFile(path) as gsr:
+            df = gsr.get_read_report()
+            assert "eigenvalues" in list(df["varname"])
+            eager_structure = gsr.structure
+
+        with abiopen(path, lazy=True) as gsr:
+            assert not is_lazy_open()
+            assert "ebands" not in gsr.__dict__ and "structure" not in gsr.__dict__
+            assert len(gsr.get_read_report()) == 0
+            assert gsr.structure == eager_structure
+            assert gsr.structure.get_space_group_info()[1] == 227
+            self.assert_almost_equal(gsr.energy.to("Ha"), -8.8652767680604807)
+            df = gsr.get_read_report()
+            assert "etotal" in list(df["varname"]) and "eigenvalues" not in list(df["varname"])
+            assert np.all(df["count"] >= 1) and np.all(df["time"] >= 0)
+            assert "ebands" not in gsr.__dict__
+
+            # Now read ebands. Structure must be shared.
+            assert gsr.ebands.structure is gsr.structure
+            assert "cartesian_forces" in gsr.structure.site_properties
+            df = gsr.get_read_report()
+            assert df[df["varname"] == "eigenvalues"]["nbytes"].iloc[0] == gsr.ebands.eigens.nbytes
+
+            # Reads performed by slicing the variable are recorded as well.
+            count, nbytes = gsr.reader.read_stats.get("occupations", [0, 0.0, 0])[::2]
+            var = gsr.reader.read_variable("occupations")
+            assert var.shape == gsr.ebands.occfacts.shape
+            occ = var[0, 0]
+            assert gsr.reader.read_stats["occupations"][::2] == [count + 1, nbytes + occ.nbytes]
+            # Iteration and conversion to array are recorded as well.
+            assert len(list(var)) == var.shape[0]
+            assert np.array(var, dtype=np.float32, copy=True).dtype == np.float32
+            assert gsr.reader.read_stats["occupations"][0] == count + 3
+
+        # abiopen inherits the mode of the enclosing lazy_open context.
+        from abipy.core.mixins import lazy_open
+        with lazy_open():
+            with abiopen(path) as gsr:
+                assert "ebands" not in gsr.__dict__ and len(gsr.get_read_report()) == 0
+            with abiopen(path, lazy=False) as gsr:
+                assert "ebands" in gsr.__dict__
+
 
 class GsrRobotTest(AbipyTest):
 
@@ -206,10 +254,22 @@ class GsrRobotTest(AbipyTest):
         self.assert_equal(df["ecut"].values, 6.0)
         self.assert_almost_equal(df["energy"].values, -241.2364683)
 
+        # Column projection gives the same values as the full dataframe.
+        columns = ["energy", "a", "spglib_num", "nkpt", "natom_x2"]
+        sub_df = robot.get_dataframe(columns=columns, funcs={"natom_x2": lambda gsr: 2 * len(gsr.structure),
+                                                              "unused": lambda gsr: 1 / 0})
+        assert list(sub_df.columns) == columns
+        for col in columns[:-1]:
+            self.assert_equal(sub_df[col].values, df[col].values)
+        assert not robot.exceptions
+        assert list(robot.get_dataframe(columns=["ecut", "a"]).columns) == ["ecut", "a"]
+
         df_params = robot.get_params_dataframe()
         assert "nband" in df_params
+        assert list(robot.get_params_dataframe(columns=["nband"]).columns) == ["nband"]
 
         assert "alpha" in robot.get_lattice_dataframe()
+        assert "spglib_num" not in robot.get_lattice_dataframe(columns=["a", "alpha"])
         assert hasattr(robot.get_coords_dataframe(), "keys")
 
         eterms_df = robot.get_energyterms_dataframe(iref=0)
@@ -247,3 +307,40 @@ class GsrRobotTest(AbipyTest):
 
         robot.close()
         same_robot.close()
+
+        # Test parallel opening and metadata index.
+        qha_dir = os.path.join(abidata.dirpath, "refs", "si_qha")
+        with abilab.GsrRobot.from_dir(qha_dir) as qha_robot:
+            assert len(qha_robot) == 6
+            ref_df = qha_robot.get_dataframe()
+
+        with abilab.GsrRobot.from_dir(qha_dir, nprocs=2) as par_robot:
+            assert len(par_robot) == 6
+            # The metadata extracted by the worker processes are attached to the files.
+            assert all("index_record" in par_robot._get_memo(gsr) for gsr in par_robot.abifiles)
+            par_df = par_robot.get_dataframe()
+            assert list(par_df.index) == list(ref_df.index)
+            self.assert_almost_equal(par_df["energy"].values, ref_df["energy"].values)
+            self.assert_equal(par_df["spglib_num"].values, ref_df["spglib_num"].values)
+
+        index_path = self.get_tmpname(text=True, suffix=".json")
+        index = abilab.GsrRobot.build_index(qha_dir, index_path=index_path, nprocs=2)
+        assert len(index) == 6
+        assert all(index.is_uptodate(r["path"]) for r in index)
+        df = index.get_dataframe()
+        assert "energy" in df and "nband" in df and "spglib_num" in df
+        self.assert_almost_equal(sorted(df["energy"].values), sorted(ref_df["energy"].values))
+        assert "ecut" in index.get_params_dataframe()
+        assert len(index.get_structures()) == 6
+
+        # Reload the index from file. No file should be reopened.
+        same_index = abilab.GsrRobot.build_index(qha_dir, index_path=index_path)
+        assert list(same_index.records.keys()) == list(index.records.keys())
+
+        # Records extracted without structural info are stale if with_geo is requested.
+        geo_path = self.get_tmpname(text=True, suffix=".json")
+        index = abilab.GsrRobot.build_index(qha_dir, index_path=geo_path, with_geo=False)
+        assert all(not r["with_geo"] and not r["geo"] for r in index)
+        assert not any(index.is_uptodate(r["path"], with_geo=True) for r in index)
+        index = abilab.GsrRobot.build_index(qha_dir, index_path=geo_path, with_geo=True)
+        assert all(r["with_geo"] and "spglib_num" in r["geo"] for r in index)
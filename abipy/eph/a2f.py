@@ -13,9 +13,10 @@ import pymatgen.core.units as units
 import abipy.core.abinit_units as abu
 
 from collections import OrderedDict
-from scipy.integrate import cumtrapz, simps
+from scipy.integrate import simps
 from monty.string import marquee, list_strings
 from monty.functools import lazy_property
+from monty.collections import dict2namedtuple
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter
 from abipy.core.kpoints import Kpath
 from abipy.tools.plotting import (add_fig_kwargs, get_ax_fig_plt, get_axarray_fig_plt, set_axlims, set_visible,
@@ -30,11 +31,118 @@ from abipy.eph.common import BaseEphReader
 _LATEX_LABELS = {
     "lambda_iso": r"$\lambda_{iso}$",
     "omega_log": r"$\omega_{log}$",
+    "omega2": r"$\sqrt{<\omega^2>}$",
     "a2f": r"$\alpha^2F(\omega)$",
     "lambda": r"$\lambda(\omega)$",
 }
 
 
+def _find_iw0(wmesh):
+    """Index of the first point in the mesh whose value is >= 0."""
+    inds = np.flatnonzero(np.asarray(wmesh) >= 0.0)
+    if len(inds) == 0:
+        raise ValueError("Cannot find zero in energy mesh")
+    return inds[0]
+
+
+def a2f_moments(wmesh, values, n, cumulative=False):
+    r"""
+    Computes the moments of a2F(w) i.e. $\int dw [a2F(w)/w] w^n$ for all the exponents ``n``
+    and all the functions stored in ``values`` in one pass (trapezoidal rule).
+    Integrals are performed with wmesh[iw0 + 1:] i.e. unstable modes are neglected.
+
+    Args:
+        wmesh: Frequency mesh in eV.
+        values: |numpy-array| with a2F(w). Shape [..., nw].
+        n: Exponent or list of exponents.
+        cumulative: True if the primitive (given on wmesh) is wanted.
+
+    Return: |numpy-array| with shape [..., len(n)] or [..., len(n), nw] if cumulative.
+        The axis associated to ``n`` is not present if ``n`` is a scalar.
+    """
+    wmesh, values = np.asarray(wmesh), np.asarray(values)
+    iw = _find_iw0(wmesh) + 1
+    nvals = np.atleast_1d(n)
+
+    # [..., len(n), nw - iw]
+    w = wmesh[iw:]
+    ff = values[..., None, iw:] * (w ** (nvals[:, None] - 1))
+    segs = 0.5 * (ff[..., 1:] + ff[..., :-1]) * np.diff(w)
+
+    if cumulative:
+        vals = np.zeros(ff.shape[:-1] + wmesh.shape)
+        vals[..., iw + 1:] = np.cumsum(segs, axis=-1)
+    else:
+        vals = segs.sum(axis=-1)
+
+    if np.ndim(n) == 0:
+        vals = vals[..., 0, :] if cumulative else vals[..., 0]
+
+    return vals
+
+
+def a2f_omega_log(wmesh, values, lambda_iso=None):
+    r"""
+    Logarithmic moment of alpha^2F: exp((2/\lambda) \int dw a2F(w) ln(w)/w)
+    for all the functions stored in ``values`` (shape [..., nw]).
+    ``lambda_iso`` is computed from ``values`` if not given.
+    """
+    wmesh, values = np.asarray(wmesh), np.asarray(values)
+    if lambda_iso is None:
+        lambda_iso = a2f_moments(wmesh, values, n=0)
+
+    iw = _find_iw0(wmesh) + 1
+    w = wmesh[iw:]
+    integral = simps(values[..., iw:] / w * np.log(w), x=w, axis=-1)
+
+    return np.exp(integral / lambda_iso)
+
+
+def _outer_mustar(mustar, *arrays):
+    """Add the dimensions of mustar to arrays so that the results have shape arrays.shape + mustar.shape."""
+    mustar = np.asarray(mustar, dtype=np.float)
+    return [np.reshape(a, np.shape(a) + (1,) * mustar.ndim) for a in arrays] + [mustar]
+
+
+def mcmillan_tc(lambda_iso, omega_log, mustar):
+    """
+    Critical temperature in Kelvin computed with the McMillan equation.
+
+    Args:
+        lambda_iso: Isotropic lambda. Scalar or array.
+        omega_log: Logarithmic moment in eV. Same shape as lambda_iso.
+        mustar: Scalar or array with the values of mustar.
+
+    Return: Tc with shape lambda_iso.shape + mustar.shape.
+    """
+    l, wlog, mustar = _outer_mustar(mustar, lambda_iso, omega_log)
+    tc = (wlog / 1.2) * np.exp(-1.04 * (1.0 + l) / (l - mustar * (1.0 + 0.62 * l)))
+
+    return tc * abu.eV_to_K
+
+
+def allen_dynes_tc(lambda_iso, omega_log, omega2, mustar):
+    r"""
+    Critical temperature in Kelvin computed with the Allen-Dynes equation
+    i.e. McMillan equation with the strong-coupling and shape correction factors f1 and f2.
+
+    Args:
+        lambda_iso: Isotropic lambda. Scalar or array.
+        omega_log: Logarithmic moment in eV. Same shape as lambda_iso.
+        omega2: $\sqrt{<\omega^2>}$ in eV. Same shape as lambda_iso.
+        mustar: Scalar or array with the values of mustar.
+
+    Return: Tc with shape lambda_iso.shape + mustar.shape.
+    """
+    l, wlog, w2, mustar = _outer_mustar(mustar, lambda_iso, omega_log, omega2)
+    lambda1 = 2.46 * (1.0 + 3.8 * mustar)
+    lambda2 = 1.82 * (1.0 + 6.3 * mustar) * (w2 / wlog)
+    f1 = (1.0 + (l / lambda1) ** 1.5) ** (1.0 / 3.0)
+    f2 = 1.0 + (w2 / wlog - 1.0) * l ** 2 / (l ** 2 + lambda2 ** 2)
+
+    return f1 * f2 * mcmillan_tc(lambda_iso, omega_log, mustar)
+
+
 class A2f(object):
     """
     Eliashberg function a2F(w). Energies are in eV.
@@ -86,10 +194,7 @@ class A2f(object):
         Index of the first point in the mesh whose value is >= 0
         Integrals are performed with wmesh[iw0 + 1, :] i.e. unstable modes are neglected.
         """
-        for i, x in enumerate(self.mesh):
-            if x >= 0.0: return i
-        else:
-            raise ValueError("Cannot find zero in energy mesh")
+        return _find_iw0(self.mesh)
 
     def __str__(self):
         return self.to_string()
@@ -130,60 +235,60 @@ class A2f(object):
         r"""
         Logarithmic moment of alpha^2F: exp((2/\lambda) \int dw a2F(w) ln(w)/w)
         """
-        iw = self.iw0 + 1
-        wmesh, a2fw = self.mesh[iw:], self.values[iw:]
-
-        fw = a2fw / wmesh * np.log(wmesh)
-        integral = simps(fw, x=wmesh)
+        return a2f_omega_log(self.mesh, self.values, lambda_iso=self.lambda_iso)
 
-        return np.exp(1.0 / self.lambda_iso * integral)
+    @lazy_property
+    def omega2(self):
+        r"""
+        Second moment of alpha^2F: $\sqrt{<\omega^2>}$ in eV.
+        """
+        return np.sqrt(self.get_moment(n=2) / self.lambda_iso)
 
     def get_moment(self, n, spin=None, cumulative=False):
         r"""
         Computes the moment of a2F(w) i.e. $\int dw [a2F(w)/w] w^n$
         From Allen PRL 59 1460 (See also Grimvall, Eq 6.72 page 175)
-        """
-        wmesh = self.mesh[self.iw0+1:]
-        if spin is None:
-            a2fw = self.values[self.iw0+1:]
-        else:
-            a2fw = self.values_spin[spin][self.iw0+1:]
-
-        # Primitive is given on the same mesh as self.
-        ff = a2fw * (wmesh ** (n - 1))
-        vals = np.zeros(self.mesh.shape)
-        vals[self.iw0+1:] = cumtrapz(ff, x=wmesh, initial=0.0)
 
-        return vals if cumulative else vals[-1].copy()
+        Args:
+            n: Exponent or list of exponents. A list of exponents adds a leading axis to the output.
+            spin: Spin index. None for the total a2F(w).
+            cumulative: True if the primitive on the same mesh as self is wanted.
+        """
+        values = self.values if spin is None else self.values_spin[spin]
+        return a2f_moments(self.mesh, values, n, cumulative=cumulative)
 
-    def get_moment_nu(self, n, nu, spin=None, cumulative=False):
+    def get_moment_nu(self, n, nu=None, spin=None, cumulative=False):
         r"""
-        Computes the moment of a2F(w) i.e. $\int dw [a2F(w)/w] w^n$
+        Computes the moment of a2F(w) i.e. $\int dw [a2F(w)/w] w^n$ for phonon branch ``nu``.
         From Allen PRL 59 1460 (See also Grimvall, Eq 6.72 page 175)
-        """
-        wmesh = self.mesh[self.iw0+1:]
-        if spin is None:
-            a2fw = self.values_nu[nu][self.iw0+1:]
-        else:
-            a2fw = self.values_spin_nu[spin][nu][self.iw0+1:]
-
-        # Primitive is given on the same mesh as self.
-        ff = a2fw * (wmesh ** (n - 1))
-        vals = np.zeros(self.mesh.shape)
-        vals[self.iw0+1:] = cumtrapz(ff, x=wmesh, initial=0.0)
 
-        return vals if cumulative else vals[-1].copy()
+        Args:
+            n: Exponent or list of exponents. A list of exponents adds an axis after the mode axis.
+            nu: Phonon branch. None to compute the moments of all the branches with shape [nmodes, ...].
+            spin: Spin index. None to sum over spins.
+            cumulative: True if the primitive on the same mesh as self is wanted.
+        """
+        values = self.values_nu if spin is None else self.values_spin_nu[spin]
+        if nu is not None: values = values[nu]
+        return a2f_moments(self.mesh, values, n, cumulative=cumulative)
 
     def get_mcmillan_tc(self, mustar):
         """
         Computes the critical temperature with the McMillan equation and the input mustar.
+        mustar can be a scalar or an array.
 
         Return: Tc in Kelvin.
         """
-        tc = (self.omega_log / 1.2) * \
-            np.exp(-1.04 * (1.0 + self.lambda_iso) / (self.lambda_iso - mustar * (1.0 + 0.62 * self.lambda_iso)))
+        return mcmillan_tc(self.lambda_iso, self.omega_log, mustar)
+
+    def get_allen_dynes_tc(self, mustar):
+        """
+        Computes the critical temperature with the Allen-Dynes equation and the input mustar.
+        mustar can be a scalar or an array.
 
-        return tc * abu.eV_to_K
+        Return: Tc in Kelvin.
+        """
+        return allen_dynes_tc(self.lambda_iso, self.omega_log, self.omega2, mustar)
 
     def get_mustar_from_tc(self, tc):
         """
@@ -333,6 +438,10 @@ class A2f(object):
         lambda_style = a2f_style.copy()
         lambda_style["color"] = "red"
 
+        # Cumulative lambda_nu(w) for all the phonon branches.
+        if with_lambda:
+            lambdaw_nu = self.get_moment_nu(n=0, cumulative=True)
+
         import itertools
         for idir, iatom in itertools.product(range(3), range(self.natom)):
             nu = idir + 3 * iatom
@@ -357,9 +466,8 @@ class A2f(object):
 
             # Plot lambda(w)
             if with_lambda:
-                lambdaw_nu = self.get_moment_nu(n=0, nu=nu, cumulative=True)
                 lax = lax_nu[nu]
-                lax.plot(wvals, lambdaw_nu, **lambda_style)
+                lax.plot(wvals, lambdaw_nu[nu], **lambda_style)
                 if idir == 2:
                     lax.set_ylabel(r"$\lambda_{\nu}(\omega)$", color=lambda_style["color"])
 
@@ -422,7 +530,7 @@ class A2f(object):
         """
         # TODO start and stop to avoid singularity in Mc Tc
         mustar_values = np.linspace(start, stop, num=num)
-        tc_vals = [self.get_mcmillan_tc(mustar) for mustar in mustar_values]
+        tc_vals = self.get_mcmillan_tc(mustar_values)
 
         ax, fig, plt = get_ax_fig_plt(ax=ax)
         ax.plot(mustar_values, tc_vals, **kwargs)
@@ -959,6 +1067,46 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
 
     all_qsamps = ["qcoarse", "qintp"]
 
+    def get_a2f_data(self, qsamp, mustar=None):
+        """
+        Compute lambda_iso, omega_log and omega2 for all the files in the robot.
+        The a2F(w) functions of the files sharing the same frequency mesh are stacked
+        in a single array so that the moments are computed with one broadcasted pass.
+
+        Args:
+            qsamp: "qcoarse" or "qintp".
+            mustar: Scalar or array with the values of mustar used to compute the critical temperature.
+                None if Tc is not wanted.
+
+        Return: namedtuple with arrays of shape [nfiles] ordered as the files in the robot.
+            ``tc_mcmillan`` and ``tc_allen_dynes`` have shape [nfiles] + mustar.shape (None if not mustar).
+        """
+        a2f_list = [ncfile.get_a2f_qsamp(qsamp) for ncfile in self.abifiles]
+
+        # Group files by frequency mesh.
+        groups = OrderedDict()
+        for ifile, a2f in enumerate(a2f_list):
+            groups.setdefault((len(a2f.mesh), a2f.mesh.tobytes()), []).append(ifile)
+
+        nfiles = len(a2f_list)
+        lambda_iso, omega_log, omega2 = np.empty(nfiles), np.empty(nfiles), np.empty(nfiles)
+        for inds in groups.values():
+            mesh = a2f_list[inds[0]].mesh
+            # [nfiles_in_group, nw]
+            values = np.array([a2f_list[i].values for i in inds])
+            moments = a2f_moments(mesh, values, n=[0, 2])
+            lambda_iso[inds] = moments[:, 0]
+            omega_log[inds] = a2f_omega_log(mesh, values, lambda_iso=moments[:, 0])
+            omega2[inds] = np.sqrt(moments[:, 1] / moments[:, 0])
+
+        tc_mcmillan, tc_allen_dynes = None, None
+        if mustar is not None:
+            tc_mcmillan = mcmillan_tc(lambda_iso, omega_log, mustar)
+            tc_allen_dynes = allen_dynes_tc(lambda_iso, omega_log, omega2, mustar)
+
+        return dict2namedtuple(lambda_iso=lambda_iso, omega_log=omega_log, omega2=omega2,
+                               tc_mcmillan=tc_mcmillan, tc_allen_dynes=tc_allen_dynes)
+
     def get_dataframe(self, abspath=False, with_geo=False, with_params=True, funcs=None):
         """
         Build and return a |pandas-DataFrame| with the most important results.
@@ -973,21 +1121,21 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
 
         Return: |pandas-DataFrame|
         """
+        a2f_data = {qsamp: self.get_a2f_data(qsamp) for qsamp in self.all_qsamps}
+
         rows, row_names = [], []
         for i, (label, ncfile) in enumerate(self.items()):
             row_names.append(label)
             d = OrderedDict()
 
             for qsamp in self.all_qsamps:
-                a2f = ncfile.get_a2f_qsamp(qsamp)
-                d["lambda_" + qsamp] = a2f.lambda_iso
-                d["omegalog_" + qsamp] = a2f.omega_log
+                d["lambda_" + qsamp] = a2f_data[qsamp].lambda_iso[i]
+                d["omegalog_" + qsamp] = a2f_data[qsamp].omega_log[i]
 
                 # Add transport properties.
                 if ncfile.has_a2ftr:
-                    for qsamp in self.all_qsamps:
-                        a2ftr = ncfile.get_a2ftr_qsamp(qsamp)
-                        d["lambdatr_avg_" + qsamp] = a2f.lambda_tr
+                    a2ftr = ncfile.get_a2ftr_qsamp(qsamp)
+                    d["lambdatr_avg_" + qsamp] = a2ftr.lambda_tr
 
             # Add info on structure.
             if with_geo:
@@ -1156,7 +1304,8 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
                 If string, it's assumed that the abifile has an attribute with the same name and getattr is invoked.
                 If callable, the output of hue(abifile) is used.
             qsamps:
-            what_list:
+            what_list: List of :class:`A2f` attributes to plot. "lambda_iso", "omega_log" and "omega2"
+                are computed for all files at once with ``get_a2f_data``.
             fontsize: Legend and title fontsize.
 
         Returns: |matplotlib-Figure|
@@ -1177,14 +1326,23 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
         qsamps = self.all_qsamps if qsamps == "all" else list_strings(qsamps)
         marker = kwargs.pop("marker", "o")
 
+        # Compute the data for all files and q-samplings once.
+        a2f_data = {qsamp: self.get_a2f_data(qsamp) for qsamp in qsamps}
+        file2index = {id(ncfile): i for i, ncfile in enumerate(self.abifiles)}
+
+        def get_yvals(what, qsamp, ncfiles):
+            if what in ("lambda_iso", "omega_log", "omega2"):
+                return getattr(a2f_data[qsamp], what)[[file2index[id(ncfile)] for ncfile in ncfiles]]
+            # Other attributes of A2f are computed file by file.
+            return [getattr(ncfile.get_a2f_qsamp(qsamp), what) for ncfile in ncfiles]
+
         for ix, (ax, what) in enumerate(zip(ax_list, what_list)):
             #ax.set_title(what, fontsize=fontsize)
             if hue is None:
                 params_are_string = duck.is_string(params[0])
                 xvals = params if not params_are_string else range(len(params))
                 for iq, qsamp in enumerate(qsamps):
-                    a2f_list = [ncfile.get_a2f_qsamp(qsamp) for ncfile in ncfiles]
-                    yvals = [getattr(a2f, what) for a2f in a2f_list]
+                    yvals = get_yvals(what, qsamp, ncfiles)
                     l = ax.plot(xvals, yvals,
                                 marker=self.marker_qsamp[qsamp],
                                 linestyle=self.linestyle_qsamp[qsamp],
@@ -1196,8 +1354,7 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
             else:
                 for g in groups:
                     for iq, qsamp in enumerate(qsamps):
-                        a2f_list = [ncfile.get_a2f_qsamp(qsamp) for ncfile in g.abifiles]
-                        yvals = [getattr(a2f, what) for a2f in a2f_list]
+                        yvals = get_yvals(what, qsamp, g.abifiles)
                         label = "%s: %s" % (self._get_label(hue), g.hvalue) if iq == 0 else None
                         l = ax.plot(g.xvalues, yvals, label=label,
                                     marker=self.marker_qsamp[qsamp],
@@ -1206,7 +1363,7 @@ class A2fRobot(Robot, RobotWithEbands, RobotWithPhbands):
                                     )
 
             ax.grid(True)
-            ax.set_ylabel(_LATEX_LABELS[what])
+            ax.set_ylabel(_LATEX_LABELS.get(what, what))
             if ix == len(what_list) - 1:
                 ax.set_xlabel("%s" % self._get_label(sortby))
                 if sortby is None: rotate_ticklabels(ax, 15)
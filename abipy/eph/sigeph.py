@@ -11,6 +11,7 @@ Warning:
 from __future__ import print_function, division, unicode_literals, absolute_import
 
 import tempfile
+import itertools
 import pickle
 import os
 import numpy as np
@@ -21,9 +22,10 @@ from collections import OrderedDict, namedtuple, Iterable
 from tabulate import tabulate
 from monty.string import marquee, list_strings
 from monty.functools import lazy_property
+from monty.collections import dict2namedtuple
 from monty.termcolor import cprint
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter
-from abipy.core.kpoints import Kpoint, KpointList, Kpath, IrredZone, has_timrev_from_kptopt
+from abipy.core.kpoints import Kpoint, KpointList, Kpath, IrredZone, has_timrev_from_kptopt, map_grid2ibz
 from abipy.tools.plotting import (add_fig_kwargs, get_ax_fig_plt, get_axarray_fig_plt, set_axlims, set_visible,
     rotate_ticklabels, ax_append_title, set_ax_xylabels, linestyles)
 from abipy.tools import gaussian, duck
@@ -769,6 +771,62 @@ class _MyQpkindsList(list):
     """Returned by find_qpkinds."""
 
 
+def _tetra_vertexes(bz2ibz, ngkpt):
+    """
+    Divide each sub-cell of the (Gamma-centered) ``ngkpt`` mesh in 6 tetrahedra
+    sharing the (0, 0, 0) - (1, 1, 1) diagonal.
+
+    Args:
+        bz2ibz: Index of the IBZ point associated to each point of the mesh (C order, see ``map_grid2ibz``).
+        ngkpt: Mesh divisions.
+
+    Return: (6 * nkbz, 4) array with the IBZ index of the vertexes of the tetrahedra.
+    """
+    ngkpt = tuple(ngkpt)
+    grid = np.reshape(bz2ibz, ngkpt)
+    i1, i2, i3 = np.indices(ngkpt)
+    # Vertexes of the sub-cells: corner a + 2b + 4c is at (i1 + a, i2 + b, i3 + c).
+    cube = np.stack([grid[(i1 + a) % ngkpt[0], (i2 + b) % ngkpt[1], (i3 + c) % ngkpt[2]].ravel()
+                     for c in (0, 1) for b in (0, 1) for a in (0, 1)], axis=1)
+    tetra_corners = np.array([(0, 1, 3, 7), (0, 1, 5, 7), (0, 2, 3, 7), (0, 2, 6, 7), (0, 4, 5, 7), (0, 4, 6, 7)])
+    return cube[:, tetra_corners].reshape(-1, 4)
+
+
+def _tetra_dos(mesh, eigens, values, max_mem_mb=256):
+    """
+    Compute sum_T V_T f_T g_T(w) with the linear tetrahedron method where g_T is the DOS of tetrahedron T
+    and f_T is the average of ``values`` over the vertexes. All the tetrahedra have the same volume
+    and the DOS of each band is normalized to one.
+
+    Args:
+        mesh: Linear mesh.
+        eigens: (ntetra, 4) array with the energies at the vertexes.
+        values: (ntetra, 4, nvals) array with the quantities at the vertexes.
+        max_mem_mb: Maximum memory (Mb) allocated for the (chunk, nw) arrays.
+
+    Return: (nvals, nw) array.
+    """
+    ntetra = len(eigens)
+    eigens = np.sort(eigens, axis=1)
+    fvals = values.mean(axis=1) / ntetra
+    x = np.reshape(mesh, (1, -1))
+    dos = np.zeros((fvals.shape[1], x.shape[1]))
+
+    chunk = max(1, int(max_mem_mb * 2**20 / (4 * 8 * x.shape[1])))
+    for start in range(0, ntetra, chunk):
+        e1, e2, e3, e4 = (eigens[start:start + chunk, i, None] for i in range(4))
+        # Degenerate vertexes give empty intervals so that the invalid values are never selected.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g = np.where((x > e1) & (x <= e2), 3 * (x - e1) ** 2 / ((e2 - e1) * (e3 - e1) * (e4 - e1)),
+                np.where((x > e2) & (x <= e3),
+                         3 / ((e3 - e1) * (e4 - e1)) * ((e2 - e1) + 2 * (x - e2) -
+                             (e3 - e1 + e4 - e2) * (x - e2) ** 2 / ((e3 - e2) * (e4 - e2))),
+                np.where((x > e3) & (x < e4), 3 * (e4 - x) ** 2 / ((e4 - e1) * (e4 - e2) * (e4 - e3)), 0.0)))
+        dos += fvals[start:start + chunk].T @ g
+
+    return dos
+
+
 class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter):
     """
     This file contains the Fan-Migdal Debye-Waller self-energy, the |ElectronBands| on the k-mesh.
@@ -912,12 +970,12 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
     @lazy_property
     def ebands(self):
         """|ElectronBands| object."""
-        return self.reader.read_ebands()
+        return self.reader.read_ebands(structure=self.structure)
 
-    @property
+    @lazy_property
     def structure(self):
         """|Structure| object."""
-        return self.ebands.structure
+        return self.reader.read_structure()
 
     def close(self):
         """Close the file."""
@@ -1173,21 +1231,44 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         if itemp is not None: df = df[df["tmesh"] == self.tmesh[itemp]]
         return df
 
-    def get_linewidth_dos(self, method="gaussian", e0="fermie", step=0.1, width=0.2):
+    def read_ks_linewidths(self):
+        """
+        Read the KS energies and the linewidths i.e. abs(Im Sigma_eph(e_KS)) for all the states
+        with a single read of ``ks_enes`` and ``vals_e0ks``.
+
+        Return: namedtuple with (nstates,) arrays ``spin``, ``ikcalc``, ``band`` (global index), ``e0`` (eV)
+        and the (nstates, ntemp) array ``linewidths`` (eV).
+        """
+        # nctkarr_t("ks_enes", "dp", "max_nbcalc, nkcalc, nsppol")
+        e0 = self.reader.read_value("ks_enes") * abu.Ha_eV
+        # Entries with ibc >= nbcalc_ks are not used.
+        nbcalc_sk = self.bstop_sk - self.bstart_sk
+        mask = np.arange(e0.shape[-1]) < nbcalc_sk[..., None]
+        spins, ikcs, ibcs = np.nonzero(mask)
+
+        # nctkarr_t("vals_e0ks", "dp", "two, ntemp, max_nbcalc, nkcalc, nsppol")
+        sigc = self.reader.read_value("vals_e0ks", cmode="c")
+        linewidths = np.abs(sigc.imag[mask]) * abu.Ha_eV
+
+        return dict2namedtuple(spin=spins, ikcalc=ikcs, band=self.bstart_sk[spins, ikcs] + ibcs,
+                               e0=e0[mask], linewidths=linewidths)
+
+    def get_linewidth_dos(self, method="gaussian", e0="fermie", step=0.1, width=0.2, max_mem_mb=256):
         """
         Calculate linewidth density of states
 
         Args:
             method: String defining the method for the computation of the DOS.
+                "gaussian" or "tetra". The linear tetrahedron method requires the self-energy
+                for all the k-points of a Gamma-centered mesh in the IBZ.
             step: Energy step (eV) of the linear mesh.
             width: Standard deviation (eV) of the gaussian.
+            max_mem_mb: Maximum memory (Mb) allocated for the broadening kernels.
 
-        Returns: |ElectronDos| object.
+        Returns: List of |ElectronDos| objects, one for each temperature.
         """
-
         ebands = self.ebands
         ntemp = self.ntemp
-        tmesh = self.tmesh
 
         #Compute linear mesh
         nelect = ebands.nelect
@@ -1200,18 +1281,43 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         nw = int(1 + (e_max - e_min) / step)
         mesh, step = np.linspace(e_min, e_max, num=nw, endpoint=True, retstep=True)
 
+        states = self.read_ks_linewidths()
+        dos = np.zeros((ntemp, self.nsppol, nw))
+
         #get dos
         if method == "gaussian":
-            dos = np.zeros((ntemp,self.nsppol,nw))
+            weights = ebands.kpoints.weights[self.kcalc2ibz[states.ikcalc]]
+            wlws = weights[:, None] * states.linewidths
+            # Gaussians for chunks of states: (chunk, nw) array.
+            chunk = max(1, int(max_mem_mb * 2**20 / (8 * nw)))
             for spin in range(self.nsppol):
-                for i, ik in enumerate(self.kcalc2ibz):
-                    weight = ebands.kpoints.weights[ik]
-                    for band in range(self.bstart_sk[spin, i], self.bstop_sk[spin, i]):
-                        qp = self.reader.read_qp(spin,i,band)
-                        e0 = qp.e0
-                        for it in range(ntemp):
-                            linewidth = abs(qp.fan0.imag[it])
-                            dos[it,spin] += weight * linewidth * gaussian(mesh, width, center=e0)
+                inds = np.nonzero(states.spin == spin)[0]
+                for start in range(0, len(inds), chunk):
+                    sl = inds[start:start + chunk]
+                    gs = gaussian(mesh[None, :], width, center=states.e0[sl, None])
+                    dos[:, spin] += wlws[sl].T @ gs
+
+        elif method == "tetra":
+            ngkpt, shifts = ebands.kpoints.mpdivs_shifts
+            if ngkpt is None or len(shifts) != 1 or np.any(shifts != 0) or self.nkcalc != ebands.nkpt:
+                raise ValueError("The tetrahedron method requires the self-energy "
+                                 "for all the k-points of a Gamma-centered mesh in the IBZ")
+            has_timrev = has_timrev_from_kptopt(ebands.kpoints.ksampling.kptopt)
+            bz2ibz = map_grid2ibz(self.structure, ebands.kpoints.frac_coords, ngkpt, has_timrev)
+            tetra = _tetra_vertexes(bz2ibz, ngkpt)
+
+            # Use the bands that are available for all the k-points.
+            bstart, bstop = self.reader.max_bstart, self.reader.min_bstop
+            enes = np.zeros((self.nsppol, ebands.nkpt, bstop - bstart))
+            lws = np.zeros((self.nsppol, ebands.nkpt, bstop - bstart, ntemp))
+            sel = (states.band >= bstart) & (states.band < bstop)
+            idx = (states.spin[sel], self.kcalc2ibz[states.ikcalc[sel]], states.band[sel] - bstart)
+            enes[idx], lws[idx] = states.e0[sel], states.linewidths[sel]
+
+            for spin in range(self.nsppol):
+                for ib in range(bstop - bstart):
+                    dos[:, spin] += _tetra_dos(mesh, enes[spin, tetra, ib], lws[spin, tetra, ib],
+                                               max_mem_mb=max_mem_mb)
         else:
             raise NotImplementedError("Method %s is not supported" % method)
 
@@ -1238,8 +1344,7 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
                 cprint("sigres.structure and ks_ebands_kpath.structures differ. Check your files!", "red")
             # nctkarr_t("ks_enes", "dp", "max_nbcalc, nkcalc, nsppol")
             ks_enes = self.reader.read_value("ks_enes") * abu.Ha_to_eV
-            for itemp in range(self.ntemp):
-                qpes[:, :, :, itemp] -= ks_enes
+            qpes -= ks_enes[..., np.newaxis]
 
         # Note there's no guarantee that the sigma_kpoints and the corrections have the same k-point index.
         # Be careful because the order of the k-points and the band range stored in the SIGRES file may differ ...
@@ -1247,64 +1352,65 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         nkpoints = len(self.sigma_kpoints)
         nbands = self.reader.bstop_sk.max()
         qpes_new = np.zeros((self.nsppol,nkpoints,nbands,self.ntemp),dtype=np.complex)
-        for spin in range(self.nsppol):
-            for i,ik in enumerate(self.kcalc2ibz):
-                for nb,band in enumerate(range(self.bstart_sk[spin, i], self.bstop_sk[spin, i])):
-                    qpes_new[spin,ik,band] = qpes[spin,ik,nb]
+        # Scatter qpes[spin, ikc, ibc] to qpes_new[spin, ikc, bstart + ibc] for all the computed states.
+        nbcalc_sk = self.bstop_sk - self.bstart_sk
+        spins, ikcs, ibcs = np.nonzero(np.arange(qpes.shape[2]) < nbcalc_sk[..., np.newaxis])
+        qpes_new[spins, ikcs, self.bstart_sk[spins, ikcs] + ibcs] = qpes[spins, ikcs, ibcs]
 
         return qpes_new
 
     def get_lifetimes_boltztrap(self, basename, workdir=None):
         """
         Get basename.tau and basename.energy text files to be used in Boltztrap code
-        for transport calculations
+        for transport calculations. Use :meth:`get_bolztrap` to pass the lifetimes to
+        Boltztrap2 in memory without producing intermediate files.
 
         Args:
             basename: The basename of the files to be produced
             workdir: Directory where files will be produced. None for current working directory.
         """
-        #TODO move this to AbipyBoltztrap class
         workdir = os.getcwd() if workdir is None else str(workdir)
 
-        # get the lifetimes as an array
+        # get the lifetimes as an array (the k-axis is the index of the sigma k-points)
         qpes = self.get_qp_array(mode='ks+lifetimes')
 
         # read from this class
         nspn    = self.nspden
-        nkpt    = self.nkpt
-        kpoints = self.kpoints
+        nkpt    = len(self.sigma_kpoints)
+        kpoints = np.reshape(self.sigma_kpoints.frac_coords, (nkpt, 3))
         bstart  = self.reader.max_bstart
         bstop   = self.reader.min_bstop
-        ntemp   = self.ntemp
         tmesh   = self.tmesh
         fermie  = self.ebands.fermie * abu.eV_Ry
         struct  = self.ebands.structure
 
-        def write_file(filename, tag, function, T=None):
-            """Function to write files for BoltzTraP"""
+        # Each k-point is formatted in a single call: k-point line followed by nband values.
+        nband = bstop - bstart
+        kfmt = '%20.12e '*3 + '%d !kpt nband\n' % nband + '%20.12e\n' * nband
+
+        def write_file(filename, tag, values, T=None):
+            """
+            Function to write files for BoltzTraP.
+            values: [nspn, nkpt, nband] array with the values to be written.
+            """
             with open(os.path.join(workdir, filename), 'wt') as f:
                 ttag = ' for T=%12.6lf'%T if T else ''
                 f.write('BoltzTraP %s file generated by abipy%s.\n' % (tag,ttag))
                 f.write('%5d %5d %20.12e ! nk, nspin : lifetimes below in s \n' % (nkpt, nspn, fermie))
                 for ispin in range(nspn):
-                    for ik in range(nkpt):
-                        kpt = kpoints[ik]
-                        fmt = '%20.12e '*3 + '%d !kpt nband\n' % (bstop-bstart)
-                        f.write(fmt % tuple(kpt))
-                        for ibnd in range(bstart,bstop):
-                            f.write('%20.12e\n' % (function(qpes[ispin,ik,ibnd,itemp])))
+                    rows = np.concatenate((kpoints, values[ispin]), axis=1)
+                    f.write("".join(kfmt % tuple(row) for row in rows))
 
         # write tau
-        for itemp in range(ntemp):
-            T = tmesh[itemp]
+        with np.errstate(divide="ignore"):
+            taus = 1.0 / (2 * np.abs(qpes[:nspn, :, bstart:bstop].imag) * abu.eV_s)
+        for itemp, T in enumerate(tmesh):
             filename_tau = basename + '_%dK_BLZTRP.tau_k' % T
-            function = lambda x: 1.0/(2*abs(x.imag)*abu.eV_s)
-            write_file(filename_tau, 'tau_k', function,T)
+            write_file(filename_tau, 'tau_k', taus[..., itemp], T)
 
-        # write energies
+        # write energies (the real part does not depend on T, the last temperature is used as before)
         filename_ene = basename + '_BLZTRP.energy'
-        function = lambda x: x.real * abu.eV_Ry
-        write_file(filename_ene, 'eigen-enegies', function)
+        write_file(filename_ene, 'eigen-enegies', qpes[:nspn, :, bstart:bstop, -1].real * abu.eV_Ry)
 
         # write structure
         fmt3 = "%20.12e "*3 + '\n'
@@ -1409,47 +1515,44 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         qpes = self.get_qp_array(ks_ebands_kpath=ks_ebands_kpath,mode=mode)
 
         # Build interpolator for QP corrections.
-        from abipy.core.skw import SkwInterpolator
+        from abipy.core.skw import SkwInterpolator, average_over_degs
         cell = (self.structure.lattice.matrix, self.structure.frac_coords, self.structure.atomic_numbers)
         has_timrev = has_timrev_from_kptopt(self.reader.read_value("kptopt"))
 
-        qp_ebands_kpath_t, qp_ebands_kmesh_t, interpolators_t = [], [], []
+        # Real and imaginary part for all the temperatures: [2, ntemp, nsppol, nkpt, nband]
         itemp_list = list(range(self.ntemp)) if itemp_list is None else duck.list_ints(itemp_list)
-        for itemp in itemp_list:
-            skw_reim = []
-            for reim in ("real", "imag"):
-                qpdata = qpes[:, :, bstart:bstop, itemp]
-                qpdata = getattr(qpdata, reim).copy()
-
-                skw = SkwInterpolator(lpratio, gw_kcoords, qpdata, self.ebands.fermie, self.ebands.nelect,
-                                      cell, fm_symrel, has_timrev,
-                                      filter_params=filter_params, verbose=verbose)
-                skw_reim.append(skw)
-
-                if ks_ebands_kpath is None:
-                    # Interpolate QP energies.
-                    if reim == "real":
-                        eigens_kpath = skw.interp_kpts(kfrac_coords).eigens
-                    else:
-                        lw_kpath = skw.interp_kpts(kfrac_coords).eigens
-                else:
-                    # Interpolate QP energies corrections and add them to KS.
-                    ref_eigens = ks_ebands_kpath.eigens[:, :, bstart:bstop]
-                    qp_corrs = skw.interp_kpts_and_enforce_degs(kfrac_coords, ref_eigens, atol=ks_degatol).eigens
-                    if reim == "real":
-                        eigens_kpath = qp_corrs if only_corrections else ref_eigens + qp_corrs
-                    else:
-                        lw_kpath = qp_corrs
+        qpdata = np.moveaxis(qpes[:, :, bstart:bstop][..., itemp_list], -1, 0)
+        qpdata = np.array([qpdata.real, qpdata.imag])
+
+        # The star functions and the factorization of H(k,k') do not depend on the data
+        # so that all the datasets are fitted with a single call and evaluated in one batched pass.
+        skw = SkwInterpolator(lpratio, gw_kcoords, qpdata[0, 0], self.ebands.fermie, self.ebands.nelect,
+                              cell, fm_symrel, has_timrev,
+                              filter_params=filter_params, verbose=verbose)
+        coefs = skw.get_coefs(qpdata)
+        interpolators_t = [[skw.new_with_data(qpdata[reim, it], coefs=coefs[reim, it]) for reim in range(2)]
+                           for it in range(len(itemp_list))]
 
-                if ks_ebands_kmesh is not None:
-                    # Interpolate QP energies corrections and add them to KS
-                    ref_eigens = ks_ebands_kmesh.eigens[:, :, bstart:bstop]
-                    if reim == "real":
-                        eigens_kmesh = skw.interp_kpts_and_enforce_degs(dos_kcoords, ref_eigens, atol=ks_degatol).eigens
-                    else:
-                        linewidths_kmesh = skw.interp_kpts(dos_kcoords).eigens
+        if ks_ebands_kpath is None:
+            # Interpolate QP energies.
+            values_kpath = skw.eval_coefs(kfrac_coords, coefs)
+        else:
+            # Interpolate QP energies corrections and add them to KS.
+            ref_eigens = ks_ebands_kpath.eigens[:, :, bstart:bstop]
+            values_kpath = average_over_degs(skw.eval_coefs(kfrac_coords, coefs), ref_eigens, ks_degatol)
+            if not only_corrections: values_kpath[0] += ref_eigens
 
-            interpolators_t.append(skw_reim)
+        if ks_ebands_kmesh is not None:
+            # Interpolate QP energies corrections and add them to KS
+            ref_eigens = ks_ebands_kmesh.eigens[:, :, bstart:bstop]
+            values_kmesh = skw.eval_coefs(dos_kcoords, coefs)
+            values_kmesh[0] = average_over_degs(values_kmesh[0], ref_eigens, ks_degatol)
+
+        qp_ebands_kpath_t, qp_ebands_kmesh_t = [], []
+        for it in range(len(itemp_list)):
+            eigens_kpath, lw_kpath = values_kpath[0, it], values_kpath[1, it]
+            if ks_ebands_kmesh is not None:
+                eigens_kmesh, linewidths_kmesh = values_kmesh[0, it], values_kmesh[1, it]
 
             # Build new ebands object with k-path.
             kpts_kpath = Kpath(self.structure.reciprocal_lattice, kfrac_coords, weights=None, names=knames)
@@ -1769,28 +1872,19 @@ class SigEPhFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         # nctkarr_t("gfw_vals", "dp", "gfw_nomega, three, max_nbcalc, nkcalc, nsppol")
         # 1:   gkk^2 with delta(en - em)
         # 2:3 (Fan-Migdal/DW contribution)
-        # Access arrays directly instead of using read_a2feph_skb because it's gonna be faster.
-        #a2f = self.reader.read_a2feph_skb(spin, kpoint, band)
-        wmesh = self.reader.read_value("gfw_mesh") * abu.Ha_eV
-        vals = self.reader.read_value("gfw_vals") * abu.Ha_eV # TODO check units
+        # The sum over states is performed by the reader block by block.
+        if what not in ("gkq2", "fandw"):
+            raise ValueError("Invalid value for what: `%s`" % what)
+        ylabel = what
+        wmesh = self.reader.gfw_mesh
 
         xlabel = "Energy (eV)"
         for spin in range(self.nsppol):
-            asum = np.zeros(self.reader.gfw_nomega)
             spin_sign = +1 if spin == 0 else -1
-            for ikc, kpoint in enumerate(self.sigma_kpoints):
-                # This is not an integral in the BZ.
-                wtk = 1.0 / len(self.sigma_kpoints)
-                for band in range(self.bstart_sk[spin, ikc], self.bstop_sk[spin, ikc]):
-                    if what == "gkq2":
-                        vs = vals[spin, ikc, band, 0]
-                        ylabel = what
-                    elif what == "fandw":
-                        vs = vals[spin, ikc, band, 1:3, :].sum(axis=0)
-                        ylabel = what
-                    else:
-                        raise ValueError("Invalid value for what: `%s`" % what)
-                    asum += (spin_sign * wtk) * vs
+            # This is not an integral in the BZ.
+            wtk = np.full(self.nkcalc, 1.0 / len(self.sigma_kpoints))
+            vals = self.reader.sum_over_states("gfw_vals", spin, wtk=wtk) * abu.Ha_eV # TODO check units
+            asum = spin_sign * (vals[0] if what == "gkq2" else vals[1:3].sum(axis=0))
 
             xs, ys = wmesh, asum
             if exchange_xy: xs, ys = ys, xs
@@ -1911,6 +2005,8 @@ for spin in range(ncfile.nsppol):
 class SigEPhRobot(Robot, RobotWithEbands):
     """
     This robot analyzes the results contained in multiple SIGEPH.nc files.
+    The blocks of states cached by the readers share the process-wide budget
+    ``SigmaPhReader.max_cache_mb`` so that memory does not grow with the number of files.
 
     .. rubric:: Inheritance Diagram
     .. inheritance-diagram:: SigEPhRobot
@@ -2723,6 +2819,18 @@ class SigmaPhReader(BaseEphReader):
     .. rubric:: Inheritance Diagram
     .. inheritance-diagram:: SigmaPhReader
     """
+    # Max size in Mb of the hyperslab read for a block of k-points.
+    block_mb = 16
+
+    # Max size in Mb of the blocks kept in memory by read_state_block.
+    # The budget is shared by all the readers of the process (e.g. the files of a SigEPhRobot)
+    # so that the memory used by the cache is bounded by max_cache_mb + the size of the last block read.
+    max_cache_mb = 64
+
+    # Process-wide LRU cache: (reader_id, varname, spin, iblock, itemp, kbsize) --> block.
+    _BLOCK_CACHE = OrderedDict()
+    _reader_ids = itertools.count()
+
     def __init__(self, path):
         super(SigmaPhReader, self).__init__(path)
 
@@ -2762,6 +2870,121 @@ class SigmaPhReader(BaseEphReader):
         # This quantity is optional, 0 means *not available*
         self.gfw_nomega = self.read_dimvalue("gfw_nomega", default=0)
 
+        # Unique id used to store the blocks of this reader in the process-wide cache. See read_state_block.
+        self._reader_id = next(SigmaPhReader._reader_ids)
+
+    def close(self):
+        """Close the file and release the blocks of states cached by this reader."""
+        self.clear_block_cache()
+        super(SigmaPhReader, self).close()
+
+    def _cached_blocks(self):
+        """List with the blocks of this reader stored in the process-wide cache."""
+        return [b for k, b in self._BLOCK_CACHE.items() if k[0] == self._reader_id]
+
+    def clear_block_cache(self):
+        """Release the blocks of states cached by ``read_state_block`` for this reader."""
+        cache = self._BLOCK_CACHE
+        for key in [k for k in cache if k[0] == self._reader_id]:
+            cache.pop(key)
+
+    def get_kblock_size(self, varname):
+        """
+        Number of self-energy k-points per block for the variable ``varname``
+        dimensioned as [nsppol, nkcalc, max_nbcalc, ...] so that a block is smaller than ``block_mb``.
+        """
+        var = self.read_variable(varname)
+        nbytes = var.dtype.itemsize * np.prod(var.shape[2:], dtype=np.int)
+        return int(max(1, min(self.nkcalc, self.block_mb * 1024 ** 2 // max(nbytes, 1))))
+
+    def read_state_block(self, varname, spin, iblock, itemp=None):
+        """
+        Read the block of states with k-points in [iblock * kbsize, (iblock + 1) * kbsize[ and all the bands
+        (kbsize is given by ``get_kblock_size``) for variable ``varname`` dimensioned as
+        [nsppol, nkcalc, max_nbcalc, ...] with one hyperslab. Blocks are cached with a LRU policy
+        so that accessing the states of the same block does not trigger other IO operations.
+        The cache is shared by all the readers and its size is bounded by ``max_cache_mb``.
+
+        Args:
+            varname: Name of the netcdf variable.
+            spin: Spin index.
+            iblock: Index of the block.
+            itemp: If not None, only the temperature with index itemp is read.
+                Requires a variable dimensioned as [nsppol, nkcalc, max_nbcalc, ntemp, ...].
+
+        Return: |numpy-array| with shape [nk_block, max_nbcalc, ...] in Abinit units.
+        """
+        # Include the block size in the key as block_mb may change.
+        kbsize = self.get_kblock_size(varname)
+        key = (self._reader_id, varname, spin, iblock, itemp, kbsize)
+        cache = self._BLOCK_CACHE
+        if key in cache:
+            cache[key] = cache.pop(key)
+            return cache[key]
+
+        var = self.read_variable(varname)
+        kslice = slice(iblock * kbsize, min((iblock + 1) * kbsize, self.nkcalc))
+        if itemp is None:
+            block = var[spin, kslice]
+        else:
+            if var.ndim < 4 or var.dimensions[3] != "ntemp":
+                raise ValueError("Variable `%s` does not depend on temperature" % varname)
+            block = var[spin, kslice, :, itemp]
+        block = np.asarray(block)
+
+        # Remove the least recently used blocks (of any reader) so that the cache does not exceed max_cache_mb.
+        max_nbytes = self.max_cache_mb * 1024 ** 2 - block.nbytes
+        while cache and sum(b.nbytes for b in cache.values()) > max_nbytes:
+            cache.popitem(last=False)
+        cache[key] = block
+        return block
+
+    def read_state(self, varname, spin, ikc, ibc, itemp=None):
+        """
+        Return the entry of variable ``varname`` for the state (spin, ikc, ibc) where
+        ikc is the index of the k-point in sigma_kpoints and ibc the index of the band in [0, nbcalc_sk[spin, ikc][.
+        The block of states containing (spin, ikc) is read and cached by ``read_state_block``.
+        """
+        kbsize = self.get_kblock_size(varname)
+        return self.read_state_block(varname, spin, ikc // kbsize, itemp=itemp)[ikc % kbsize, ibc]
+
+    def iter_state_blocks(self, varname, spin, itemp=None):
+        """
+        Iterate over the blocks of k-points of variable ``varname``.
+        Yields (ikstart, ikstop, block) where block has shape [ikstop - ikstart, max_nbcalc, ...].
+        """
+        kbsize = self.get_kblock_size(varname)
+        for iblock, ikstart in enumerate(range(0, self.nkcalc, kbsize)):
+            yield ikstart, min(ikstart + kbsize, self.nkcalc), self.read_state_block(varname, spin, iblock, itemp=itemp)
+
+    def sum_over_states(self, varname, spin, itemp=None, wtk=None):
+        """
+        Sum the entries of variable ``varname`` over the states computed for this spin.
+        The sum is performed block by block so that only a few blocks are kept in memory.
+
+        Args:
+            varname: Name of the netcdf variable dimensioned as [nsppol, nkcalc, max_nbcalc, ...].
+            spin: Spin index.
+            itemp: If not None, only the temperature with index itemp is considered.
+            wtk: Weights for the k-points in sigma_kpoints. Default: 1.
+
+        Return: |numpy-array| with shape var.shape[3:] (var.shape[4:] if itemp is not None) in Abinit units.
+        """
+        wtk = np.ones(self.nkcalc) if wtk is None else np.asarray(wtk)
+        asum = 0
+        for ikstart, ikstop, block in self.iter_state_blocks(varname, spin, itemp=itemp):
+            # Entries with band index >= nbcalc_sk[spin, ikc] are not used.
+            nbcalc = self.nbcalc_sk[spin, ikstart:ikstop]
+            mask = np.arange(block.shape[1])[None, :] < nbcalc[:, None]
+            weights = np.where(mask, wtk[ikstart:ikstop, None], 0.0)
+            asum = asum + np.tensordot(weights, block, axes=([0, 1], [0, 1]))
+        return asum
+
+    @lazy_property
+    def gfw_mesh(self):
+        """Frequency mesh for the Eliashberg functions in eV."""
+        return self.read_value("gfw_mesh") * abu.Ha_eV
+
     def get_sigma_skb_kpoint(self, spin, kpoint, band):
         """
         Check k-point, band and spin index. Raise ValueError if invalid.
@@ -2826,31 +3049,32 @@ class SigmaPhReader(BaseEphReader):
         # wrmesh_b(nwr, max_nbcalc, nkcalc, nsppol)
         # Frequency mesh along the real axis (Ha units) used for the different bands
         #print(spin, ikc, ib, self.read_variable("wrmesh_b").shape)
-        wmesh = self.read_variable("wrmesh_b")[spin, ikc, ib, :] * abu.Ha_eV
+        wmesh = self.read_state("wrmesh_b", spin, ikc, ib) * abu.Ha_eV
 
         # complex(dpc) :: vals_e0ks(ntemp, max_nbcalc, nkcalc, nsppol)
         # Sigma_eph(omega=eKS, kT, band)
-        vals_e0ks = self.read_variable("vals_e0ks")[spin, ikc, ib, :, :] * abu.Ha_eV
+        vals_e0ks = self.read_state("vals_e0ks", spin, ikc, ib) * abu.Ha_eV
         vals_e0ks = vals_e0ks[:, 0] + 1j * vals_e0ks[:, 1]
 
         # complex(dpc) :: dvals_de0ks(ntemp, max_nbcalc, nkcalc, nsppol)
         # d Sigma_eph(omega, kT, band, kcalc, spin) / d omega (omega=eKS)
-        dvals_de0ks = self.read_variable("dvals_de0ks")[spin, ikc, ib, :, :]
+        dvals_de0ks = self.read_state("dvals_de0ks", spin, ikc, ib)
         dvals_de0ks = dvals_de0ks[:, 0] + 1j * dvals_de0ks[:, 1]
 
         # real(dp) :: dw_vals(ntemp, max_nbcalc, nkcalc, nsppol)
         # Debye-Waller term (static).
-        dw_vals = self.read_variable("dw_vals")[spin, ikc, ib, :] * abu.Ha_eV
+        dw_vals = self.read_state("dw_vals", spin, ikc, ib) * abu.Ha_eV
 
         # complex(dpc) :: vals_wr(nwr, ntemp, max_nbcalc, nkcalc, nsppol)
         # Sigma_eph(omega, kT, band) for given (k, spin).
         # Note: enk_KS corresponds to nwr/2 + 1.
-        vals_wr = self.read_variable("vals_wr")[spin, ikc, ib, :, :, :] * abu.Ha_eV
+        # Big arrays are read in blocks of states (one hyperslab) and cached.
+        vals_wr = self.read_state("vals_wr", spin, ikc, ib) * abu.Ha_eV
         vals_wr = vals_wr[:, :, 0] + 1j * vals_wr[:, :, 1]
 
         # Spectral function
         # nctkarr_t("spfunc_wr", "dp", "nwr, ntemp, max_nbcalc, nkcalc, nsppol")
-        spfunc_wr = self.read_variable("spfunc_wr")[spin, ikc, ib, :, :] / abu.Ha_eV
+        spfunc_wr = self.read_state("spfunc_wr", spin, ikc, ib) / abu.Ha_eV
 
         # Read QP data. Note band instead of ib index.
         qp = self.read_qp(spin, ikc, band)
@@ -2885,13 +3109,11 @@ class SigmaPhReader(BaseEphReader):
         # nctkarr_t("gfw_vals", "dp", "gfw_nomega, three, max_nbcalc, nkcalc, nsppol")
         # 1:   gkk^2 with delta(en - em)
         # 2:3 (Fan-Migdal/DW contribution)
-        wmesh = self.read_value("gfw_mesh") * abu.Ha_eV
-        #values = self.read_value("gfw_vals") # * abu.Ha_eV # TODO
+        wmesh = self.gfw_mesh
 
-        # Get a2f_{sbk}(w)
+        # Get a2f_{sbk}(w) from the (cached) block of states.
         spin, ikc, ibc, kpoint = self.get_sigma_skb_kpoint(spin, kpoint, band)
-        var = self.read_variable("gfw_vals")
-        values = var[spin, ikc, ibc]  * abu.Ha_eV # TODO check units
+        values = self.read_state("gfw_vals", spin, ikc, ibc) * abu.Ha_eV # TODO check units
         gkq2, fan, dw = values[0], values[1], values[2]
 
         return A2feph(wmesh, gkq2, fan, dw, spin, kpoint, band)
@@ -59,6 +59,21 @@ class A2fFileTest(AbipyTest):
         #self.assert_almost_equal(tc, )
         mustar = a2f.get_mustar_from_tc(tc)
         self.assert_almost_equal(mustar, 0.1)
+
+        # Batched moments and Tc(mustar)
+        moments = a2f.get_moment(n=[0, 1, 2])
+        self.assert_almost_equal(moments, [a2f.lambda_iso, m1, a2f.get_moment(n=2)])
+        lambdaw_nu = a2f.get_moment_nu(n=0, cumulative=True)
+        assert lambdaw_nu.shape == (a2f.nmodes, len(a2f.mesh))
+        self.assert_almost_equal(lambdaw_nu[1], a2f.get_moment_nu(n=0, nu=1, cumulative=True))
+        self.assert_almost_equal(lambdaw_nu[:, -1].sum(), a2f.lambda_iso)
+        mustar_values = np.linspace(0.1, 0.2, num=5)
+        tc_values = a2f.get_mcmillan_tc(mustar_values)
+        assert tc_values.shape == (5,)
+        self.assert_almost_equal(tc_values[0], tc)
+        self.assert_almost_equal(a2f.get_mustar_from_tc(tc_values), mustar_values)
+        assert a2f.omega2 > 0
+        assert np.all(a2f.get_allen_dynes_tc(mustar_values) > 0)
         #self.assert_almost_equal(a2f.get_mcmillan_tc(mustar), tc)
 
         assert not ncfile.has_a2ftr
@@ -110,6 +125,15 @@ class A2fRobotTest(AbipyTest):
             data = robot.get_dataframe(with_geo=True)
             assert "lambda_qcoarse" in data and "omegalog_qintp" in data
 
+            # Data computed from the stacked a2F(w) of all files.
+            a2f = robot.abifiles[0].a2f_qintp
+            a2f_data = robot.get_a2f_data("qintp", mustar=[0.1, 0.12, 0.15])
+            self.assert_almost_equal(a2f_data.lambda_iso, [a2f.lambda_iso] * 2)
+            self.assert_almost_equal(a2f_data.omega_log, [a2f.omega_log] * 2)
+            assert a2f_data.tc_mcmillan.shape == (2, 3)
+            self.assert_almost_equal(a2f_data.tc_mcmillan[1], a2f.get_mcmillan_tc([0.1, 0.12, 0.15]))
+            self.assert_almost_equal(a2f_data.tc_allen_dynes[0], a2f.get_allen_dynes_tc([0.1, 0.12, 0.15]))
+
             # Mixin
             phbands_plotter = robot.get_phbands_plotter()
             data = robot.get_phbands_dataframe()
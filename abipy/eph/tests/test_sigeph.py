@@ -5,6 +5,7 @@ import os
 import collections
 import numpy as np
 import abipy.data as abidata
+import abipy.core.abinit_units as abu
 
 from abipy.core.testing import AbipyTest
 from abipy import abilab
@@ -118,6 +119,56 @@ class SigEPhFileTest(AbipyTest):
         if self.has_matplotlib():
             assert sigma.plot_tdep(show=False)
 
+        # Blocks of states are read with one hyperslab and cached.
+        r = sigeph.reader
+        r.clear_block_cache()
+        spfunc_wr = r.read_value("spfunc_wr")
+        self.assert_almost_equal(sigma.spfunc_wr, spfunc_wr[0, 1, 3] / abu.Ha_eV)
+        self.assert_almost_equal(r.read_state("spfunc_wr", 0, 1, 2, itemp=3), spfunc_wr[0, 1, 2, 3])
+        assert 0 < sum(b.nbytes for b in r._cached_blocks()) <= r.max_cache_mb * 1024 ** 2
+        with self.assertRaises(ValueError):
+            r.read_state_block("wrmesh_b", 0, 0, itemp=0)
+        # Streaming sum over states with small blocks (one k-point per block).
+        r.block_mb = 1e-6
+        assert r.get_kblock_size("spfunc_wr") == 1
+        wtk = np.arange(1, r.nkcalc + 1)
+        ref = np.einsum("k,kbtw->tw", wtk, spfunc_wr[0, :, :r.nbcalc_sk[0].max()])
+        self.assert_almost_equal(r.sum_over_states("spfunc_wr", 0, wtk=wtk), ref)
+        self.assert_almost_equal(r.sum_over_states("spfunc_wr", 0, itemp=2, wtk=wtk), ref[2])
+        r.block_mb = type(r).block_mb
+        # Blocks cached with the previous block size are not reused.
+        assert r.get_kblock_size("spfunc_wr") == r.nkcalc
+        self.assert_almost_equal(r.read_state("spfunc_wr", 0, 1, 2, itemp=2), spfunc_wr[0, 1, 2, 2])
+        # The size of the cache is bounded.
+        from abipy.eph.sigeph import SigmaPhReader
+        SigmaPhReader.max_cache_mb = 1e-3
+        try:
+            for ikc in range(r.nkcalc):
+                r.read_state("spfunc_wr", 0, ikc, 0)
+            assert len(r._cached_blocks()) == 1
+        finally:
+            SigmaPhReader.max_cache_mb = 64
+        r.clear_block_cache()
+        assert not r._cached_blocks()
+
+        # The budget is shared by all the readers of the process.
+        other = SigmaPhReader(sigeph.filepath)
+        r.read_state("spfunc_wr", 0, 0, 0)
+        other.read_state("spfunc_wr", 0, 0, 0)
+        assert len(r._cached_blocks()) == 1 and len(other._cached_blocks()) == 1
+        nbytes = r._cached_blocks()[0].nbytes
+        SigmaPhReader.max_cache_mb = 1.5 * nbytes / 1024 ** 2
+        try:
+            # The block of `other` is now the least recently used one and is evicted to make room.
+            r.read_state("spfunc_wr", 0, 1, 1)
+            r.read_state("spfunc_wr", 0, 1, 1, itemp=0)
+            assert sum(b.nbytes for b in SigmaPhReader._BLOCK_CACHE.values()) <= 1.5 * nbytes
+            assert not other._cached_blocks() and len(r._cached_blocks()) == 2
+        finally:
+            SigmaPhReader.max_cache_mb = 64
+        other.close()
+        r.clear_block_cache()
+
         # Test QpTempState
         qp = sigeph.reader.read_qp(spin=0, kpoint=0, band=3, ignore_imag=False)
         repr(qp); str(qp)
@@ -185,6 +236,28 @@ class SigEPhFileTest(AbipyTest):
 
         print(sigeph.kcalc2ibz)
         dos = sigeph.get_linewidth_dos()
+        assert len(dos) == sigeph.ntemp
+
+        # Compare with the linewidths of the QP states.
+        states = sigeph.read_ks_linewidths()
+        assert len(states.e0) == np.sum(sigeph.bstop_sk - sigeph.bstart_sk)
+        qp = sigeph.reader.read_qp(states.spin[3], states.ikcalc[3], states.band[3])
+        self.assert_almost_equal(states.e0[3], qp.e0)
+        self.assert_almost_equal(states.linewidths[3], np.abs(qp.fan0.imag))
+
+        # Integral of the linewidth DOS.
+        weights = sigeph.ebands.kpoints.weights[sigeph.kcalc2ibz[states.ikcalc]]
+        mesh = dos[-1].spin_dos[0].mesh
+        integ = np.sum(dos[-1].spin_dos[0].values) * (mesh[1] - mesh[0])
+        self.assert_almost_equal(integ, np.sum(weights * states.linewidths[:, -1]), decimal=3)
+
+        qpes = sigeph.get_qp_array(mode="ks+lifetimes")
+        self.assert_almost_equal(np.abs(qpes[states.spin, states.ikcalc, states.band].imag), states.linewidths)
+        self.assert_almost_equal(qpes[states.spin, states.ikcalc, states.band, 0].real, states.e0)
+
+        # The tetrahedron method requires all the k-points in the IBZ.
+        with self.assertRaises(ValueError):
+            sigeph.get_linewidth_dos(method="tetra")
 
         sigeph.close()
 
@@ -240,6 +313,19 @@ class SigEPhFileTest(AbipyTest):
         sigeph.get_lifetimes_boltztrap("diamond", workdir=self.mkdtemp())
         sigeph.close()
 
+        # Self-energy computed for a subset of the IBZ (nkcalc < nkpt).
+        with abilab.abiopen(abidata.ref_file("diamond_444q_SIGEPH.nc")) as sigeph:
+            assert len(sigeph.sigma_kpoints) < sigeph.nkpt
+            workdir = self.mkdtemp()
+            sigeph.get_lifetimes_boltztrap("diamond", workdir=workdir)
+            with open(os.path.join(workdir, "diamond_BLZTRP.energy"), "rt") as fh:
+                lines = fh.readlines()
+            assert int(lines[1].split()[0]) == len(sigeph.sigma_kpoints)
+            nband = sigeph.reader.min_bstop - sigeph.reader.max_bstart
+            for ik, kpoint in enumerate(sigeph.sigma_kpoints):
+                tokens = lines[2 + ik * (nband + 1)].split()
+                self.assert_almost_equal([float(t) for t in tokens[:3]], kpoint.frac_coords)
+
     def test_sigeph_robot(self):
         """Tests for SigEPhRobot."""
         filepaths = [
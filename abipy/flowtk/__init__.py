@@ -27,7 +27,7 @@ except ImportError:
 from pymatgen.io.abinit.works import *
 from pymatgen.io.abinit.flows import (Flow, G0W0WithQptdmFlow, bandstructure_flow, PhononFlow,
     g0w0_flow, phonon_flow, phonon_conv_flow, NonLinearCoeffFlow)
-from pymatgen.io.abinit.abitimer import AbinitTimerParser, AbinitTimerSection
+from pymatgen.io.abinit.abitimer import AbinitTimerParser, AbinitTimerSection, ParallelEfficiency
 from pymatgen.io.abinit.abiinspect import GroundStateScfCycle, D2DEScfCycle
 
 from abipy.flowtk.works import *
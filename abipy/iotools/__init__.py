@@ -1,9 +1,11 @@
 # coding: utf-8
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import time
 import numpy as np
 import pymatgen.io.abinit.netcdf as ionc
 
+from collections import OrderedDict
 from monty.functools import lazy_property
 from pymatgen.core.periodic_table import Element
 from .xsf import *
@@ -27,6 +29,49 @@ class ETSF_Reader(ionc.ETSF_Reader):
         from abipy.core.structure import Structure
         return Structure.from_file(self.path)
 
+    @lazy_property
+    def read_stats(self):
+        """
+        :class:`OrderedDict` mapping the name of the variables read with ``read_value``
+        (or by slicing the variable returned by ``read_variable``)
+        to a list [number_of_reads, total_time_in_s, total_nbytes].
+        """
+        return OrderedDict()
+
+    def read_value(self, varname, path="/", cmode=None, default=ionc.NO_DEFAULT):
+        """
+        Overrides the ``read_value`` method of pymatgen so that we can record
+        the number of reads, the wall-time and the number of bytes for each variable.
+        """
+        start = time.time()
+        # pymatgen calls read_variable: don't record the same read twice.
+        self._in_read_value = True
+        try:
+            value = super(ETSF_Reader, self).read_value(varname, path=path, cmode=cmode, default=default)
+        finally:
+            self._in_read_value = False
+        self._record_read(varname, path, start, value)
+
+        return value
+
+    def read_variable(self, varname, path="/"):
+        """
+        Overrides the ``read_variable`` method of pymatgen. Returns a proxy to the netcdf variable
+        so that the reads performed by slicing the variable are recorded in ``read_stats``.
+        """
+        var = super(ETSF_Reader, self).read_variable(varname, path=path)
+        if getattr(self, "_in_read_value", False): return var
+        return _RecordedVariable(var, self, varname, path)
+
+    def _record_read(self, varname, path, start, value):
+        """Add the read of ``value`` started at time ``start`` to ``read_stats``."""
+        key = varname if path == "/" else "%s/%s" % (path.rstrip("/"), varname)
+        stat = self.read_stats.get(key)
+        if stat is None: stat = self.read_stats[key] = [0, 0.0, 0]
+        stat[0] += 1
+        stat[1] += time.time() - start
+        stat[2] += getattr(value, "nbytes", 0)
+
     # Must overwrite implementation of pymatgen.io.abinit.netcdf
     # due to a possible bug introduced by initial whitespaces in symbol
     @lazy_property
@@ -85,3 +130,34 @@ class ETSF_Reader(ionc.ETSF_Reader):
         amu_symbol = {Element.from_Z(n).symbol: v for n, v in amu_z.items()}
 
         return amu_symbol
+
+
+class _RecordedVariable(object):
+    """
+    Proxy for a netcdf variable returned by :meth:`ETSF_Reader.read_variable`.
+    Slicing operations are recorded in the ``read_stats`` of the reader,
+    all the other attributes are delegated to the netcdf variable.
+    """
+
+    def __init__(self, var, reader, varname, path):
+        self._var, self._reader, self._varname, self._path = var, reader, varname, path
+
+    def __getattr__(self, name):
+        return getattr(self._var, name)
+
+    def __len__(self):
+        return len(self._var)
+
+    def __getitem__(self, key):
+        start = time.time()
+        value = self._var[key]
+        self._reader._record_read(self._varname, self._path, start, value)
+        return value
+
+    def __iter__(self):
+        # Read the variable once instead of reading one entry at a time.
+        return iter(self[...])
+
+    def __array__(self, dtype=None, copy=None):
+        # The data are read from file so that a new array is always returned (copy is ignored).
+        return np.asarray(self[...], dtype=dtype)
@@ -520,7 +520,7 @@ def main():
             from abipy.data.hgh_pseudos import HGH_TABLE
             gsinp = factories.gs_input(structure, HGH_TABLE, spin_mode="unpolarized")
             gsinp["chkprim"] = 0
-            abistructure = gsinp.abiget_spacegroup(tolsym=options.tolsym)
+            abistructure = gsinp.abiget_spacegroup(tolsym=options.tolsym, use_abinit=True)
             print(abistructure.spget_summary(verbose=options.verbose))
             print("")
 
@@ -24,6 +24,21 @@ class AbilabTest(AbipyTest):
         assert abilab.isabifile("foo_GSR.nc")
         assert not abilab.isabifile("foobar")
 
+        # Names are resolved lazily.
+        from abipy.electrons.gsr import GsrFile
+        assert "GsrFile" in dir(abilab) and "GsrFile" in abilab.__all__
+        assert abilab.GsrFile is GsrFile
+        assert abilab.abifile_subclass_from_filename("foo_GSR.nc") is GsrFile
+        # ext2file and abiext2ncfile map extensions to classes.
+        assert abilab.abiext2ncfile["GSR.nc"] is GsrFile
+        assert abilab.abiext2ncfile.get_spec("GSR.nc") == "abipy.electrons.gsr:GsrFile"
+        assert dict(abilab.ext2file.items())[".abo"] is abilab.AbinitOutputFile
+        assert abilab.gs_input is not None
+        import_times = abilab.get_import_times()
+        assert all(t >= 0 for t in import_times.values())
+        with self.assertRaises(AttributeError):
+            abilab.foobar_does_not_exist
+
         import pandas
         df = pandas.DataFrame({"a": [1, 2], "b": [3, 4]})
         abilab.print_dataframe(df, title="foo")
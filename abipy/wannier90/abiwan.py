@@ -5,14 +5,18 @@ Inspired to the Fortran version of wannier90.
 """
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import os
 import numpy as np
 import pandas as pd
 import time
 
+import pymatgen.core.units as units
+
 from collections import OrderedDict
 from tabulate import tabulate
 from monty.string import marquee
 from monty.functools import lazy_property
+from monty.collections import dict2namedtuple
 from monty.termcolor import cprint
 from abipy.core.mixins import AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter
 from abipy.core.kpoints import Kpath, IrredZone
@@ -21,6 +25,16 @@ from abipy.tools.plotting import add_fig_kwargs, get_ax_fig_plt #, get_axarray_f
 from abipy.electrons.ebands import ElectronBands, ElectronsReader, ElectronBandsPlotter, RobotWithEbands
 
 
+# Cache (path, mtime, size) --> HWanR so that H(R) is not rebuilt when the same file is reopened.
+_HWAN_CACHE = OrderedDict()
+_HWAN_CACHE_MAXSIZE = 8
+
+
+def clear_hwan_cache():
+    """Clear the cache used by :meth:`AbiwanFile.hwan`."""
+    _HWAN_CACHE.clear()
+
+
 class AbiwanFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, NotebookWriter):
     """
     File produced by Abinit with the unitary matrices obtained by
@@ -210,10 +224,67 @@ class AbiwanFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Not
     @lazy_property
     def hwan(self):
         """
-        Construct the matrix elements of the KS Hamiltonian in real space
+        Construct the matrix elements of the KS Hamiltonian in real space.
+        The object is cached in memory (the cache is invalidated if the file is modified) and
+        is read from the file produced by :meth:`save_hwan` if present. See also ``hwan_cache_path``.
         """
-        start = time.time()
+        key = self._hwan_key
+        hwan = _HWAN_CACHE.get(key)
+        if hwan is None:
+            hwan = self._read_hwan_cache(key)
+            if hwan is None: hwan = self._build_hwan()
+            if len(_HWAN_CACHE) >= _HWAN_CACHE_MAXSIZE: _HWAN_CACHE.popitem(last=False)
+            _HWAN_CACHE[key] = hwan
+        return hwan
 
+    @property
+    def _hwan_key(self):
+        """Key used to cache hwan: (path, mtime, size) of the netcdf file."""
+        st = os.stat(self.filepath)
+        return (os.path.abspath(self.filepath), st.st_mtime, st.st_size)
+
+    @property
+    def hwan_cache_path(self):
+        """Path of the npz file with H(R) written by :meth:`save_hwan`."""
+        return os.path.splitext(self.filepath)[0] + "_HWANR.npz"
+
+    def save_hwan(self, filepath=None):
+        """
+        Save H(R) in npz format so that the ABIWAN file can be reopened without rebuilding it.
+        If filepath is None, ``hwan_cache_path`` is used i.e. the data is saved alongside the netcdf file.
+        Return path of the file.
+        """
+        filepath = self.hwan_cache_path if filepath is None else filepath
+        hwan, key = self.hwan, self._hwan_key
+        arrays = {"rmn_%d" % spin: hwan.spin_rmn[spin] for spin in range(hwan.nsppol)}
+        with open(filepath, "wb") as fh:
+            np.savez(fh, nwan_spin=hwan.nwan_spin, irvec=hwan.irvec, ndegen=hwan.ndegen,
+                     mtime=key[1], size=key[2], **arrays)
+        return filepath
+
+    def _read_hwan_cache(self, key, path=None):
+        """
+        Read H(R) from ``path`` (default: ``hwan_cache_path``). Return None if the file does not exist
+        or if it has been produced from a different version of the netcdf file.
+        """
+        path = self.hwan_cache_path if path is None else path
+        if not os.path.exists(path): return None
+        try:
+            with np.load(path) as data:
+                if float(data["mtime"]) != key[1] or int(data["size"]) != key[2]: return None
+                nwan_spin = data["nwan_spin"]
+                spin_rmn = [data["rmn_%d" % spin] for spin in range(len(nwan_spin))]
+                return HWanR(self.structure, nwan_spin, None, spin_rmn, data["irvec"], data["ndegen"])
+        except Exception as exc:
+            cprint("Exception while reading %s:\n%s" % (path, str(exc)), "yellow")
+            return None
+
+    def _build_hwan(self):
+        """
+        Compute H(R) from the KS eigenvalues and the unitary matrices.
+        H(q) is obtained for all the q-points with batched matrix products and
+        the Fourier transform to real space is done with a single matrix product.
+        """
         nrpts, num_kpts = len(self.irvec), self.ebands.nkpt
         kfrac_coords = self.ebands.kpoints.frac_coords
         # Init datastructures needed by HWanR
@@ -232,59 +303,49 @@ class AbiwanFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Not
         if np.any(self.have_disentangled_spin):
             u_matrix_opt = self.reader.read_value("U_matrix_opt", cmode="c")
 
+        # [nrpts, num_kpts] matrix with e^{-iqR} / N_kpts
+        phases = np.exp(-2.0j * np.pi * np.dot(self.irvec, kfrac_coords.T)) / num_kpts
+
         for spin in range(self.nsppol):
             num_wan = self.nwan_spin[spin]
+            eigens = self.ebands.eigens[spin]
+            # May have num_wan != mwan. uk has shape [num_kpts, num_wan, num_wan]
+            uk = np.swapaxes(u_matrix[spin, :, :num_wan, :num_wan], 1, 2)
 
             # Real-space Hamiltonian H(R) is calculated by Fourier
             # transforming H(q) defined on the ab-initio reciprocal mesh
-            HH_q = np.zeros((num_kpts, num_wan, num_wan), dtype=np.complex)
-
-            for ik in range(num_kpts):
-                eigs_k = self.ebands.eigens[spin, ik]
-                # May have num_wan != mwan
-                uk = u_matrix[spin, ik][:num_wan, :num_wan].transpose().copy()
-
-                # Calculate the matrix that describes the combined effect of
-                # disentanglement and maximal localization. This is the combination
-                # that is most often needed for interpolation purposes
-                # FIXME: problem with netcdf file
-                if not self.have_disentangled_spin[spin]:
-                    # [num_wann, num_wann] matrices, bands_in needed if exclude_bands
-                    hks = np.diag(eigs_k[self.bands_in[spin]])
-                    v_matrix = uk
-                else:
-                    # Select bands within the outer window
-                    # TODO: Test if bands_in?
-                    mask = self.lwindow[spin, ik]
-                    hks = np.diag(eigs_k[mask])
-                    #v_matrix = u_matrix_opt[spin, ik][:num_wan, mask].transpose() @ uk
-                    v_matrix = np.matmul(u_matrix_opt[spin, ik][:num_wan, mask].transpose(), uk)
-
-                #HH_q[ik] = v_matrix.transpose().conjugate() @ hks @ v_matrix
-                HH_q[ik] = np.matmul(v_matrix.transpose().conjugate(), np.matmul(hks, v_matrix))
-                spin_vmatrix[spin, ik] = v_matrix
+            # Calculate the matrix that describes the combined effect of
+            # disentanglement and maximal localization. This is the combination
+            # that is most often needed for interpolation purposes
+            # FIXME: problem with netcdf file
+            if not self.have_disentangled_spin[spin]:
+                # [num_wann, num_wann] matrices, bands_in needed if exclude_bands
+                # HH_q = V^H diag(e) V with V = uk
+                enes = eigens[:, self.bands_in[spin]]
+                HH_q = np.matmul(np.conj(np.swapaxes(uk, 1, 2)), enes[:, :, None] * uk)
+                for ik in range(num_kpts):
+                    spin_vmatrix[spin, ik] = uk[ik]
+            else:
+                # Select bands within the outer window
+                # TODO: Test if bands_in?
+                # V = A^T uk with A = U_matrix_opt[:num_wan, mask]. States outside the window
+                # are removed by setting the corresponding eigenvalues to zero.
+                mask = self.lwindow[spin]
+                nb = mask.shape[-1]
+                amat_t = np.swapaxes(u_matrix_opt[spin, :num_kpts, :num_wan, :nb], 1, 2)
+                vfull = np.matmul(amat_t, uk)
+                enes = np.where(mask, eigens[:, :nb], 0.0)
+                HH_q = np.matmul(np.conj(np.swapaxes(vfull, 1, 2)), enes[:, :, None] * vfull)
+                for ik in range(num_kpts):
+                    spin_vmatrix[spin, ik] = vfull[ik][mask[ik]]
 
             # Fourier transform Hamiltonian in the wannier-gauge representation.
             # O_ij(R) = (1/N_kpts) sum_q e^{-iqR} O_ij(q)
-            rmn = np.zeros((nrpts, num_wan, num_wan), dtype=np.complex)
-            j2pi = 2.0j * np.pi
-
-            #for ir in range(nrpts):
-            #   for ik, kfcs in enumerate(kfrac_coords):
-            #      jqr = j2pi * np.dot(kfcs, self.irvec[ir])
-            #      rmn[ir] += np.exp(-jqr) * HH_q[ik]
-            #rmn *= (1.0 / num_kpts)
-
-            for ik, kfcs in enumerate(kfrac_coords):
-                jqr = j2pi * np.dot(self.irvec, kfcs)
-                phases = np.exp(-jqr)
-                rmn += phases[:, None, None] * HH_q[ik]
-            rmn *= (1.0 / num_kpts)
+            rmn = np.dot(phases, HH_q.reshape(num_kpts, num_wan * num_wan))
 
             # Save results
-            spin_rmn[spin] = rmn
+            spin_rmn[spin] = rmn.reshape(nrpts, num_wan, num_wan)
 
-        print("HWanR built in %.3f (s)" % (time.time() - start))
         return HWanR(self.structure, self.nwan_spin, spin_vmatrix, spin_rmn, self.irvec, self.ndegen)
 
     def interpolate_ebands(self, vertices_names=None, line_density=20, ngkpt=None, shiftk=(0, 0, 0), kpoints=None):
@@ -322,22 +383,21 @@ class AbiwanFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Not
         nk = len(kpoints)
         eigens = np.zeros((self.nsppol, nk, self.mwan))
 
-        # Interpolate Hamiltonian for each kpoint and spin.
+        # Interpolate Hamiltonian for all the kpoints (block evaluation) and spin.
         start = time.time()
         write_warning = True
         for spin in range(self.nsppol):
             num_wan = self.nwan_spin[spin]
-            for ik, kpt in enumerate(kpoints):
-                oeigs = self.hwan.eval_sk(spin, kpt.frac_coords)
-                eigens[spin, ik, :num_wan] = oeigs
-                if num_wan < self.mwan:
-                    # May have different number of wannier functions if nsppol == 2.
-                    # Here I use the last value to fill eigens matrix (not very clean but oh well).
-                    eigens[spin, ik, num_wan:self.mwan] = oeigs[-1]
-                    if write_warning:
-                        cprint("Different number of wannier functions for spin. Filling last bands with oeigs[-1]",
-                               "yellow")
-                        write_warning = False
+            oeigs = self.hwan.eval_kpts(spin, kpoints.frac_coords).eigens
+            eigens[spin, :, :num_wan] = oeigs
+            if num_wan < self.mwan:
+                # May have different number of wannier functions if nsppol == 2.
+                # Here I use the last value to fill eigens matrix (not very clean but oh well).
+                eigens[spin, :, num_wan:self.mwan] = oeigs[:, -1:]
+                if write_warning:
+                    cprint("Different number of wannier functions for spin. Filling last bands with oeigs[-1]",
+                           "yellow")
+                    write_warning = False
 
         print("Interpolation completed in %.3f [s]" % (time.time() - start))
         occfacts = np.zeros_like(eigens)
@@ -392,7 +452,7 @@ class AbiwanFile(AbinitNcFile, Has_Header, Has_Structure, Has_ElectronBands, Not
         return self._write_nb_nbpath(nb, nbpath)
 
 
-from abipy.core.skw import ElectronInterpolator
+from abipy.core.skw import ElectronInterpolator, find_degs_sk
 class HWanR(ElectronInterpolator):
     """
     This object represents the KS Hamiltonian in the wannier-gauge representation.
@@ -437,27 +497,160 @@ class HWanR(ElectronInterpolator):
         Return:
             oeigs[nband]
         """
-        if der1 is not None or der2 is not None:
-            raise NotImplementedError("Derivatives")
+        r = self.eval_kpts(spin, kpt, dk1=der1 is not None, dk2=der2 is not None)
+        if der1 is not None: der1[...] = r.dedk[0]
+        if der2 is not None: der2[...] = r.dedk2[0]
+        return r.eigens[0]
 
-        # O_ij(k) = sum_R e^{+ik.R}*O_ij(R)
+    def eval_kpts(self, spin, kfrac_coords, dk1=False, dk2=False, degtol=1e-6, max_mem_mb=256):
+        """
+        Interpolate the eigenvalues for a block of k-points. Optionally compute the band velocities
+        and the Hessian matrices with the Hellmann-Feynman expressions.
+        H(k) is obtained from H(R) with a single matrix product per block of k-points
+        and diagonalized with a stacked call to ``eigh``. K-points are processed in chunks
+        so that the size of the temporary arrays does not exceed ``max_mem_mb``.
+
+        Derivatives are computed with respect to k in reduced coordinates.
+        In degenerate subspaces, the velocities are obtained by diagonalizing the velocity
+        operator in the subspace while the contributions of the degenerate states are
+        excluded from the second-order term of the Hessian.
+
+        Args:
+            spin: Spin index.
+            kfrac_coords: K-points in reduced coordinates. Array of shape (nk, 3).
+            dk1 (bool): True if gradient is wanted.
+            dk2 (bool): True to compute 2nd order derivatives.
+            degtol: Two states are degenerate if they differ by less than ``degtol`` (eV).
+            max_mem_mb: Approximate memory (Mb) used for the temporary arrays.
+
+        Return:
+            namedtuple with:
+            interpolated energies in eigens[nk, nwan]
+            gradient in dedk[nk, nwan, 3]
+            hessian in dedk2[nk, nwan, 3, 3]
+
+            gradient and hessian are set to None if not computed.
+        """
+        kfrac_coords = np.reshape(kfrac_coords, (-1, 3))
+        nk, nwan = len(kfrac_coords), self.nwan_spin[spin]
+        eigens = np.empty((nk, nwan))
+        dedk = None if not (dk1 or dk2) else np.empty((nk, nwan, 3))
+        dedk2 = None if not dk2 else np.empty((nk, nwan, 3, 3))
+
+        # [nrpts, nwan * nwan] matrix with H(R) / ndegen.
+        hr = (self.spin_rmn[spin] / self.ndegen[:, None, None]).reshape(self.nrpts, nwan * nwan)
         j2pi = 2.0j * np.pi
+        # i 2pi R_a and (i 2pi)^2 R_a R_b for the upper triangle.
+        jr = j2pi * self.irvec
+        inds_ab = [(a, b) for b in range(3) for a in range(b + 1)]
+        jr2 = np.array([jr[:, a] * jr[:, b] for a, b in inds_ab])
+
+        # Number of complex arrays of shape [nk, nrpts] and [nk, nwan, nwan] allocated per chunk.
+        nder = 1 + (3 if dedk is not None else 0) + (6 if dk2 else 0)
+        bytes_per_k = 16 * (2 * self.nrpts + 2 * nder * nwan ** 2)
+        chunksize = max(1, int(max_mem_mb * 1024 ** 2 / bytes_per_k))
+
+        for k0 in range(0, nk, chunksize):
+            kpts = kfrac_coords[k0:k0 + chunksize]
+            # O_ij(k) = sum_R e^{+ik.R} * O_ij(R)
+            phases = np.exp(j2pi * np.dot(kpts, self.irvec.T))
+            hk = np.dot(phases, hr).reshape(-1, nwan, nwan)
+            enes, uk = np.linalg.eigh(hk)
+            eigens[k0:k0 + chunksize] = enes
+            if dedk is None: continue
+
+            # Velocity operator in the eigenbasis: D_a = U^H dH/dk_a U
+            ukh = np.conj(np.swapaxes(uk, -1, -2))
+            dmats = [np.matmul(ukh, np.matmul(np.dot(phases * jr[:, a], hr).reshape(-1, nwan, nwan), uk))
+                     for a in range(3)]
+
+            # Hellmann-Feynman. Diagonalize D_a in the degenerate subspaces.
+            for a in range(3):
+                vel = np.diagonal(dmats[a], axis1=1, axis2=2).real.copy()
+                for ik in range(len(kpts)):
+                    if np.all(np.diff(enes[ik]) > degtol): continue
+                    for dgbs in find_degs_sk(enes[ik], degtol):
+                        if len(dgbs) == 1: continue
+                        vel[ik, dgbs] = np.linalg.eigvalsh(dmats[a][ik][np.ix_(dgbs, dgbs)])
+                dedk[k0:k0 + chunksize, :, a] = vel
+
+            if not dk2: continue
+            # d2E_n / dk_a dk_b = (U^H d2H/dk_a dk_b U)_nn + 2 Re sum_{m!=n} (D_a)_nm (D_b)_mn / (E_n - E_m)
+            ediff = enes[:, :, None] - enes[:, None, :]
+            with np.errstate(divide="ignore"):
+                inv_ediff = np.where(np.abs(ediff) > degtol, 1.0 / ediff, 0.0)
+
+            for iab, (a, b) in enumerate(inds_ab):
+                d2h = np.dot(phases * jr2[iab], hr).reshape(-1, nwan, nwan)
+                hess = np.einsum("kmn,kmi,kin->kn", np.conj(uk), d2h, uk).real
+                hess += 2 * np.einsum("kij,kji,kij->ki", dmats[a], dmats[b], inv_ediff).real
+                dedk2[k0:k0 + chunksize, :, a, b] = hess
+                if a != b: dedk2[k0:k0 + chunksize, :, b, a] = hess
+
+        return dict2namedtuple(eigens=eigens, dedk=dedk if dk1 else None, dedk2=dedk2)
+
+    def interp_kpts(self, kfrac_coords, dk1=False, dk2=False):
+        """
+        Interpolate energies on an arbitrary set of k-points. Optionally, compute
+        gradients and Hessian matrices. Wraps :meth:`eval_kpts`.
+
+        Args:
+            kfrac_coords: K-points in reduced coordinates.
+            dk1 (bool): True if gradient is wanted.
+            dk2 (bool): True to compute 2nd order derivatives.
+
+        Return:
+            namedtuple with:
+            interpolated energies in eigens[nsppol, len(kfrac_coords), nband]
+            gradient in dedk[self.nsppol, len(kfrac_coords), self.nband, 3))
+            hessian in dedk2[self.nsppol, len(kfrac_coords), self.nband, 3, 3))
+
+            gradient and hessian are set to None if not computed.
+            If the number of Wannier functions depends on spin, the last band is used to fill the arrays.
         """
-        num_wan = self.nwan_spin[spin]
-        hk_ij = np.zeros((num_wan, num_wan), dtype=np.complex)
-        for ir in range(self.nrpts):
-            jrk = j2pi * np.dot(kpt, self.irvec[ir])
-            hk_ij += self.spin_rmn[spin][ir] * (np.exp(jrk) / self.ndegen[ir])
-        oeigs, _ = np.linalg.eigh(hk_ij)
+        start = time.time()
+        kfrac_coords = np.reshape(kfrac_coords, (-1, 3))
+        new_nkpt, mwan = len(kfrac_coords), max(self.nwan_spin)
+        new_eigens = np.empty((self.nsppol, new_nkpt, mwan))
+        dedk = None if not dk1 else np.empty((self.nsppol, new_nkpt, mwan, 3))
+        dedk2 = None if not dk2 else np.empty((self.nsppol, new_nkpt, mwan, 3, 3))
+
+        for spin in range(self.nsppol):
+            nw = self.nwan_spin[spin]
+            r = self.eval_kpts(spin, kfrac_coords, dk1=dk1, dk2=dk2)
+            for out, res in ((new_eigens, r.eigens), (dedk, r.dedk), (dedk2, r.dedk2)):
+                if out is None: continue
+                out[spin, :, :nw] = res
+                if nw < mwan: out[spin, :, nw:] = res[:, nw-1:nw]
+
+        if self.verbose:
+            print("Interpolation completed in %.3f (s)" % (time.time() - start))
+
+        return dict2namedtuple(eigens=new_eigens, dedk=dedk, dedk2=dedk2)
+
+    def get_effmass_tensors(self, spin, kpt, degtol=1e-6):
         """
+        Compute the effective mass tensors at the given k-point from the analytic Hessian.
 
-        # This is a bit faster.
-        jrk = j2pi * np.dot(self.irvec, kpt)
-        phases = np.exp(jrk) / self.ndegen
-        hk_ij = (self.spin_rmn[spin] * phases[:, None, None]).sum(axis=0)
-        oeigs, _ = np.linalg.eigh(hk_ij)
+        Args:
+            spin: Spin index.
+            kpt: K-point in reduced coordinates.
+            degtol: Tolerance (eV) used to detect degenerate states.
 
-        return oeigs
+        Return:
+            |numpy-array| of shape [nwan, 3, 3] with the effective mass tensors in Cartesian
+            coordinates (atomic units). Bands with singular Hessian are set to inf.
+        """
+        hess = self.eval_kpts(spin, kpt, dk2=True, degtol=degtol).dedk2[0]
+        # Convert derivatives wrt reduced coordinates to Cartesian (eV Ang^2) then to Ha Bohr^2.
+        amat = self.structure.lattice.matrix
+        hess = np.einsum("ia,nij,jb->nab", amat, hess, amat) / (2 * np.pi) ** 2
+        hess *= units.eV_to_Ha / units.bohr_to_ang ** 2
+
+        masses = np.full_like(hess, np.inf)
+        for ib, h in enumerate(hess):
+            if abs(np.linalg.det(h)) > 1e-12: masses[ib] = np.linalg.inv(h)
+        return masses
 
     # TODO
     #def interpolate_omat(self, omat, kpoints):
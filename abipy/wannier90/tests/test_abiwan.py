@@ -2,6 +2,7 @@
 from __future__ import print_function, division, absolute_import, unicode_literals
 
 import os
+import numpy as np
 import abipy.data as abidata
 
 from abipy import abilab
@@ -39,6 +40,28 @@ class TestAbiwanFile(AbipyTest):
                     ews = abiwan.hwan.eval_sk(spin, kpt.frac_coords)
                     self.assert_almost_equal(ews[:n], in_eigens[spin, ik, :n])
 
+                # Block evaluation with derivatives (small chunks) vs finite differences.
+                kfrac_coords = abiwan.kpoints.frac_coords
+                r = abiwan.hwan.eval_kpts(spin, kfrac_coords, dk1=True, dk2=True, max_mem_mb=0.001)
+                self.assert_almost_equal(r.eigens, in_eigens[spin, :, :n])
+                assert r.dedk.shape == (len(kfrac_coords), n, 3)
+                assert r.dedk2.shape == (len(kfrac_coords), n, 3, 3)
+                self.assert_almost_equal(r.dedk2, np.swapaxes(r.dedk2, -1, -2))
+                der1 = np.empty((n, 3))
+                kpt, step = np.array([0.11, 0.07, 0.03]), np.array([1e-4, 0, 0])
+                abiwan.hwan.eval_sk(spin, kpt, der1=der1)
+                fd = (abiwan.hwan.eval_sk(spin, kpt + step) - abiwan.hwan.eval_sk(spin, kpt - step)) / 2e-4
+                self.assert_almost_equal(der1[:, 0], fd, decimal=3)
+                assert abiwan.hwan.get_effmass_tensors(spin, kpt).shape == (n, 3, 3)
+
+            # H(R) is cached in memory and can be saved to disk.
+            with abilab.abiopen(filepath) as other:
+                assert other.hwan is abiwan.hwan
+            tmp_path = abiwan.save_hwan(filepath=self.get_tmpname(suffix=".npz"))
+            hwan = abiwan._read_hwan_cache(abiwan._hwan_key, path=tmp_path)
+            for spin in range(abiwan.nsppol):
+                self.assert_almost_equal(hwan.spin_rmn[spin], abiwan.hwan.spin_rmn[spin])
+
             ebands_kmesh = abiwan.interpolate_ebands(ngkpt=(4, 4, 4))
             assert ebands_kmesh.kpoints.is_ibz
 
@@ -63,6 +63,9 @@ class TestWoutFile(AbipyTest):
             assert wout.nwan == 8
             assert np.all(wout.grid_size == 4)
             assert len(wout.conv_df) == 6 + 1
+            assert len(wout.dis_df) == 40
+            self.assert_equal(wout.dis_df.iter.values, np.arange(1, 41))
+            assert wout.dis_df.omegaI_i.values[-1] == 11.84919371
             assert wout.conv_df.O_D[1] == 0.1213986 and wout.conv_df.O_OD[1] == 2.7017701
             assert wout.conv_df.O_D.values[-1] == 0.1054702 and wout.conv_df.O_OD.values[-1] == 2.5449106
 
@@ -2,11 +2,13 @@
 """Interface to the wout output file produced by Wannier90."""
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import re
 import numpy as np
 import pandas as pd
 
 from collections import OrderedDict
 from monty.string import marquee
+from monty.functools import lazy_property
 from abipy.core.mixins import BaseFile, Has_Structure, NotebookWriter
 from abipy.core.structure import Structure
 from abipy.tools.plotting import add_fig_kwargs, get_axarray_fig_plt
@@ -31,16 +33,57 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
         super(WoutFile, self).__init__(filepath)
         self.warnings = []
         self.use_disentangle = False
-        self.conv_df, self.dis_df = None, None
 
         with open(self.filepath, "rt") as fh:
-            self.lines = fh.readlines()
+            self._text = fh.read()
 
+        # The header is parsed here. The DISENTANGLE and WANNIERISE tables
+        # are parsed on demand when the corresponding attributes are accessed.
         self._parse_dims()
+
+    @lazy_property
+    def lines(self):
+        """List of strings with the lines of the file."""
+        return self._text.splitlines(True)
+
+    @lazy_property
+    def dis_df(self):
+        """
+        |pandas-DataFrame| with the DISENTANGLE cycles. None if not available.
+        """
+        try:
+            return self._parse_dis_table()
+        except Exception as exc:
+            print("Exception while parsing DISENTANGLE cycles:\n", exc)
+            return None
+
+    @lazy_property
+    def _wannierise(self):
+        """
+        Results of the WANNIERISE cycles: (conv_df, wf_centers, wf_spreads) tuple or None if not available.
+        """
         try:
-            self._parse_iterations()
+            return self._parse_wannierise()
         except Exception as exc:
-            print("Exception in _parse_iterations:\n", exc)
+            print("Exception while parsing WANNIERISE cycles:\n", exc)
+            return None
+
+    @property
+    def conv_df(self):
+        """
+        |pandas-DataFrame| with the WANNIERISE cycles. None if not available.
+        """
+        return None if self._wannierise is None else self._wannierise[0]
+
+    @property
+    def wf_centers(self):
+        """[nwan, nstep, 3] array with the Wannier centers at each step. None if not available."""
+        return None if self._wannierise is None else self._wannierise[1]
+
+    @property
+    def wf_spreads(self):
+        """[nwan, nstep] array with the Wannier spreads at each step. None if not available."""
+        return None if self._wannierise is None else self._wannierise[2]
 
     def close(self):
         """Close file. Required by abc protocol."""
@@ -110,10 +153,16 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
             ("MAIN", "WANNIERISE", "PLOTTING", "DISENTANGLE")])
         params_done = False
 
-        for iln, line in enumerate(self.lines):
-            # Check for any warnings
+        # Warnings can appear anywhere in the file.
+        self.warnings = [m.group(0) + "\n" for m in re.finditer(r"^[^\n]*Warning[^\n]*", self._text, re.M)]
+
+        # Only the header (up to the end of the parameters section) is scanned line by line.
+        iend = self._text.find("Time to read parameters")
+        lines = (self._text if iend == -1 else self._text[:iend]).splitlines(True)
+
+        for iln, line in enumerate(lines):
+            # Skip warnings
             if 'Warning' in line:
-                self.warnings.append(line)
                 continue
 
             if "Time to read parameters" in line:
@@ -132,7 +181,7 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
                 #    a_1     0.000000   2.715473   2.715473
                 #    a_2     2.715473   0.000000   2.715473
                 #    a_3     2.715473   2.715473   0.000000
-                lattice = np.array([list(map(float, self.lines[iln+j].split()[1:])) for j in range(1, 4)])
+                lattice = np.array([list(map(float, lines[iln+j].split()[1:])) for j in range(1, 4)])
                 continue
 
             # Parse atoms.
@@ -146,7 +195,7 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
                 frac_coords, species = [], []
                 i = iln + 2
                 while True:
-                    l = self.lines[i].strip()
+                    l = lines[i].strip()
                     if l.startswith("*"): break
                     i += 1
                     tokens = l.replace("|", " ").split()
@@ -171,12 +220,12 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
                 # Use params_done to avoid parsing the second section with WANNIERISE
                 key = line.replace("*", "").replace("-", "").strip()
                 i = iln + 1
-                l = self.lines[i].strip()
+                l = lines[i].strip()
                 while not l.startswith("*-"):
                     tokens = [s.strip() for s in l.replace("|", "").split(":")]
                     self.params_section[key][tokens[0]] = tokens[1]
                     i += 1
-                    l = self.lines[i].strip()
+                    l = lines[i].strip()
                 continue
 
         # Extract important metadata from sections and convert from string.
@@ -186,100 +235,80 @@ class WoutFile(BaseFile, Has_Structure, NotebookWriter):
 
     def _parse_iterations(self):
         """
-        Parse iteration steps if not already done and store results in self.
+        Parse the WANNIERISE cycles if not already done.
 
         Return: 0 if success.
         """
-        # Don't parse it again if already done.
-        if self.conv_df is not None: return 0
+        return 0 if self._wannierise is not None else 1
 
-        if self.use_disentangle:
-            # Parse Disentanglement cycles
-            # +---------------------------------------------------------------------+<-- DIS
-            # |  Iter     Omega_I(i-1)      Omega_I(i)      Delta (frac.)    Time   |<-- DIS
-            # +---------------------------------------------------------------------+<-- DIS
-            #       1       3.91743302       3.66269149       6.955E-02      0.28    <-- DIS
-            #       2       3.66269149       3.66269149       2.021E-14      0.29    <-- DIS
-            # <<<      Delta < 1.000E-10  over  3 iterations     >>>
-            # <<< Disentanglement convergence criteria satisfied >>>
-            in_diis = 0
-            data = OrderedDict([(s, []) for s in
-                ("iter", "omegaI_im1", "omegaI_i", "delta_frac", "time")])
-
-            for line in self.lines:
-                line = line.strip()
-                if not line.endswith("<-- DIS"):
-                    if in_diis: break
-                    continue
-                in_diis += 1
-                if in_diis >= 4:
-                    toks = line.split()
-                    for i, key in enumerate(data.keys()):
-                        data[key].append(int(toks[i]) if i == 0 else float(toks[i]))
-
-            self.dis_df = pd.DataFrame.from_dict(data)
-
-        # Parse Wannierization cycles.
-        for start, line in enumerate(self.lines):
-            if "Initial State" in line: break
-        else:
-            return 1
-
-        self.wf_centers = [[] for _ in range(self.nwan)]
-        self.wf_spreads = [[] for _ in range(self.nwan)]
-        data = OrderedDict([(s, []) for s in
-            ("iter",  "delta_spread", "rms_gradient", "spread", "time",
-             "O_D", "O_OD", "O_TOT",
-            )])
-
-        lines = self.lines[start:][:]
-        while lines:
-            line = lines.pop(0).strip()
-            if not line.startswith("Initial State") and not line.startswith("Cycle:"): continue
-            step = int(line.split()[-1]) if line.startswith("Cycle:") else 0
-            for iw in range(self.nwan + 1):
-                # WF centre and spread    1  (  0.042127,  0.071712, -0.424794 )    10.42287858
-                # Sum of centres and spreads (  0.933074, -0.071343, -0.800933 )    42.11245002
-                tokens = lines.pop(0).replace("(", " ").replace(")", " ").replace(",", "").split()
-                spread = float(tokens[-1])
-                center = list(map(float, tokens[-4:-1]))
-                if iw != self.nwan:
-                    self.wf_centers[iw].append(center)
-                    self.wf_spreads[iw].append(spread)
-
-            line = lines.pop(0).strip()
-            if line:
-                raise ValueError("Expecting empty string. Got:\n`%s`" % line)
-
-            #      0     0.421E+02     0.0000000000       42.1124500153       0.57  <-- CONV
-            #        O_D=     32.4608805 O_OD=      5.9016636 O_TOT=     42.1124500 <-- SPRD
-            # ------------------------------------------------------------------------------
-            # Cycle:      1
-            #  WF centre and spread    1  ( -0.141379, -0.258009, -0.488755 )     8.73529609
-            #  Sum of centres and spreads (  0.794432, -0.178304, -0.823458 )    32.08361376
-            #      1    -0.100E+02    10.2774612971       32.0836137609       0.57  <-- CONV
-            #        O_D=     22.6617600 O_OD=      5.6719478 O_TOT=     32.0836138 <-- SPRD
-            # Delta: O_D= -0.9799120E+01 O_OD= -0.2297158E+00 O_TOT= -0.1002884E+02 <-- DLTA
-            # ------------------------------------------------------------------------------
-            # Parse CONV and add values to data
-            conv_toks = lines.pop(0).split()
-            for i, k in enumerate(("iter", "delta_spread", "rms_gradient", "spread", "time")):
-                data[k].append(int(conv_toks[i]) if i == 0 else float(conv_toks[i]))
-
-            sprd_toks = lines.pop(0).split()
-            data["O_D"].append(float(sprd_toks[1]))
-            data["O_OD"].append(float(sprd_toks[3]))
-            data["O_TOT"].append(float(sprd_toks[5]))
-            if step > 0:
-                dlta_tokens = lines.pop(0).split()
-
-        self.conv_df = pd.DataFrame.from_dict(data)
+    # Numerical rows of the DISENTANGLE and WANNIERISE tables.
+    _RE_DIS_BLOCK = re.compile(r"(?:^[^\n]*<-- DIS[ \t]*(?:\n|$))+", re.M)
+    _RE_DIS_ROW = re.compile(r"^\s*(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*<-- DIS", re.M)
+    _RE_CENTRE = re.compile(r"WF centre and spread\s+\d+\s+\(\s*(\S+?)\s*,\s*(\S+?)\s*,\s*(\S+?)\s*\)\s+(\S+)")
+    _RE_CONV_ROW = re.compile(r"^\s*(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*<-- CONV", re.M)
+    _RE_SPRD_ROW = re.compile(r"O_D=\s*(\S+)\s+O_OD=\s*(\S+)\s+O_TOT=\s*(\S+)\s*<-- SPRD")
+
+    def _parse_dis_table(self):
+        """
+        Parse the DISENTANGLE cycles. Return |pandas-DataFrame| or None if not available.
+        """
+        if not self.use_disentangle: return None
+        # Parse Disentanglement cycles
+        # +---------------------------------------------------------------------+<-- DIS
+        # |  Iter     Omega_I(i-1)      Omega_I(i)      Delta (frac.)    Time   |<-- DIS
+        # +---------------------------------------------------------------------+<-- DIS
+        #       1       3.91743302       3.66269149       6.955E-02      0.28    <-- DIS
+        #       2       3.66269149       3.66269149       2.021E-14      0.29    <-- DIS
+        # <<<      Delta < 1.000E-10  over  3 iterations     >>>
+        # <<< Disentanglement convergence criteria satisfied >>>
+        # Only the first block of contiguous lines is considered.
+        m = self._RE_DIS_BLOCK.search(self._text)
+        values = np.array(self._RE_DIS_ROW.findall(m.group(0)) if m else [], dtype=float).reshape(-1, 5)
+
+        return pd.DataFrame(OrderedDict([
+            ("iter", values[:, 0].astype(int)),
+            ("omegaI_im1", values[:, 1]), ("omegaI_i", values[:, 2]),
+            ("delta_frac", values[:, 3]), ("time", values[:, 4]),
+        ]))
+
+    def _parse_wannierise(self):
+        """
+        Parse the WANNIERISE cycles. The section between ``Initial State`` and ``Final State``
+        is converted in bulk to numpy arrays.
+
+        Return: (conv_df, wf_centers, wf_spreads) or None if the file does not contain Wannierization cycles.
+        """
+        start = self._text.find("Initial State")
+        if start == -1: return None
+        stop = self._text.find("Final State", start)
+        text = self._text[start:] if stop == -1 else self._text[start:stop]
+
+        #  WF centre and spread    1  ( -0.141379, -0.258009, -0.488755 )     8.73529609
+        #  Sum of centres and spreads (  0.794432, -0.178304, -0.823458 )    32.08361376
+        #      1    -0.100E+02    10.2774612971       32.0836137609       0.57  <-- CONV
+        #        O_D=     22.6617600 O_OD=      5.6719478 O_TOT=     32.0836138 <-- SPRD
+        # Delta: O_D= -0.9799120E+01 O_OD= -0.2297158E+00 O_TOT= -0.1002884E+02 <-- DLTA
+        conv = np.array(self._RE_CONV_ROW.findall(text), dtype=float).reshape(-1, 5)
+        sprd = np.array(self._RE_SPRD_ROW.findall(text), dtype=float).reshape(-1, 3)
+        centres = np.array(self._RE_CENTRE.findall(text), dtype=float).reshape(-1, 4)
+
+        nstep = len(conv)
+        if len(sprd) != nstep or len(centres) != nstep * self.nwan:
+            raise ValueError("Inconsistent number of entries in WANNIERISE cycles: CONV: %d, SPRD: %d, centres: %d" % (
+                nstep, len(sprd), len(centres)))
+
+        conv_df = pd.DataFrame(OrderedDict([
+            ("iter", conv[:, 0].astype(int)),
+            ("delta_spread", conv[:, 1]), ("rms_gradient", conv[:, 2]), ("spread", conv[:, 3]), ("time", conv[:, 4]),
+            ("O_D", sprd[:, 0]), ("O_OD", sprd[:, 1]), ("O_TOT", sprd[:, 2]),
+        ]))
 
         # Convert to numpy array (nwan, nstep, 3) and (nwan, nstep)
-        self.wf_centers = np.array(self.wf_centers)
-        self.wf_spreads = np.array(self.wf_spreads)
+        centres = centres.reshape(nstep, self.nwan, 4).transpose(1, 0, 2)
+        wf_centers = np.ascontiguousarray(centres[:, :, :3])
+        wf_spreads = np.ascontiguousarray(centres[:, :, 3])
 
-        return 0
+        return conv_df, wf_centers, wf_spreads
 
     @add_fig_kwargs
     def plot(self, fontsize=12, **kwargs):
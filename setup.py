@@ -98,6 +98,7 @@ def find_package_data():
             "sio2_screening/*",
             "znse_phonons/*",
         ],
+        'abipy.abio.abivar_database': ["*.json"],
         'abipy.gui.awx' : ['images/*'],
     }
 